@@ -0,0 +1,161 @@
+"""
+Incremental parser for the markdown analysis the model writes (see the
+template in naga.ANALYSIS_PROMPT).
+
+AnalysisParser.feed() accepts the text in arbitrary chunks, e.g. as the
+model streams it, and processes each complete line once. close() returns
+{section title: node}, where each node looks like
+
+    {
+        "title": "4. Competitive Intelligence & Customer Psychology",
+        "text": "...",           # the section's non-blank lines, as before
+        "items": [...],           # bullets that are not "Label: value"
+        "fields": {label: value}, # "- Label: value" bullets
+        "records": [...],         # "**Brand 1:**" blocks: {"title", "note", "fields"}
+        "subsections": [...],     # "A. ..." / "**Bold heading**" blocks, same shape
+        "scores": {component: {"score": 8.0, "is_na": False}},
+    }
+
+Subsections have the same keys except "text" and "subsections".
+"""
+import re
+
+from scoring import parse_score_line
+
+_SUBSECTION = re.compile(r"^([A-Z])\.\s+(.+)$")
+_RECORD = re.compile(r"^\*\*([^*]+?\s+\d+):?\*\*:?\s*(.*)$")
+_BOLD_HEADING = re.compile(r"^\*\*([^*]+?):?\*\*:?$")
+_BULLET = re.compile(r"^(?:[-*•]|\d+[.)])\s+(.*)$")
+_FIELD = re.compile(r"^\**([^:*]{1,80}?)\**\s*:\s*(.*)$")
+_RULE = re.compile(r"^[-=_*]{3,}$")
+_MAX_LABEL_WORDS = 8
+
+
+def _container(title):
+    return {"title": title, "items": [], "fields": {}, "records": [], "scores": {}}
+
+
+def _section(title):
+    node = _container(title)
+    node["text"] = []
+    node["subsections"] = []
+    return node
+
+
+class AnalysisParser:
+    def __init__(self, on_section=None):
+        """`on_section(node)` is called as soon as each section is complete."""
+        self.sections = {}
+        self.on_section = on_section
+        self._pending = ""
+        self._section = None
+        self._container = None
+        self._record = None
+
+    # ===== Input =====
+    def feed(self, chunk: str) -> None:
+        if not chunk:
+            return
+        lines = (self._pending + chunk).split("\n")
+        # The last piece has no newline yet; keep it for the next chunk
+        self._pending = lines.pop()
+        for line in lines:
+            self._line(line)
+
+    def close(self) -> dict:
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ""
+        self._finish_section()
+        return self.sections
+
+    # ===== Line Handling =====
+    def _finish_section(self):
+        section = self._section
+        if section is None:
+            return
+        section["text"] = "\n".join(section["text"])
+        self._section = self._container = self._record = None
+        if self.on_section:
+            self.on_section(section)
+
+    def _line(self, line):
+        line = line.strip()
+        if not line:
+            return
+
+        if line[0] == "#":
+            self._finish_section()
+            title = line.lstrip("#").strip()
+            self._section = self._container = _section(title)
+            self.sections[title] = self._section
+            return
+
+        section = self._section
+        if section is None:
+            return
+        section["text"].append(line)
+        first = line[0]
+
+        if first in "-*•" and "**" in line:
+            # Score lines may be bold labels or bullets with a bold label
+            score = parse_score_line(line)
+            if score is not None:
+                key, value, is_na = score
+                section["scores"][key] = {"score": value, "is_na": is_na}
+                return
+
+        if first == "*" and line.startswith("**"):
+            match = _RECORD.match(line)
+            if match:
+                self._record = {"title": match[1].strip(), "note": match[2].strip(), "fields": {}}
+                self._container["records"].append(self._record)
+                return
+            match = _BOLD_HEADING.match(line)
+            if match:
+                self._open_subsection(match[1].strip())
+                return
+
+        if first in "-*•" or first.isdigit():
+            match = _BULLET.match(line)
+            if match:
+                self._bullet(match[1])
+                return
+
+        if "A" <= first <= "Z" and line[1:2] == ".":
+            match = _SUBSECTION.match(line)
+            if match:
+                self._open_subsection(line)
+                return
+
+        if _RULE.match(line):
+            return
+        # Free text continues the current bullet list
+        self._container["items"].append(line)
+
+    def _open_subsection(self, title):
+        self._container = _container(title)
+        self._section["subsections"].append(self._container)
+        self._record = None
+
+    def _bullet(self, text):
+        match = _FIELD.match(text)
+        if match and len(match[1].split()) <= _MAX_LABEL_WORDS:
+            target = self._record if self._record is not None else self._container
+            target["fields"][match[1].strip()] = match[2].strip()
+        else:
+            self._container["items"].append(text.strip())
+
+
+def parse_analysis(text: str) -> dict:
+    parser = AnalysisParser()
+    parser.feed(text)
+    return parser.close()
+
+
+def parse_analysis_stream(chunks, on_section=None) -> dict:
+    """Parses an iterable of text chunks (e.g. streamed model output)."""
+    parser = AnalysisParser(on_section)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
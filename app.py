@@ -1,60 +1,34 @@
 import json
 import streamlit as st
-import google.generativeai as genai
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import dotenv
 import os
-from docx import Document
-from io import BytesIO
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import tempfile
+from datetime import date
+from functools import partial, wraps
 from collections import Counter
-from jsontostring import convert_sales_report_to_string
-
-
-def parse_explicit_counts(data_series):
-    """
-    Parses a pandas Series of strings that may contain comma-separated items
-    with explicit counts like 'Item - 100' or 'Item – 50'.
-    Returns a dictionary of aggregated {item_name: count}.
-    """
-    total_counts = {}
-    for value in data_series:
-        if pd.isna(value) or str(value).strip().lower() == 'nan':
-            continue
-        
-        # Split by comma for multiple items in one cell
-        items_raw = [i.strip() for i in str(value).split(",") if i.strip()]
-        
-        for raw_item in items_raw:
-            # Check for delimiters like '–' (long dash) or '-' (standard dash)
-            if "–" in raw_item:
-                parts = raw_item.split("–")
-            elif "-" in raw_item:
-                parts = raw_item.split("-")
-            else:
-                parts = [raw_item]
-            
-            name = parts[0].strip()
-            
-            # Extract count if present, otherwise default to 1
-            if len(parts) > 1:
-                try:
-                    # Remove any non-numeric chars before converting
-                    count_str = "".join(filter(str.isdigit, parts[1]))
-                    count = int(count_str) if count_str else 1
-                except ValueError:
-                    count = 1
-            else:
-                count = 1
-            
-            total_counts[name] = total_counts.get(name, 0) + count
-    return total_counts
 
-
-# Load environment variables
+# Load environment variables before the modules below read their NAGA_* settings at import time
 dotenv.load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue
+from jsontostring import convert_sales_report_to_string
+from entities import annotate_entities, load_catalog
+from fingerprint import AudioIndex, FingerprintError, fingerprint_file
+from model_client import get_model_client
+from profiling import profiled, request_profiling, reset_request_profiling
+from report_model import COMPETITOR_CATEGORIES, validate_report
+from scoring import COMPONENT_LABELS, COMPONENTS, apply_scores, component_scores, final_score
+from report_cache import ReportCache
+from report_store import ReportStore, prompt_version
+from sessions import SessionRegistry
+from similar import SimilarityIndex
+from uploads import UploadTracker, spool_upload
+
+# Dashboard pages import pandas/plotly (cube, charts), and exports import
+# python-docx, inside the functions that need them, so the home page does
+# not load them.
 
 st.logo(
     "Naga E-Store.png",
@@ -77,19 +51,12 @@ st.markdown(
 """
 , unsafe_allow_html=True)
 
-def analyze_audio_with_gemini(audio_file):
-    # Configure generation parameters for consistency and JSON mode
-    generation_config = {
-        "response_mime_type": "application/json"
-    }
-    
-    model = genai.GenerativeModel(
-        "gemini-2.5-pro",
-        generation_config=generation_config
-    )
-    
-    # Combined prompt for direct audio analysis
-    analysis_prompt = """
+# ===== Gemini Model Setup =====
+MODEL_NAME = "gemini-2.5-pro"
+
+# ===== Prompt Definition =====
+# Combined prompt for direct audio analysis
+ANALYSIS_PROMPT = """
 CONFIGURATION
 
 Manufacturer/Company: Naga
@@ -212,7 +179,7 @@ For EACH competitor brand and product mentioned, document separately:
 - Reasons for Preference: Why does customer prefer this brand than Naga in detail?
     - [Price? Consumers Choice? Taste? Local brand? Habit? Promotions? etc..]
 - Category:
-    - [Based on the reason Categorize whether it is due to Price Concern or Local Brand Preference or Taste & Quality Preference or Brand Loyalty / Trust or Availability & Supply Strength or Retailer Margin Advantage or Promotions & Schemes or Packaging Preference or Customer Demand / Pull or Regional Taste / Cultural Fit or Other Factors]
+    - [Based on the reason Categorize whether it is due to {competitor_categories}]
       IMPORTANT - Choose the Category only on the list of reasons mentioned above, dont change the list.
 
 **Brand 1:**
@@ -222,7 +189,7 @@ For EACH competitor brand and product mentioned, document separately:
 - Reasons for Preference: Why does customer prefer this brand than Naga in detail?
     - [Price? Consumers Choice? Taste? Local brand? Habit? Promotions? etc..]
 - Category:
-    - [Based on the reason Categorize whether it is due to Price Concern or Local Brand Preference or Taste & Quality Preference or Brand Loyalty / Trust or Availability & Supply Strength or Retailer Margin Advantage or Promotions & Schemes or Packaging Preference or Customer Demand / Pull or Regional Taste / Cultural Fit or Other Factors]
+    - [Based on the reason Categorize whether it is due to {competitor_categories}]
       IMPORTANT - Choose the Category only on the list of reasons mentioned above, dont change the list.
 
 **Brand 2:** (Continue for each additional competitor brand mentioned until all are covered)
@@ -232,7 +199,7 @@ For EACH competitor brand and product mentioned, document separately:
 - Reasons for Preference: Why does customer prefer this brand than Naga in detail?
     - [Price? Consumers Choice? Taste? Local brand? Habit? Promotions? etc..]
 - Category:
-    - [Based on the reason Categorize whether it is due to Price Concern or Local Brand Preference or Taste & Quality Preference or Brand Loyalty / Trust or Availability & Supply Strength or Retailer Margin Advantage or Promotions & Schemes or Packaging Preference or Customer Demand / Pull or Regional Taste / Cultural Fit or Other Factors]
+    - [Based on the reason Categorize whether it is due to {competitor_categories}]
       IMPORTANT - Choose the Category only on the list of reasons mentioned above, dont change the list.
 
 Example:
@@ -244,7 +211,7 @@ Example:
 - Reasons for Preference: Why does customer prefer this brand than Naga in detail?
     - [Price? Consumers Choice? Taste? Local brand? Habit? Promotions? etc..]
 - Category:
-    - [Based on the reason Categorize whether it is due to Price Concern or Local Brand Preference or Taste & Quality Preference or Brand Loyalty / Trust or Availability & Supply Strength or Retailer Margin Advantage or Promotions & Schemes or Packaging Preference or Customer Demand / Pull or Regional Taste / Cultural Fit or Other Factors]
+    - [Based on the reason Categorize whether it is due to {competitor_categories}]
       IMPORTANT - Choose the Category only on the list of reasons mentioned above, dont change the list.
 
 **Brand 2:**
@@ -254,7 +221,7 @@ Example:
 - Reasons for Preference: Why does customer prefer this brand than Naga in detail?
     - [Price? Consumers Choice? Taste? Local brand? Habit? Promotions? etc..]
 - Category:
-    - [Based on the reason Categorize whether it is due to Price Concern or Local Brand Preference or Taste & Quality Preference or Brand Loyalty / Trust or Availability & Supply Strength or Retailer Margin Advantage or Promotions & Schemes or Packaging Preference or Customer Demand / Pull or Regional Taste / Cultural Fit or Other Factors]
+    - [Based on the reason Categorize whether it is due to {competitor_categories}]
       IMPORTANT - Choose the Category only on the list of reasons mentioned above, dont change the list.
 
 **Brand 3:**
@@ -264,7 +231,7 @@ Example:
 - Reasons for Preference: Why does customer prefer this brand than Naga in detail?
     - [Price? Consumers Choice? Taste? Local brand? Habit? Promotions? etc..]
 - Category:
-    - [Based on the reason Categorize whether it is due to Price Concern or Local Brand Preference or Taste & Quality Preference or Brand Loyalty / Trust or Availability & Supply Strength or Retailer Margin Advantage or Promotions & Schemes or Packaging Preference or Customer Demand / Pull or Regional Taste / Cultural Fit or Other Factors]
+    - [Based on the reason Categorize whether it is due to {competitor_categories}]
       IMPORTANT - Choose the Category only on the list of reasons mentioned above, dont change the list.
 
 B. Online Retailers Mentioned
@@ -298,9 +265,7 @@ C. Customer Buying Psychology
 
 Based on specific criteria - Score each component objectively.  
 
-IMPORTANT: If any criterion does not apply to this conversation (e.g., no competitor brands mentioned → Competitor handling = N/A), then:
-1. Mark that category as "N/A".
-2. Give full score for that category.
+IMPORTANT: If any criterion does not apply to this conversation (e.g., no competitor brands mentioned → Competitor handling = N/A), mark that category as "N/A" (is_na: true). Its full score is applied automatically.
 
 ---
 
@@ -328,11 +293,7 @@ IMPORTANT: If any criterion does not apply to this conversation (e.g., no compet
 - 4-5: Basic awareness of customer concerns
 - 1-3: Poor understanding of what drives customer decisions
 
----
-
-**Final Score Calculation:**
-- If all 4 criteria apply:  
-  (Product promotion × 0.3) + (Scheme leverage × 0.2) + (Competitor handling × 0.25) + (Customer psychology × 0.25)  
+Do NOT calculate a final score - it is computed from the component scores after the analysis.
 
 ------------------------------------------------------------
 
@@ -481,29 +442,21 @@ This structure preserves ALL headings and subheadings from the analysis report:
     "scores": {
       "product_promotion": {
         "score": 0,
-        "weight_percentage": 30,
         "justification": ""
       },
       "scheme_leverage": {
         "score": 0,
-        "weight_percentage": 20,
         "justification": ""
       },
       "competitor_handling": {
         "score": 0,
-        "weight_percentage": 25,
         "justification": "",
         "is_na": false
       },
       "customer_psychology_understanding": {
         "score": 0,
-        "weight_percentage": 25,
         "justification": ""
       }
-    },
-    "final_score_calculation": {
-      "formula": "",
-      "final_score": 0
     }
   },
   "salesperson_ability_analysis": "",
@@ -532,11 +485,7 @@ CRITICAL JSON FORMATTING RULES:
 6. **All numeric scores must be actual numbers**, not strings (e.g., 9 not "9")
 7. **Maintain proper JSON syntax** - no trailing commas, proper quotation marks
 8. **For the "category" field** in competitor analysis, use ONLY these exact values:
-   - "Price Concern"
-   - "Discount Concern"
-   - "Product Variety"
-   - "Product Package Size"
-   - "Other factors"
+{competitor_category_values}
 9. **For boolean fields** like "is_na", use true/false (not "true"/"false")
 10. **Product lists should be detailed strings or objects** with full context as shown in the example document
 
@@ -573,14 +522,465 @@ CRITICAL REMINDERS
 - **RETURN ONLY VALID JSON - NO MARKDOWN CODE BLOCKS, NO ADDITIONAL TEXT OR FORMATTING**
 - **START your response directly with the opening brace { and end with the closing brace }**
 """
-    
-    response = model.generate_content([
-        analysis_prompt,
-        {"mime_type": "audio/mp3", "data": audio_file}
-    ])
-    
+# The category list comes from report_model, so the prompt and the validator always agree
+ANALYSIS_PROMPT = ANALYSIS_PROMPT.replace(
+    "{competitor_categories}", " or ".join(COMPETITOR_CATEGORIES)
+).replace(
+    "{competitor_category_values}", "\n".join(f'   - "{category}"' for category in COMPETITOR_CATEGORIES)
+)
+PROMPT_VERSION = prompt_version(ANALYSIS_PROMPT)
+
+
+@st.cache_resource(show_spinner=False)
+def warm_up():
+    """Once per process: model client, report store and entity catalog."""
+    get_analysis_client()
+    get_report_store()
+    load_catalog()
+
+
+@st.cache_resource(show_spinner=False)
+def get_analysis_client():
+    # Live Gemini by default; NAGA_MODEL_MODE=record/replay/synthetic for offline runs
+    return get_model_client(MODEL_NAME)
+
+
+def analyze_audio_with_gemini(audio_file, client=None):
+    # JSON mode for consistent, parseable output
+    response = (client or get_analysis_client()).generate(ANALYSIS_PROMPT, audio_file, "audio/mp3", json_mode=True)
     return response.text
 
+
+def analyze_upload(client, report_store, report_cache, upload, salesperson, store_name, fingerprint=None):
+    """
+    The whole analysis of a spooled upload, run on a background worker (so no
+    st.* calls): model call, local scores, validation, canonical names and
+    storage. Returns {"report_id", "validation_errors"}; report_id is None
+    when the model returned nothing.
+    """
+    # Analyze with Gemini, reading the spooled file in place
+    with upload.mapped() as audio_data:
+        analysis = analyze_audio_with_gemini(audio_data, client)
+
+    # Clean the response if it contains markdown code blocks
+    clean_analysis = analysis.strip()
+    if clean_analysis.startswith("```json"):
+        clean_analysis = clean_analysis[7:]
+    elif clean_analysis.startswith("```"):
+        clean_analysis = clean_analysis[3:]
+    if clean_analysis.endswith("```"):
+        clean_analysis = clean_analysis[:-3]
+    clean_analysis = clean_analysis.strip()
+    if not clean_analysis:
+        return {"report_id": None, "validation_errors": []}
+
+    analysis_json = json.loads(clean_analysis)
+
+    # Weights, N/A full scores and the final score are computed locally
+    apply_scores(analysis_json)
+
+    # Flag fields the model returned in the wrong shape; the report still renders
+    _, validation_errors = validate_report(analysis_json)
+
+    # Canonical product/competitor names, so stored calls aggregate cleanly
+    annotate_entities(analysis_json)
+
+    report = convert_sales_report_to_string(analysis_json)
+
+    # Keep the analysis so it can be exported later without re-running it
+    report_id = report_store.add(
+        analysis_json,
+        salesperson=salesperson,
+        store=store_name,
+        source_name=upload.name,
+        model=client.name,
+        prompt_version=PROMPT_VERSION,
+    )
+    if fingerprint is not None:
+        report_store.add_fingerprint(report_id, fingerprint.to_bytes(), fingerprint.duration)
+
+    # Sessions keep only the id; the body goes to the shared report cache
+    report_cache.put(report_id, analysis_json, report)
+    return {"report_id": report_id, "validation_errors": validation_errors[:10]}
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue():
+    # Shared by all sessions: NAGA_ANALYSIS_WORKERS analyses run at once, the rest queue
+    return JobQueue()
+
+
+def _run_upload_job(tracker, upload, fn, args):
+    try:
+        return fn(*args)
+    finally:
+        tracker.unpin(upload)
+
+
+def submit_upload_job(fn, upload, *args):
+    """
+    Queues fn(*args) for a spooled upload. The job owns a pin on the file, so
+    it survives the session clearing the uploader or leaving the page while
+    the job waits or runs.
+    """
+    tracker = get_upload_tracker()
+    tracker.pin(upload)
+    return get_job_queue().submit(_run_upload_job, tracker, upload, fn, args, label=upload.name)
+
+
+def run_profiled(name, fn, *args, **kwargs):
+    """Runs fn, profiling the @profiled functions it calls when ?profile=1 (or NAGA_PROFILE=1) asks for it."""
+    token = request_profiling(name, st.query_params.get("profile"))
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        for path in reset_request_profiling(token):
+            print("Profile written ::::::", path)
+
+
+def profiled_fragment(func=None, *, run_every=None):
+    """
+    st.fragment whose body is profiled. Fragment-only reruns (its widgets,
+    run_every polling) skip the script's top level, so each run marks itself.
+    """
+    if func is None:
+        return partial(profiled_fragment, run_every=run_every)
+    body = profiled(func)
+
+    @wraps(func)
+    def run(*args, **kwargs):
+        return run_profiled(f"app fragment {func.__name__}", body, *args, **kwargs)
+
+    return st.fragment(run, run_every=run_every)
+
+
+JOB_POLL_SECONDS = 2
+
+
+@profiled_fragment(run_every=JOB_POLL_SECONDS)
+def analysis_status():
+    """Status of the session's running analysis. Only called while one runs, so idle sessions do not poll."""
+    job = get_job_queue().get(st.session_state.get('job_id'))
+    if job is None:
+        st.session_state.pop('job_id', None)
+        return
+    if not job.finished:
+        ahead = get_job_queue().position(job)
+        waiting = f"waiting for a free worker ({ahead} ahead)" if ahead else "analyzing"
+        st.info(f"⏳ {job.label}: {waiting}, {job.elapsed:.0f} s")
+        return
+
+    st.session_state.pop('job_id', None)
+    st.session_state['finished_job'] = job.id
+    if job.status == DONE and job.result['report_id'] is not None:
+        st.session_state['report_id'] = job.result['report_id']
+    # Whole-app rerun, so the page shows the outcome
+    st.rerun()
+
+
+# ===== Batch Analysis =====
+def analyze_batch_file(client, report_store, report_cache, audio_index, upload, salesperson, store_name):
+    """
+    One file of a batch, on a background worker. A recording that was
+    analyzed before reuses that report, whether the app or the API stored
+    it; anything else is analyzed like a single upload. The result also
+    says whether the report was reused.
+    """
+    fingerprint, duplicate = find_duplicate_call(upload.path, audio_index, report_store)
+    record = report_store.get(duplicate.report_id) if duplicate is not None else None
+    if record is not None:
+        report_cache.put(record['id'], record['analysis'], schema=record['schema'])
+        return {"report_id": record['id'], "validation_errors": [], "reused": True}
+    result = analyze_upload(client, report_store, report_cache, upload, salesperson, store_name, fingerprint)
+    return {**result, "reused": False}
+
+
+def batch_summary(reports):
+    """
+    Totals across the cached reports of a batch: how many calls mention
+    each product and competitor, and the mean component and final scores
+    (None where no call has a usable score).
+    """
+    products, competitors = Counter(), Counter()
+    scores = {key: [] for key in (*COMPONENTS, "final_score")}
+    for report in reports:
+        analysis = report.analysis
+        # Reports stored before entity annotation are annotated on a copy
+        entities = analysis.get("entities") or annotate_entities(dict(analysis), schema=report.schema)["entities"]
+        products.update(set(entities.get("products", [])))
+        competitors.update(set(entities.get("competitors", [])))
+        components = component_scores(analysis, report.schema)
+        components["final_score"] = final_score(components)
+        for key, value in components.items():
+            if value is not None:
+                scores[key].append(value)
+    return {
+        "calls": len(reports),
+        "products": products.most_common(),
+        "competitors": competitors.most_common(),
+        "scores": {key: round(sum(values) / len(values), 2) if values else None for key, values in scores.items()},
+    }
+
+
+def session_batch():
+    """The jobs of the session's batch that the queue still knows about."""
+    queue = get_job_queue()
+    jobs = [queue.get(job_id) for job_id in st.session_state.get('batch', [])]
+    return [job for job in jobs if job is not None]
+
+
+def batch_job_status(job):
+    if job.status == QUEUED:
+        ahead = get_job_queue().position(job)
+        return f"⏳ Queued ({ahead} ahead)" if ahead else "⏳ Queued"
+    if job.status == RUNNING:
+        return "🔄 Analyzing"
+    if job.status == FAILED:
+        return "❌ Failed"
+    if job.result['report_id'] is None:
+        return "⚠️ Empty response"
+    if job.result['reused']:
+        return "♻️ Analyzed before"
+    if job.result['validation_errors']:
+        return f"⚠️ Done, {len(job.result['validation_errors'])} format issue(s)"
+    return "✅ Done"
+
+
+def render_batch_table(jobs):
+    finished = [job for job in jobs if job.finished]
+    failed = sum(1 for job in finished if job.status == FAILED)
+    st.progress(len(finished) / len(jobs), text=f"{len(finished)} of {len(jobs)} files done, {failed} failed")
+    cache = get_report_cache()
+    rows = []
+    for job in jobs:
+        report_id = job.result['report_id'] if job.status == DONE else None
+        cached_report = cache.get(report_id) if report_id is not None else None
+        total = final_score(component_scores(cached_report.analysis, cached_report.schema)) if cached_report is not None else None
+        rows.append({
+            "File": job.label,
+            "Status": batch_job_status(job),
+            "Time (s)": round(job.elapsed),
+            "Report": report_id,
+            "Final score": total,
+            "Error": job.error,
+        })
+    st.dataframe(rows, hide_index=True, width="stretch")
+
+
+@profiled_fragment(run_every=JOB_POLL_SECONDS)
+def batch_progress():
+    """Live table of the session's batch. Only called while part of it runs, so finished batches do not poll."""
+    jobs = session_batch()
+    if not jobs or all(job.finished for job in jobs):
+        # Whole-app rerun, so the page shows the batch summary
+        st.rerun()
+    render_batch_table(jobs)
+
+DATA_DIR = "data"
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
+
+
+@st.cache_resource(show_spinner=False)
+def load_dashboard_cube(version):
+    # `version` is only part of the cache key, so replacing a spreadsheet rebuilds the cube
+    from cube import build_dashboard_cube
+
+    return build_dashboard_cube(DATA_DIR)
+
+
+@st.cache_data(show_spinner=False)
+def load_excel(file_name, version):
+    import pandas as pd
+
+    return pd.read_excel(os.path.join(DATA_DIR, file_name))
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def cached_chart(chart, filters, version):
+    """
+    Figures are memoized by (chart, filter values, data version), so returning
+    to an earlier selection serves the already built figure.
+    """
+    from charts import build_chart
+
+    return build_chart(load_dashboard_cube(version), chart, **dict(filters))
+
+
+def chart_figure(chart, version, **filters):
+    return cached_chart(chart, tuple(sorted(filters.items())), version)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_payload_size(chart, filters, version):
+    from charts import payload_size
+
+    return payload_size(cached_chart(chart, filters, version))
+
+
+def chart_caption(chart, version, top_n, **filters):
+    """Caption with how many items were kept and how large the figure payload is."""
+    from charts import chart_item_count, format_payload
+
+    total_items = chart_item_count(load_dashboard_cube(version), chart, **filters)
+    size = cached_payload_size(chart, tuple(sorted(dict(filters, top_n=top_n).items())), version)
+    return format_payload(min(top_n, total_items), total_items, size)
+
+
+@st.cache_resource(show_spinner=False)
+def get_report_store():
+    return ReportStore()
+
+
+@st.cache_resource(show_spinner=False)
+def get_audio_index():
+    index = AudioIndex()
+    index.sync(get_report_store())
+    return index
+
+
+def find_duplicate_call(audio_path, audio_index=None, report_store=None):
+    """
+    (fingerprint, Match or None) for a spooled upload. The fingerprint is None
+    when the audio cannot be decoded; the upload is then analyzed as usual.
+    Background workers pass the index and store in.
+    """
+    try:
+        fingerprint = fingerprint_file(audio_path)
+    except FingerprintError as e:
+        print("Duplicate check skipped ::::::", e)
+        return None, None
+    # An empty AudioIndex is falsy, so test for None: workers must not reach the cached getters
+    index = audio_index if audio_index is not None else get_audio_index()
+    index.sync(report_store if report_store is not None else get_report_store())
+    return fingerprint, index.match(fingerprint)
+
+
+@st.cache_resource(show_spinner=False)
+def get_report_cache():
+    # Report bodies shared by every session; sessions only keep the report id
+    return ReportCache(get_report_store())
+
+
+@st.cache_resource(show_spinner=False)
+def get_upload_tracker():
+    return UploadTracker()
+
+
+def bulk_export_path(session_id):
+    # One export ZIP per session, replaced by the next build and removed with the session
+    return os.path.join(tempfile.gettempdir(), f"bulk_export_{session_id}.zip")
+
+
+# Streamlit copies a download into its in-memory media storage, so larger
+# archives are not offered in the browser; bulk_export.py writes them to disk
+EXPORT_DOWNLOAD_LIMIT = int(float(os.getenv("NAGA_EXPORT_DOWNLOAD_MB", "200")) * 2 ** 20)
+
+
+def open_export_once(path):
+    """Hands the export ZIP to the download as an open file and removes it from disk."""
+    export_file = open(path, "rb")
+    try:
+        os.remove(path)
+    except OSError:
+        # Still open elsewhere (Windows); release_session removes it later
+        pass
+    return export_file
+
+
+def release_session(session_id, reason):
+    get_upload_tracker().release(session_id)
+    try:
+        os.remove(bulk_export_path(session_id))
+    except FileNotFoundError:
+        pass
+    # A disconnected session may reconnect; Streamlit drops its files itself when it closes it
+    if reason == "idle" and Runtime.exists():
+        Runtime.instance().uploaded_file_mgr.remove_session_files(session_id)
+
+
+def session_connected(session_id):
+    return not Runtime.exists() or Runtime.instance().is_active_session(session_id)
+
+
+@st.cache_resource(show_spinner=False)
+def get_session_registry():
+    return SessionRegistry(on_evict=release_session, is_active=session_connected)
+
+
+def process_rss():
+    """Resident memory of this process in bytes (peak resident memory where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def streamlit_memory():
+    """Bytes Streamlit itself holds (session state, uploads, caches), per category."""
+    if not Runtime.exists():
+        return {}
+    totals = {}
+    for stats in Runtime.instance().stats_mgr.get_stats().values():
+        for stat in stats:
+            if hasattr(stat, "byte_length"):
+                totals[stat.category_name] = totals.get(stat.category_name, 0) + stat.byte_length
+    return totals
+
+
+def session_uploads(uploaded_files):
+    """
+    The session's uploads spooled to disk, done once per file; files the
+    session no longer has uploaded are deleted. A single file gets an audio
+    preview, the files of a batch do not.
+    """
+    session_id = get_script_run_ctx().session_id
+    tracker = get_upload_tracker()
+    if not uploaded_files:
+        tracker.release(session_id)
+        return []
+    # Files swept while the session sat idle are spooled again
+    spooled = {upload.file_id: upload for upload in tracker.current(session_id) if os.path.exists(upload.path)}
+    uploads = [
+        spooled.get(uploaded_file.file_id) or spool_upload(uploaded_file, preview=len(uploaded_files) == 1)
+        for uploaded_file in uploaded_files
+    ]
+    tracker.track(session_id, uploads)
+    return uploads
+
+
+@st.cache_resource(show_spinner=False)
+def get_similarity_index():
+    # Built from the archive once per process; later reports are added by sync()
+    index = SimilarityIndex()
+    index.sync(get_report_store())
+    return index
+
+
+def drill_down_selectors(cube, names, dims, **scope):
+    """
+    Renders an 'All' selectbox for every dimension in `dims` that has values
+    for the given measures/tables under `scope`, and returns the chosen cube filters.
+    """
+    available = {}
+    for dim in dims:
+        values = sorted({value for name in names for value in cube.members(dim, name, **scope)})
+        if values:
+            available[dim] = values
+
+    filters = {}
+    if not available:
+        return filters
+
+    cols = st.columns(len(available))
+    for col, (dim, values) in zip(cols, available.items()):
+        choice = col.selectbox(f"Filter by {dim.title()}", ["All"] + values)
+        if choice != "All":
+            filters[dim] = choice
+    return filters
+
 # Streamlit app
 def main():
     st.set_page_config(
@@ -588,150 +988,102 @@ def main():
         page_icon="📊",
         layout="wide"
     )
+    warm_up()
 
     # Initialize page state
     if 'page' not in st.session_state:
         st.session_state['page'] = 'home'
+    get_session_registry().touch(
+        get_script_run_ctx().session_id,
+        page=st.session_state['page'],
+        report_id=st.session_state.get('report_id'),
+    )
 
+    @profiled
     def render_dashboard():
+        from charts import DEFAULT_TOP_N
+        from cube import MONTHLY_MEASURES, data_version
+
         st.title("Sales Performance Dashboard")
 
-        excel_path = os.path.join("data", 'monthly.xlsx')
+        version = data_version(DATA_DIR)
+        cube = load_dashboard_cube(version)
 
         # Load Data
-        try:
-            df = pd.read_excel(excel_path)
-        except Exception as e:
-            st.error(f"Failed to read Excel file: {e}")
+        if 'monthly' in cube.errors:
+            st.error(cube.errors['monthly'])
             if st.button("⬅️ Back to Home"):
                 st.session_state['page'] = 'home'
             return
 
-        if 'Period' not in df.columns:
+        columns = cube.row("monthly") or {}
+        if 'Period' not in columns:
             st.error("❌ 'Period' column not found in the data.")
             return
-        
-        Months = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
-        selected_month = st.selectbox("Select Month", Months)
-
-        # Filter DataFrame based on selected month
-        df = df[df['Period'] == selected_month]
-
-        if df.empty:
-            st.warning(f"No data found for the selected month: {selected_month}")
-            return
-
-        # --- KPIs ---
-        st.subheader(f"{selected_month} Sales Performance Overview")
-        kpi_cols = st.columns(4)
-        kpi_cols[0].metric("🧾 Total Reports", f"{df['Total Reports Analysed'].iloc[0]}")
-        kpi_cols[1].metric("🛒 Overall Sales Effectiveness", f"{df['Overall Sales Effectiveness'].iloc[0]}")
-        kpi_cols[2].metric("☎️ Total Duration", f"{df['Total Duration'].iloc[0]}")
-        kpi_cols[3].metric("📞 Average Call Duration", f"{df['Average Duration'].iloc[0]}")
-
-        st.divider()
-
-        # ========================
-        # PRODUCT DISCUSSION TREEMAP
-        # ========================
-        if 'Products Discussed' in df.columns:
-            st.subheader("Naga Product Mention Rate")
-
-            try:
-                counts = parse_explicit_counts(df["Products Discussed"])
-
-                if counts:
-                    freq_df = pd.DataFrame(counts.items(), columns=['Product', 'Count'])
-                    freq_df = freq_df.sort_values(by='Count', ascending=False)
-
-                    fig = px.treemap(
-                        freq_df,
-                        path=[px.Constant("Product Mention Rate"), 'Product'],
-                        values='Count',
-                        color='Count',
-                        color_continuous_scale='Blues',
-                    )
-                    fig.update_layout(
-                        margin=dict(t=50, l=25, r=25, b=25),
-                        uniformtext=dict(minsize=10, mode='hide')
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.info("No product discussion data found.")
-            except Exception as e:
-                st.warning(f"Could not generate product treemap: {e}")
-        else:
-            st.info("The column 'Products Discussed' was not found in the Excel file.")
-
-        st.divider()
-
-        # ========================
-        # COMPETITOR TREEMAP
-        # ========================
-        if 'Competitors' in df.columns:
-            st.subheader("Competitor Mention Rate")
-
-            try:
-                counts = parse_explicit_counts(df["Competitors"])
-                
-                if counts:
-                    freq_df = pd.DataFrame(counts.items(), columns=['Competitor', 'Count'])
-                    freq_df = freq_df.sort_values(by='Count', ascending=False)
-
-                    fig = px.treemap(
-                        freq_df,
-                        path=[px.Constant("Competitor Mention Rate"), 'Competitor'],
-                        values='Count',
-                        color='Count',
-                        color_continuous_scale='Blues',
-                    )
-                    fig.update_layout(
-                        margin=dict(t=50, l=25, r=25, b=25),
-                        uniformtext=dict(minsize=10, mode='hide')
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.info("No competitor data found.")
-            except Exception as e:
-                st.warning(f"Could not generate competitor treemap: {e}")
-        else:
-            st.info("The column 'Competitors' was not found in the Excel file.")
-
-        st.divider()
 
-        # ========================
-        # COMPETITOR PRODUCT TREEMAP
-        # ========================
-        if 'Competitor Products' in df.columns:
-            st.subheader("Competitor Product Preference")
+        def treemap_section(chart, title, column, empty_message, error_label, filters, top_n):
+            if column in columns:
+                st.subheader(title)
 
-            try:
-                counts = parse_explicit_counts(df["Competitor Products"])
-                
-                if counts:
-                    freq_df = pd.DataFrame(counts.items(), columns=['Product', 'Count'])
-                    freq_df = freq_df.sort_values(by='Count', ascending=False)
-
-                    fig = px.treemap(
-                        freq_df,
-                        path=[px.Constant("Competitor Product Preference"), 'Product'],
-                        values='Count',
-                        color='Count',
-                        color_continuous_scale='Blues',
-                    )
-                    fig.update_layout(
-                        margin=dict(t=50, l=25, r=25, b=25),
-                        uniformtext=dict(minsize=10, mode='hide')
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.info("No competitor product data found.")
-            except Exception as e:
-                st.warning(f"Could not generate competitor product treemap: {e}")
-        else:
-            st.info("The column 'Competitor Products' was not found in the Excel file.")
-        
-        st.divider()
+                try:
+                    fig = chart_figure(chart, version, top_n=top_n, **filters)
+                    if fig is not None:
+                        st.plotly_chart(fig, use_container_width=True)
+                        st.caption(chart_caption(chart, version, top_n, **filters))
+                    else:
+                        st.info(empty_message)
+                except Exception as e:
+                    st.warning(f"Could not generate {error_label} treemap: {e}")
+            else:
+                st.info(f"The column '{column}' was not found in the Excel file.")
+
+            st.divider()
+
+        # Only this section reruns when the month or a drill-down changes
+        @profiled_fragment
+        def month_section():
+            selected_month = st.selectbox("Select Month", MONTHS)
+            filters = drill_down_selectors(cube, list(MONTHLY_MEASURES), ["salesperson", "store"], month=selected_month)
+            filters["month"] = selected_month
+            # Items beyond the top N are folded into one "Other" rectangle
+            top_n = st.number_input("Items per chart", min_value=5, max_value=500, value=DEFAULT_TOP_N, step=5)
+
+            # Look up the pre-aggregated row for the selected month
+            row = cube.row("monthly", month=selected_month)
+
+            if row is None:
+                st.warning(f"No data found for the selected month: {selected_month}")
+                return
+
+            # --- KPIs ---
+            st.subheader(f"{selected_month} Sales Performance Overview")
+            kpi_cols = st.columns(4)
+            kpi_cols[0].metric("🧾 Total Reports", f"{row['Total Reports Analysed']}")
+            kpi_cols[1].metric("🛒 Overall Sales Effectiveness", f"{row['Overall Sales Effectiveness']}")
+            kpi_cols[2].metric("☎️ Total Duration", f"{row['Total Duration']}")
+            kpi_cols[3].metric("📞 Average Call Duration", f"{row['Average Duration']}")
+
+            st.divider()
+
+            # ========================
+            # PRODUCT DISCUSSION TREEMAP
+            # ========================
+            treemap_section("product_treemap", "Naga Product Mention Rate", 'Products Discussed',
+                            "No product discussion data found.", "product", filters, top_n)
+
+            # ========================
+            # COMPETITOR TREEMAP
+            # ========================
+            treemap_section("competitor_treemap", "Competitor Mention Rate", 'Competitors',
+                            "No competitor data found.", "competitor", filters, top_n)
+
+            # ========================
+            # COMPETITOR PRODUCT TREEMAP
+            # ========================
+            treemap_section("competitor_product_treemap", "Competitor Product Preference", 'Competitor Products',
+                            "No competitor product data found.", "competitor product", filters, top_n)
+
+        month_section()
 
         # ========================
         # PRICING CONCERN TREEMAP
@@ -768,119 +1120,114 @@ def main():
         # else:
         #     st.info("The column 'Pricing Concerns' was not found in the Excel file.")
 
+    @profiled
     def render_individual_dashboard():
+        from charts import DEFAULT_TOP_N, format_payload, payload_size, top_n_frame
+        from cube import data_version
+
         st.title("Individual Salesperson Dashboard")
 
-        excel_path = os.path.join("data", 'individually.xlsx')
+        version = data_version(DATA_DIR)
+        cube = load_dashboard_cube(version)
 
         # Load Data
-        try:
-            df = pd.read_excel(excel_path)
-        except Exception as e:
-            st.error(f"Failed to read Excel file: {e}")
+        if 'individual' in cube.errors:
+            st.error(cube.errors['individual'])
             if st.button("⬅️ Back to Home"):
                 st.session_state['page'] = 'home'
             return
 
         # Ensure salesperson column exists
-        if 'SalesPerson' not in df.columns:
+        if 'SalesPerson' not in (cube.row("individual") or {}):
             st.error("❌ 'SalesPerson' column not found in the data.")
             return
 
-        # Dropdown to select salesperson
-        salesperson_names = sorted(df['SalesPerson'].dropna().unique())
-        selected_salesperson = st.selectbox("Select Salesperson", salesperson_names)
+        # Only this section reruns when the salesperson or month changes
+        @profiled_fragment
+        def salesperson_section():
+            # Dropdown to select salesperson
+            salesperson_names = cube.members("salesperson", "individual")
+            selected_salesperson = st.selectbox("Select Salesperson", salesperson_names)
+            # Only offer the months this salesperson has data for
+            filters = drill_down_selectors(cube, ["individual"], ["month"], salesperson=selected_salesperson)
+            filters["salesperson"] = selected_salesperson
 
-        # Filter data for the selected salesperson
-        person_df = df[df['SalesPerson'] == selected_salesperson]
+            # Look up the pre-aggregated row for the selected salesperson
+            person_row = cube.row("individual", **filters)
 
-        if person_df.empty:
-            st.warning(f"No data found for salesperson: {selected_salesperson}")
-            return
+            if person_row is None:
+                st.warning(f"No data found for salesperson: {selected_salesperson}")
+                return
 
-        # --- KPIs ---
-        st.subheader(f"Performance Overview — {selected_salesperson}")
-        kpi_cols = st.columns(4)
-        kpi_cols[0].metric("🧾 Total Reports", f"{person_df['Total Reports Analysed'].iloc[0]}")
-        kpi_cols[1].metric("🛒 Sales Effectiveness", f"{person_df['Overall Sales Effectiveness'].iloc[0]}")
-        kpi_cols[2].metric("☎️ Total Duration", f"{person_df['Total Duration'].iloc[0]}")
-        kpi_cols[3].metric("📞 Average Call Duration", f"{person_df['Average Duration'].iloc[0]}")
+            # --- KPIs ---
+            st.subheader(f"Performance Overview — {selected_salesperson}")
+            kpi_cols = st.columns(4)
+            kpi_cols[0].metric("🧾 Total Reports", f"{person_row['Total Reports Analysed']}")
+            kpi_cols[1].metric("🛒 Sales Effectiveness", f"{person_row['Overall Sales Effectiveness']}")
+            kpi_cols[2].metric("☎️ Total Duration", f"{person_row['Total Duration']}")
+            kpi_cols[3].metric("📞 Average Call Duration", f"{person_row['Average Duration']}")
 
-        st.divider()
+            st.divider()
 
-        score_columns = ['Product promotion', 'Scheme leverage', 'Competitor handling', 'Customer psychology understanding']
-        avg_scores = person_df[score_columns].iloc[0].tolist()
-        categories = ['Product Promotion Skill', 'Scheme Utilization', 'Competitor Handling Skill', 'Customer Understanding']
-
-        # Create Radar chart
-        fig = go.Figure(data=go.Scatterpolar(
-            r=avg_scores + [avg_scores[0]], 
-            theta=categories + [categories[0]],
-            fill='toself',
-            name='Average Monthly Scores',
-            line_color="#6873f9",
-            fillcolor='rgba(164, 173, 248)'
-        ))
-
-        # Layout settings
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0,10]), bgcolor='#e5ecf6',
-                angularaxis=dict(tickfont=dict(size=16))
-                ),
-            showlegend=False,
-            height = 600
-        )
-        st.subheader(f"Performance Breakdown")
-        st.plotly_chart(fig, use_container_width=True)
+            # Radar chart of the component scores
+            st.subheader(f"Performance Breakdown")
+            st.plotly_chart(chart_figure("score_radar", version, **filters), use_container_width=True)
+
+        salesperson_section()
 
         st.divider()
 
-        excel_path = os.path.join("data", 'TopSalesPitch.xlsx')
-        try:
-            df = pd.read_excel(excel_path)
-        except Exception as e:
-            st.error(f"Failed to read Excel file: {e}")
-            if st.button("⬅️ Back to Home"):
-                st.session_state['page'] = 'home'
-            return
-        st.subheader("Most Pitched Items")
-        st.bar_chart(df, x="Product Name", y="Mention Count", x_label="Product Name", y_label="Mention Count", height=500, sort="-Mention Count")
+        # Only the pitch charts rerun when the item count changes
+        @profiled_fragment
+        def pitch_section():
+            top_n = st.number_input("Items per chart", min_value=5, max_value=500, value=DEFAULT_TOP_N, step=5)
 
-        st.divider()
+            try:
+                df = load_excel('TopSalesPitch.xlsx', version)
+            except Exception as e:
+                st.error(f"Failed to read Excel file: {e}")
+                return
+            chart_df = top_n_frame(df, "Product Name", "Mention Count", top_n)
+            st.subheader("Most Pitched Items")
+            st.bar_chart(chart_df, x="Product Name", y="Mention Count", x_label="Product Name", y_label="Mention Count", height=500, sort="-Mention Count")
+            st.caption(format_payload(min(top_n, len(df)), len(df), payload_size(chart_df)))
 
-        excel_path = os.path.join("data", 'LeastPitchedItems.xlsx')
-        try:
-            df = pd.read_excel(excel_path)
-        except Exception as e:
-            st.error(f"Failed to read Excel file: {e}")
-            if st.button("⬅️ Back to Home"):
-                st.session_state['page'] = 'home'
-            return
-        st.subheader("Least Pitched Items")
-        st.bar_chart(df, x="Product Name", y="Pitch Count", x_label="Product Name", y_label="Pitch Count", height=500, sort="Pitch Count")
+            st.divider()
+
+            try:
+                df = load_excel('LeastPitchedItems.xlsx', version)
+            except Exception as e:
+                st.error(f"Failed to read Excel file: {e}")
+                return
+            # No "Other" bar here: the rest of the catalog would dwarf the least pitched items
+            chart_df = top_n_frame(df, "Product Name", "Pitch Count", top_n, smallest=True, with_other=False)
+            st.subheader("Least Pitched Items")
+            st.bar_chart(chart_df, x="Product Name", y="Pitch Count", x_label="Product Name", y_label="Pitch Count", height=500, sort="Pitch Count")
+            st.caption(format_payload(min(top_n, len(df)), len(df), payload_size(chart_df)))
+
+        pitch_section()
     
+    @profiled
     def summary_dashboard():
-        
+        import plotly.express as px
+        from cube import data_version
+
         st.title("Summary Dashboard")
-        monthly_excel_path = os.path.join("data", 'monthly.xlsx')
+        version = data_version(DATA_DIR)
+        cube = load_dashboard_cube(version)
 
         st.divider()
 
         # Load Data
-        try:
-            m_df = pd.read_excel(monthly_excel_path)
-        except Exception as e:
-            st.error(f"Failed to read Excel file: {e}")
+        if 'monthly' in cube.errors:
+            st.error(cube.errors['monthly'])
             if st.button("⬅️ Back to Home"):
                 st.session_state['page'] = 'home'
             return
 
-        individual_excel_path = os.path.join("data", 'individually.xlsx')
-
         # Load Data
         try:
-            p_df = pd.read_excel(individual_excel_path)
+            p_df = load_excel('individually.xlsx', version)
         except Exception as e:
             st.error(f"Failed to read Excel file: {e}")
             if st.button("⬅️ Back to Home"):
@@ -937,73 +1284,18 @@ def main():
         
         st.divider()
 
-        Months = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
-        selected_month = st.selectbox("Select Month", Months)
-
-        # Filter DataFrame based on selected month
-        m_df = m_df[m_df['Period'] == selected_month]
-        p_count = c_count = cp_count = pc_count = 0
-
-        if 'Products Discussed' in m_df.columns:
-            try:
-                counts = parse_explicit_counts(m_df["Products Discussed"])
-                p_count = sum(counts.values())
-            except Exception as e:
-                st.warning("Couldn't process Product Discussed column")
-        
-        if 'Competitors' in m_df.columns:
-            try:
-                counts = parse_explicit_counts(m_df["Competitors"])
-                c_count = sum(counts.values())
-            except Exception as e:
-                st.warning("Couldn't process Competitors column")
-        
-        if 'Competitor Products' in m_df.columns:
-            try:
-                counts = parse_explicit_counts(m_df["Competitor Products"])
-                cp_count = sum(counts.values())
-            except Exception as e:
-                st.warning("Couldn't process Competitor Products column")
-        
-        if 'Pricing Concerns' in m_df.columns:
-            try:
-                counts = parse_explicit_counts(m_df["Pricing Concerns"])
-                pc_count = sum(counts.values())
-            except Exception as e:
-                st.warning("Couldn't process Pricing Concerns column")
-        # --- Summary of discussion counts ---
-        st.subheader("Overall Discussion Summary")
-
-        # Collect the counts into a dataframe
-        summary_data = pd.DataFrame({
-            'Category': ['Products Discussed', 'Competitors', 'Competitor Products', 'Pricing Concerns'],
-            'Count': [p_count, c_count, cp_count, pc_count]
-        })
+        # Only this section reruns when the month changes
+        @profiled_fragment
+        def month_section():
+            selected_month = st.selectbox("Select Month", MONTHS)
 
-        # Create a bar chart
-        fig_summary = px.bar(
-            summary_data,
-            x='Category',
-            y='Count',
-            text='Count',
-            color='Count',
-            color_continuous_scale='Bluered',
-            height = 500
-        )
+            # --- Summary of discussion counts ---
+            st.subheader("Overall Discussion Summary")
 
-        # Style adjustments
-        fig_summary.update_traces(textposition='outside', textfont_size=15)
-        fig_summary.update_layout(
-            xaxis_title="Discussion Category",
-            yaxis_title="Total Mentions",
-            template='simple_white',
-            yaxis=dict(showgrid=True, zeroline=False, title_font=dict(size=16), tickfont=dict(size=14)), 
-            font = dict(size=14),
-            xaxis = dict(title_font=dict(size=16), tickfont=dict(size=14)),
-        )
+            # Totals come straight from the pre-aggregated cube cells
+            st.plotly_chart(chart_figure("discussion_summary", version, month=selected_month), use_container_width=True)
 
-        # Display in Streamlit
-        st.plotly_chart(fig_summary, use_container_width=True)
+        month_section()
 
         st.divider()
 
@@ -1032,157 +1324,279 @@ def main():
         # except Exception as e:
         #     st.error(f"❌ Failed to load product data: {e}")
 
+    @profiled
     def competitor_performance():
+        from cube import data_version
+
         st.title("Competitor Performance Analysis")
 
-        excel_path = os.path.join("data", "products.xlsx")
+        version = data_version(DATA_DIR)
+        cube = load_dashboard_cube(version)
 
         # Load Excel
-        try:
-            df = pd.read_excel(excel_path)
-        except Exception as e:
-            st.error(f"❌ Failed to load data file: {e}")
+        if 'products' in cube.errors:
+            st.error(f"❌ {cube.errors['products']}")
             return
 
-        # Validate necessary columns
-        required_columns = ['Products', 'Potential Competitors', 'Reason']
-        if not all(col in df.columns for col in required_columns):
-            st.error(f"❌ Missing required columns. Expected: {required_columns}")
-            return
+        # Only this section reruns when the product changes
+        @profiled_fragment
+        def product_section():
+            # Dropdown to select product
+            selected_product = st.selectbox(
+                "🛒 Select a Product",
+                cube.members("product", "Competitor Reasons")
+            )
 
-        # Clean and prepare data
-        df = df.dropna(subset=required_columns)
-        for col in required_columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].astype(str).str.strip()
+            # Competitor/reason counts for the selected product come from the cube
+            fig = chart_figure("competitor_reasons", version, product=selected_product)
 
-        # Dropdown to select product
-        selected_product = st.selectbox(
-            "🛒 Select a Product",
-            sorted(df['Products'].unique())
-        )
+            if fig is None:
+                st.warning(f"No competitor data available for {selected_product}.")
+                return
+
+            st.plotly_chart(fig, use_container_width=True)
+
+        product_section()
+    
+    @profiled
+    def product_performance():
+        from cube import data_version
 
-        # Filter data for selected product
-        filtered_df = df[df['Products'] == selected_product]
+        st.title("Product Pain-Point Analytics")
 
-        if filtered_df.empty:
-            st.warning("No data available for the selected product.")
+        version = data_version(DATA_DIR)
+        cube = load_dashboard_cube(version)
+
+        # Load Excel
+        if 'concerns' in cube.errors:
+            st.error(cube.errors['concerns'])
             return
 
-        # Parse comma-separated competitors and reasons
-        expanded_rows = []
-        
-        for _, row in filtered_df.iterrows():
-            # Split competitors and reasons by comma
-            competitors = [c.strip() for c in str(row['Potential Competitors']).split(',')]
-            reasons = [r.strip() for r in str(row['Reason']).split(',')]
-            
-            # Create a row for each competitor-reason pair
-            # Match them by index (assuming they correspond positionally)
-            for i, competitor in enumerate(competitors):
-                if i < len(reasons):  # Ensure we have a corresponding reason
-                    expanded_rows.append({
-                        'Potential Competitors': competitor,
-                        'Reason': reasons[i]
-                    })
-
-        # Convert to DataFrame
-        expanded_df = pd.DataFrame(expanded_rows)
-        
-        if expanded_df.empty:
-            st.warning(f"No competitor data available for {selected_product}.")
+        # Only this section reruns when the product changes
+        @profiled_fragment
+        def product_section():
+            # Product dropdown
+            products = cube.members("product", "concerns")
+            selected_product = st.selectbox("Select Product", products)
+
+            st.subheader(f"Key Concern Areas for {selected_product}")
+
+            # Bar chart
+            st.plotly_chart(chart_figure("concerns", version, product=selected_product), use_container_width=True)
+
+        product_section()
+
+    @profiled
+    def bulk_export_page():
+        from bulk_export import FORMATS as EXPORT_FORMATS, write_export_zip
+
+        st.title("Bulk Report Export")
+
+        report_store = get_report_store()
+
+        # Filters
+        filter_cols = st.columns(3)
+        salesperson = filter_cols[0].selectbox("Salesperson", ["All"] + report_store.distinct("salesperson"))
+        store_name = filter_cols[1].selectbox("Store", ["All"] + report_store.distinct("store"))
+        today = date.today()
+        date_range = filter_cols[2].date_input("Date range", value=(today.replace(day=1), today))
+        formats = st.multiselect("Formats", list(EXPORT_FORMATS), default=list(EXPORT_FORMATS))
+
+        filters = {
+            'salesperson': None if salesperson == "All" else salesperson,
+            'store': None if store_name == "All" else store_name,
+            'date_from': date_range[0] if len(date_range) > 0 else None,
+            'date_to': date_range[1] if len(date_range) > 1 else None,
+        }
+        total = report_store.count(**filters)
+        st.caption(f"{total} report(s) match the selected filters.")
+
+        export_path = bulk_export_path(get_script_run_ctx().session_id)
+        if st.button("Build ZIP", type="primary", disabled=not total or not formats):
+            progress = st.progress(0.0, text=f"Rendering 0/{total} reports...")
+            # Written beside the previous export and swapped in only once complete
+            with open(export_path + ".part", "wb") as export_file:
+                exported, failed = write_export_zip(
+                    report_store.query(**filters),
+                    export_file,
+                    formats,
+                    progress=lambda done: progress.progress(min(done / total, 1.0), text=f"Rendering {done}/{total} reports..."),
+                )
+            progress.empty()
+            size = os.path.getsize(export_path + ".part")
+            if size > EXPORT_DOWNLOAD_LIMIT:
+                os.remove(export_path + ".part")
+                st.error(
+                    f"The ZIP would be {size / 2**20:.0f} MB, more than the {EXPORT_DOWNLOAD_LIMIT / 2**20:.0f} MB "
+                    "the browser download allows. Narrow the filters, or run bulk_export.py on the server."
+                )
+                return
+            os.replace(export_path + ".part", export_path)
+            st.success(f"✅ Exported {exported} report(s)")
+            if failed:
+                st.warning(f"{failed} report(s) could not be rendered; they are listed in errors.txt in the ZIP.")
+
+        if os.path.exists(export_path):
+            st.download_button(
+                label="📦 Download ZIP",
+                # Opened only when the button is clicked, and removed from disk once served
+                data=partial(open_export_once, export_path),
+                file_name=f"sales_reports_{today.isoformat()}.zip",
+                mime="application/zip"
+            )
+            st.caption("The ZIP is removed once downloaded; build it again for another copy.")
+
+    @profiled
+    def search_page():
+        st.title("Search Calls")
+
+        report_store = get_report_store()
+        if not report_store.search_enabled:
+            st.error("Full-text search needs SQLite with FTS5.")
             return
 
-        # Count occurrences of each competitor-reason combination
-        count_df = (
-            expanded_df.groupby(['Potential Competitors', 'Reason'])
-            .size()
-            .reset_index(name='Count')
+        query = st.text_input(
+            "Search stored call analyses",
+            placeholder='e.g. Aachi, "free scheme", Aachi OR MTR, rava*',
         )
+        filter_cols = st.columns(3)
+        salesperson = filter_cols[0].selectbox("Salesperson", ["All"] + report_store.distinct("salesperson"), key="search_salesperson")
+        store_name = filter_cols[1].selectbox("Store", ["All"] + report_store.distinct("store"), key="search_store")
+        limit = filter_cols[2].number_input("Max results", min_value=5, max_value=100, value=20, step=5)
+
+        if not query.strip():
+            st.info(f"{report_store.count()} stored analyses can be searched.")
+            return
 
-        # Sort by competitor and count for better visualization
-        count_df = count_df.sort_values(['Potential Competitors', 'Count'], ascending=[True, False])
-
-        # Create stacked bar chart
-        fig = px.bar(
-            count_df,
-            x='Potential Competitors',
-            y='Count',
-            color='Reason',
-            title=f"Competitor Performance for {selected_product}",
-            text='Count',
-            barmode='stack',
-            color_discrete_sequence=px.colors.qualitative.Set3, 
-            height=500
+        hits = report_store.search(
+            query,
+            limit=int(limit),
+            salesperson=None if salesperson == "All" else salesperson,
+            store=None if store_name == "All" else store_name,
         )
+        st.caption(f"{len(hits)} matching call(s)")
 
-        fig.update_traces(textposition='inside', textfont_size=15)
-        
-        fig.update_layout(
-            xaxis_title="Potential Competitors",
-            yaxis_title="Count of Mentions",
-            legend_title="Reasons",
-            plot_bgcolor="#f9f9f9",
-            paper_bgcolor="#ffffff",
-            font=dict(size=13),
-            title_x=0.5,
-            xaxis = dict(title_font=dict(size=16), tickfont=dict(size=14), categoryorder='total descending'),
-            yaxis = dict(title_font=dict(size=16), tickfont=dict(size=14)),
+        for hit in hits:
+            title = " · ".join(
+                part for part in (hit['created_at'][:10], hit['salesperson'], hit['store'], hit['source_name']) if part
+            )
+            with st.container(border=True):
+                st.markdown(f"**{title}**  \n`{hit['section']}` · report #{hit['id']}")
+                st.markdown(hit['snippet'].replace("\n", "  \n"))
+
+    @profiled
+    def admin_page():
+        st.title("Memory & Sessions")
+        jobs = get_job_queue().stats()
+        st.caption(
+            f"Process memory: {process_rss() / 2**20:.0f} MB resident · "
+            f"Analyses: {jobs['running']} running, {jobs['queued']} queued on {jobs['workers']} workers"
         )
 
-        st.plotly_chart(fig, use_container_width=True)  
-    
-    def product_performance():
-        st.title("Product Pain-Point Analytics")
+        cache = get_report_cache().stats()
+        lookups = cache['hits'] + cache['misses']
+        cache_cols = st.columns(4)
+        cache_cols[0].metric("Cached reports", cache['reports'])
+        cache_cols[1].metric("Report cache", f"{cache['bytes'] / 2**20:.1f} / {cache['max_bytes'] / 2**20:.0f} MB")
+        cache_cols[2].metric("Hit rate", f"{cache['hits'] / lookups:.0%}" if lookups else "-")
+        cache_cols[3].metric("Reports evicted", cache['evictions'])
+
+        st.subheader("Sessions")
+        registry = get_session_registry()
+        uploads = get_upload_tracker().stats()['sessions']
+        rows = []
+        for session in registry.snapshot():
+            upload = uploads.get(session['session_id'], {})
+            rows.append({
+                "Session": session['session_id'][:8],
+                "Page": session.get('page'),
+                "Report": session.get('report_id'),
+                "Idle (min)": round(session['idle_seconds'] / 60, 1),
+                "Upload": upload.get('file'),
+                "Upload in memory (MB)": round(upload.get('memory_bytes', 0) / 2**20, 2),
+                "Upload on disk (MB)": round(upload.get('disk_bytes', 0) / 2**20, 2),
+            })
+        st.dataframe(rows, hide_index=True, width="stretch")
+        st.caption(
+            f"Sessions idle for {registry.idle_timeout / 60:.0f} minutes release their uploads; "
+            f"{registry.evicted} evicted so far."
+        )
+        if st.button("Evict idle sessions now"):
+            st.success(f"Evicted {len(registry.sweep())} session(s).")
+
+        streamlit_bytes = streamlit_memory()
+        if streamlit_bytes:
+            st.subheader("Held by Streamlit")
+            st.dataframe(
+                [{"Category": name, "MB": round(size / 2**20, 2)} for name, size in sorted(streamlit_bytes.items())],
+                hide_index=True,
+            )
 
-        # Load Excel
-        file_path = os.path.join("data", "concerns.xlsx")
-        try:
-            df = pd.read_excel(file_path)
-        except Exception as e:
-            st.error(f"Failed to load file: {e}")
+    @profiled
+    def batch_panel(jobs):
+        """Progress of the session's batch, then what its calls add up to."""
+        if st.button("Clear Batch"):
+            st.session_state.pop('batch', None)
+            st.rerun()
+
+        if not all(job.finished for job in jobs):
+            batch_progress()
+            st.info("⏳ The batch is running. Other pages can be used meanwhile; the summary appears here when it is done.")
             return
-        
-        # Validate columns
-        if "Products" not in df.columns or "Concerns" not in df.columns:
-            st.error("Excel must contain 'Product' and 'Concerns' columns")
+
+        render_batch_table(jobs)
+        report_ids = [job.result['report_id'] for job in jobs if job.status == DONE and job.result['report_id'] is not None]
+        reports = [get_report_cache().get(report_id) for report_id in dict.fromkeys(report_ids)]
+        reports = [report for report in reports if report is not None]
+        if not reports:
+            st.warning("No file of this batch was analyzed.")
             return
 
-        # Product dropdown
-        products = sorted(df["Products"].dropna().unique())
-        selected_product = st.selectbox("Select Product", products)
-
-        # Get concerns list for selected product
-        concerns_series = df[df["Products"] == selected_product]["Concerns"]
-        concern_counts = parse_explicit_counts(concerns_series)
-
-        # Convert to DataFrame
-        concern_df = pd.DataFrame(list(concern_counts.items()), columns=["Concern", "Count"])
-        concern_df = concern_df.sort_values(by="Count", ascending=False)
-
-        st.subheader(f"Key Concern Areas for {selected_product}")
-
-        # Bar chart
-        fig = px.bar(
-            concern_df,
-            x="Concern",
-            y="Count",
-            text="Count",
-            color="Concern",
-            color_discrete_sequence=px.colors.qualitative.Set2, 
-            height=600
-        )
-        fig.update_traces(textposition="outside", textfont_size=15)
-        fig.update_layout(
-            xaxis_title="Concern Type",
-            yaxis_title="Frequency",
-            showlegend=True,
-            template="simple_white",
-            xaxis = dict(title_font=dict(size=16), tickfont=dict(size=14)),
-            yaxis = dict(title_font=dict(size=16), tickfont=dict(size=14))
+        summary = batch_summary(reports)
+        st.markdown("### Batch Summary")
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("Calls", summary['calls'])
+        metric_cols[1].metric("Mean final score", summary['scores']['final_score'] if summary['scores']['final_score'] is not None else "N/A")
+        metric_cols[2].metric("Competitors mentioned", len(summary['competitors']))
+        st.dataframe(
+            [{"Component": COMPONENT_LABELS[key], "Mean score": summary['scores'][key]} for key in COMPONENTS],
+            hide_index=True,
+            width="stretch",
         )
+        product_col, competitor_col = st.columns(2)
+        with product_col:
+            st.markdown("**Products mentioned**")
+            st.dataframe([{"Product": name, "Calls": calls} for name, calls in summary['products']], hide_index=True)
+        with competitor_col:
+            st.markdown("**Competitors mentioned**")
+            st.dataframe([{"Competitor": name, "Calls": calls} for name, calls in summary['competitors']], hide_index=True)
+        st.caption("Every report of the batch is stored; open them from Search or download them with Bulk Export.")
+
+    @profiled
+    def similar_calls_panel(report_id, k=5):
+        """Past calls whose objections and barriers read most like this one's."""
+        report_store = get_report_store()
+        index = get_similarity_index()
+        with st.spinner("Finding similar calls..."):
+            index.sync(report_store)
+            matches = index.similar_to_report(report_id, k=k)
+
+        if not matches:
+            st.info("No similar calls found yet.")
+            return
 
-        st.plotly_chart(fig, use_container_width=True)
+        for match_id, score in matches:
+            record = report_store.get(match_id)
+            if record is None:
+                continue
+            title = " · ".join(
+                part for part in (record['created_at'][:10], record['salesperson'], record['store'], record['source_name']) if part
+            )
+            with st.container(border=True):
+                st.markdown(f"**{title}**  \nreport #{match_id} · similarity {score:.2f}")
+                st.markdown(index.previews[match_id].replace("\n", "  \n"))
+                with st.expander("Full analysis"):
+                    st.markdown(convert_sales_report_to_string(record['analysis'], record['schema']))
 
     # Sidebar for instructions and navigation
     with st.sidebar:
@@ -1211,6 +1625,30 @@ def main():
             st.session_state['page'] = 'product_performance'
             st.rerun()
 
+        if st.button("🔎 Search Calls", width="stretch"):
+            st.session_state['page'] = 'search'
+            st.rerun()
+
+        if st.button("📦 Bulk Export", width="stretch"):
+            st.session_state['page'] = 'bulk_export'
+            st.rerun()
+
+        if st.button("🛠️ Memory & Sessions", width="stretch"):
+            st.session_state['page'] = 'admin'
+            st.rerun()
+
+        # Analyses run in the background, so the user can browse meanwhile
+        if 'job_id' in st.session_state:
+            analysis_status()
+        elif 'finished_job' in st.session_state and st.session_state['page'] != 'home':
+            finished = get_job_queue().get(st.session_state['finished_job'])
+            if finished is not None:
+                st.success(f"✅ {finished.label}: the analysis is ready on the Home page.")
+        batch = session_batch()
+        if batch and st.session_state['page'] != 'home':
+            done = sum(1 for job in batch if job.finished)
+            st.caption(f"Batch: {done} of {len(batch)} files analyzed. Progress and summary are on the Home page.")
+
     # Route pages
     if st.session_state.get('page', 'home') == 'dashboard':
         render_dashboard()
@@ -1231,6 +1669,18 @@ def main():
     if st.session_state.get('page', 'home') == 'product_performance':
         product_performance()
         return
+
+    if st.session_state.get('page', 'home') == 'bulk_export':
+        bulk_export_page()
+        return
+
+    if st.session_state.get('page', 'home') == 'search':
+        search_page()
+        return
+
+    if st.session_state.get('page', 'home') == 'admin':
+        admin_page()
+        return
     
     st.title("Sales Call Analyzer")
     st.divider()
@@ -1243,139 +1693,160 @@ def main():
     with col1:
         st.header("📁 Upload Audio")
 
-        # Audio file uploader
-        uploaded_file = st.file_uploader(
-            "Choose an audio file",
+        # Audio file uploader; several files are analyzed as a batch
+        uploaded_files = st.file_uploader(
+            "Choose audio files",
             type=['mp3', 'wav', 'mp4', 'm4a', 'ogg'],
-            help="Upload your sales conversation audio file"
+            accept_multiple_files=True,
+            help="Upload a sales conversation audio file, or all of a day's calls at once"
         )
 
-        if uploaded_file is not None:
-            st.success(f"✅ File uploaded: {uploaded_file.name}")
+        uploads = session_uploads(uploaded_files)
+        upload = uploads[0] if len(uploads) == 1 else None
+        if len(uploads) > 1:
+            st.success(f"✅ {len(uploads)} files uploaded")
+            st.caption("Salesperson and store names apply to every file. Calls analyzed before reuse their reports.")
+            if st.button(f"Analyze {len(uploads)} Files", type="primary"):
+                client, report_store, report_cache, audio_index = (
+                    get_analysis_client(), get_report_store(), get_report_cache(), get_audio_index()
+                )
+                # One job per file on the shared pool, so the batch is bounded by its workers and the model rate limit.
+                # Each job pins its file, so leaving the page (which clears the uploader) does not lose it.
+                st.session_state['batch'] = [
+                    submit_upload_job(
+                        analyze_batch_file,
+                        batch_upload,
+                        client,
+                        report_store,
+                        report_cache,
+                        audio_index,
+                        batch_upload,
+                        salespersonName,
+                        storeName,
+                    ).id
+                    for batch_upload in uploads
+                ]
+                st.session_state.pop('report_id', None)
+                st.session_state.pop('finished_job', None)
+                st.rerun()
+
+        if upload is not None:
+            st.success(f"✅ File uploaded: {upload.name}")
 
-            # Audio player
-            st.audio(uploaded_file)
+            # Audio player, fed a small preview rather than the whole upload
+            if upload.preview is not None:
+                st.audio(upload.preview, format="audio/mpeg")
+            else:
+                st.audio(upload.path)
+
+            reanalyze = st.checkbox("Analyze again even if this call was analyzed before")
 
             # Analyze button
-            if st.button("Analyze Audio", type="primary"):
-                with st.spinner("🔄 Analyzing audio..."):
-                    try:
-                        # Read the uploaded file
-                        audio_data = uploaded_file.read()
-
-                        # Analyze with Gemini
-                        analysis = analyze_audio_with_gemini(audio_data)
-                        print("Analysis Result ::::::", analysis)
-
-                        # Clean the response if it contains markdown code blocks
-                        clean_analysis = analysis.strip()
-                        if clean_analysis.startswith("```json"):
-                            clean_analysis = clean_analysis[7:]
-                        elif clean_analysis.startswith("```"):
-                            clean_analysis = clean_analysis[3:]
-                        if clean_analysis.endswith("```"):
-                            clean_analysis = clean_analysis[:-3]
-                        clean_analysis = clean_analysis.strip()
-
-                        if not clean_analysis:
-                             st.error("The model returned an empty response.")
-                        else:
-                             report = convert_sales_report_to_string(json.loads(clean_analysis))
-                             
-                             # Store in session state
-                             st.session_state['analysis_result'] = report
-
-                        st.success("✅ Analysis completed!")
-
-                    except Exception as e:
-                        st.error(f"❌ Error analyzing audio: {str(e)}")
+            analyze = st.button("Analyze Audio", type="primary")
+            fingerprint = None
+            if analyze:
+                # Re-exports and re-encodes of an analyzed call reuse its report instead of a model call
+                with st.spinner("🔎 Checking for an earlier analysis of this call..."):
+                    fingerprint, duplicate = find_duplicate_call(upload.path)
+                record = get_report_store().get(duplicate.report_id) if duplicate is not None else None
+                if record is not None:
+                    matched = f"report #{record['id']} ({record['source_name'] or 'unnamed'}, {record['created_at'][:10]}, {duplicate.similarity:.0%} match)"
+                    if reanalyze:
+                        st.warning(f"⚠️ This recording matches {matched}. Analyzing it again.")
+                    else:
+                        st.info(f"♻️ This recording matches {matched}. Showing that analysis instead of running the model again.")
+                        get_report_cache().put(record['id'], record['analysis'], schema=record['schema'])
+                        st.session_state['report_id'] = record['id']
+                        st.session_state.pop('batch', None)
+                        analyze = False
+
+            if analyze:
+                job = submit_upload_job(
+                    analyze_upload,
+                    upload,
+                    get_analysis_client(),
+                    get_report_store(),
+                    get_report_cache(),
+                    upload,
+                    salespersonName,
+                    storeName,
+                    fingerprint,
+                )
+                st.session_state['job_id'] = job.id
+                st.session_state.pop('finished_job', None)
+                st.session_state.pop('batch', None)
+                st.rerun()
+
+        # Outcome of the session's last background analysis
+        finished = get_job_queue().get(st.session_state.get('finished_job'))
+        if finished is not None:
+            if finished.status == FAILED:
+                st.error(f"❌ Error analyzing audio: {finished.error}")
+            elif finished.result['report_id'] is None:
+                st.error("The model returned an empty response.")
+            else:
+                st.success("✅ Analysis completed!")
+                validation_errors = finished.result['validation_errors']
+                if validation_errors:
+                    st.warning(
+                        "⚠️ The analysis does not fully match the expected format:\n\n"
+                        + "\n".join(f"- `{path or 'root'}`: {message}" for path, message in validation_errors)
+                    )
 
     with col2:
         st.header("Analysis Results")
 
-        if 'analysis_result' in st.session_state:
+        report_id = st.session_state.get('report_id')
+        cached_report = get_report_cache().get(report_id) if report_id is not None else None
+        batch = session_batch()
+
+        if batch:
+            batch_panel(batch)
+
+        elif cached_report is not None:
 
             if st.button("Clear Analysis"):
-                if 'analysis_result' in st.session_state:
-                    del st.session_state['analysis_result']
+                st.session_state.pop('report_id', None)
+                st.session_state.pop('finished_job', None)
                 st.rerun()
 
             # Display analysis in a nice format
             st.markdown("### Sales Performance Analysis")
 
             # Create tabs for better organization
-            tab1, tab2 = st.tabs(["📋 Full Report", "💾 Export"])
+            tab1, tab2, tab3 = st.tabs(["📋 Full Report", "💾 Export", "🔁 Similar Calls"])
 
             with tab1:
                 # Display the analysis with proper formatting
-                analysis_text = st.session_state['analysis_result']
-                st.markdown(analysis_text)
+                st.markdown(cached_report.markdown)
 
             with tab2:
-                # Download button for the analysis as Word document
-                analysis_text = st.session_state['analysis_result']
-
-                # Create Word document
-                doc = Document()
-                doc.add_heading('Sales Performance Analysis Report', 0)
-
-                # Process content to handle markdown formatting
-                def process_line_to_word(doc, line):
-                    line = line.strip()
-                    if not line:
-                        return
-
-                    # Check if it's a heading (starts with #)
-                    if line.startswith('#'):
-                        # Count the number of # to determine heading level
-                        heading_level = 0
-                        for char in line:
-                            if char == '#':
-                                heading_level += 1
-                            else:
-                                break
-
-                        # Remove the # symbols and add as heading
-                        heading_text = line.lstrip('#').strip()
-                        if heading_text:
-                            doc.add_heading(heading_text, min(heading_level, 9))
-                    else:
-                        # Handle regular paragraphs with bold formatting
-                        paragraph = doc.add_paragraph()
-
-                        # Split text by ** to handle bold formatting
-                        parts = line.split('**')
-
-                        for i, part in enumerate(parts):
-                            if part:  # Only add non-empty parts
-                                if i % 2 == 0:  # Even index = normal text
-                                    paragraph.add_run(part)
-                                else:  # Odd index = bold text
-                                    paragraph.add_run(part).bold = True
-
-                # Add content to document
-                for line in analysis_text.split('\n'):
-                    process_line_to_word(doc, line)
-
-                # Save to BytesIO
-                doc_buffer = BytesIO()
-                doc.save(doc_buffer)
-                doc_buffer.seek(0)
+                # Download button for the analysis as Word document, built from the analysis JSON
+                from docx_export import DOCX_MIME, report_to_docx_bytes
 
                 # Remove file extension from uploaded file name for the report
-                if uploaded_file is not None:
-                    base_filename = os.path.splitext(uploaded_file.name)[0]
+                if upload is not None:
+                    base_filename = os.path.splitext(upload.name)[0]
                 else:
                     base_filename = "analysis"
                 st.download_button(
                     label="📄 Download Analysis Report (Word)",
-                    data=doc_buffer.getvalue(),
+                    # Built only when the button is clicked, and memoized by analysis hash
+                    data=partial(report_to_docx_bytes, cached_report.analysis, cached_report.schema),
                     file_name=f"{base_filename}_report.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                    mime=DOCX_MIME
                 )
 
+            with tab3:
+                if st.button("🔁 Find similar calls"):
+                    similar_calls_panel(report_id)
+
+        elif 'job_id' in st.session_state:
+            st.info("⏳ The analysis is running. Other pages can be used meanwhile; the report appears here when it is ready.")
+
         else:
-            st.info("👆 Upload an audio file and click 'Analyze Audio' to see results here.")
+            st.info("👆 Upload an audio file and click 'Analyze Audio' to see results here, or upload several files to analyze them as a batch.")
 
 if __name__ == "__main__":
-    main()
+    # ?profile=1 in the URL (or NAGA_PROFILE=1) profiles the page functions this run calls
+    run_profiled(f"app {st.session_state.get('page', 'home')}", main)
@@ -0,0 +1,67 @@
+"""
+Lookup latency of the entity normalization index.
+
+    python -m benchmarks.bench_entities --skus 5000 -n 20000
+
+Builds a catalog of synthetic SKUs (each with a couple of aliases) and
+times exact, variant ("Naga X 500g"), misspelled and free-text lookups,
+each once cold and once through the memo.
+"""
+import argparse
+import random
+import string
+import time
+
+from entities import EntityIndex
+
+IGNORE_WORDS = ("naga", "brand", "pack", "packet")
+
+
+def synthetic_catalog(count, rnd):
+    def word():
+        return "".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(4, 9))).title()
+
+    names = set()
+    while len(names) < count:
+        names.add(" ".join(word() for _ in range(rnd.randint(1, 3))))
+    return [{"name": name, "aliases": [f"{name} Mix", name.replace(" ", "-")]} for name in sorted(names)]
+
+
+def _typo(name, rnd):
+    index = rnd.randrange(len(name))
+    return name[:index] + rnd.choice(string.ascii_lowercase) + name[index + 1:]
+
+
+def _time(label, index, queries, expected):
+    index._memo.clear()
+    for attempt in ("cold", "memo"):
+        start = time.perf_counter()
+        results = [index.resolve(query) for query in queries]
+        elapsed = time.perf_counter() - start
+        hits = sum(result == want for result, want in zip(results, expected))
+        print(f"{label + ' (' + attempt + ')':<22} {elapsed / len(queries) * 1e6:8.1f} µs/lookup  "
+              f"{hits / len(queries):6.1%} correct")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--skus", type=int, default=5000)
+    parser.add_argument("-n", "--count", type=int, default=20000, help="Lookups per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    catalog = synthetic_catalog(args.skus, rnd)
+    start = time.perf_counter()
+    index = EntityIndex(catalog, IGNORE_WORDS)
+    print(f"Built index over {args.skus} SKUs in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    picks = [rnd.choice(catalog)["name"] for _ in range(args.count)]
+    _time("exact", index, picks, picks)
+    _time("variant", index, [f"naga {name.upper()} 500g" for name in picks], picks)
+    _time("typo", index, [_typo(name, rnd) for name in picks], picks)
+    _time("free text", index, [f"customer asked about {name} and the scheme" for name in picks], picks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Cost of the duplicate-call check that runs before every analysis.
+
+    python -m benchmarks.bench_fingerprint --calls 500 --seconds 180
+
+Fingerprints synthetic "calls" (noise shaped by a changing tone and a
+syllable-rate envelope), then times matching altered copies (gain and
+noise, resampling, a trimmed start) and unrelated audio against the index.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from fingerprint import SAMPLE_RATE, AudioIndex, fingerprint_samples
+
+
+def synthetic_call(seconds, seed, rate=SAMPLE_RATE):
+    rng = np.random.default_rng(seed)
+    count = int(seconds * rate)
+    envelope = np.repeat(np.abs(rng.standard_normal(count // 550 + 1)), 550)[:count]
+    pitch = np.repeat(rng.uniform(200, 1500, count // 700 + 1), 700)[:count]
+    tone = np.sin(2 * np.pi * np.cumsum(pitch) / rate)
+    return ((tone + 0.06 * rng.standard_normal(count)) * envelope * 0.2).astype(np.float32)
+
+
+def variants(samples, rng):
+    positions = np.arange(len(samples))
+    # Down to a lower rate and back, as a re-encode at another sample rate would
+    coarse = np.interp(np.arange(0, len(samples) - 1, 1.37), positions, samples)
+    resampled = np.interp(positions / 1.37, np.arange(len(coarse)), coarse).astype(np.float32)
+    return {
+        "gain + noise": samples * 0.6 + 0.01 * rng.standard_normal(len(samples)).astype(np.float32),
+        "resampled": resampled,
+        "trimmed 7.3 s": samples[int(7.3 * SAMPLE_RATE):],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500, help="Calls in the index")
+    parser.add_argument("--seconds", type=float, default=180, help="Length of each call")
+    parser.add_argument("-q", "--queries", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    index = AudioIndex()
+    start = time.perf_counter()
+    for report_id in range(1, args.calls + 1):
+        index.add(report_id, fingerprint_samples(synthetic_call(args.seconds, report_id)))
+    elapsed = time.perf_counter() - start
+    print(f"Fingerprinted {len(index)} calls in {elapsed:.1f} s ({elapsed / len(index) * 1000:.0f} ms/call)")
+
+    results = {}
+    for query in range(args.queries):
+        report_id = int(rng.integers(1, args.calls + 1))
+        cases = variants(synthetic_call(args.seconds, report_id), rng)
+        cases["unrelated"] = synthetic_call(args.seconds, args.calls + 1 + query)
+        for name, samples in cases.items():
+            start = time.perf_counter()
+            match = index.match(fingerprint_samples(samples))
+            elapsed = time.perf_counter() - start
+            expected = None if name == "unrelated" else report_id
+            correct = (match.report_id if match else None) == expected
+            times, hits = results.get(name, (0.0, 0))
+            results[name] = (times + elapsed, hits + correct)
+
+    for name, (times, hits) in results.items():
+        print(f"{name:<15} {times / args.queries * 1000:8.1f} ms/query  {hits}/{args.queries} correct")
+
+
+if __name__ == "__main__":
+    main()
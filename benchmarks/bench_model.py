@@ -0,0 +1,59 @@
+"""
+Parse + validate throughput and memory footprint of the typed report model.
+
+    python -m benchmarks.bench_model -n 20000
+
+Times json.loads alone against json.loads + parse_report over synthetic
+analysis JSON, then measures the memory held by the parsed reports compared
+with keeping the raw dicts.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from report_model import parse_report
+from synthetic import synthetic_reports
+
+
+def _time(label, fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {len(items) / elapsed:10.0f} reports/s")
+    return elapsed
+
+
+def _retained(build, items):
+    """Bytes still allocated after building one object per item."""
+    gc.collect()
+    tracemalloc.start()
+    kept = [build(item) for item in items]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    texts = [json.dumps(report) for report in synthetic_reports(args.count, args.seed)]
+
+    _time("json.loads", json.loads, texts)
+    _time("json.loads + parse_report", lambda text: parse_report(json.loads(text)), texts)
+
+    raw = _retained(json.loads, texts)
+    typed = _retained(lambda text: parse_report(json.loads(text)), texts)
+    print(f"{'memory as dicts':<28} {raw / 2**20:9.1f} MB  {raw / args.count:10.0f} B/report")
+    print(f"{'memory as SalesReport':<28} {typed / 2**20:9.1f} MB  {typed / args.count:10.0f} B/report")
+
+
+if __name__ == "__main__":
+    main()
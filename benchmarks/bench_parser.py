@@ -0,0 +1,62 @@
+"""
+Throughput of the incremental analysis parser.
+
+    python -m benchmarks.bench_parser -n 5000
+
+Parses synthetic markdown analyses whole and in small chunks (as streamed
+model output arrives), next to the old split-on-'#' flattening as a baseline.
+"""
+import argparse
+import time
+
+from analysis_parser import parse_analysis, parse_analysis_stream
+from jsontostring import convert_sales_report_to_string
+from synthetic import synthetic_reports
+
+
+def flat_sections(analysis_text):
+    """The previous convert_analysis_to_json: section title -> joined lines."""
+    sections = {}
+    current_section = None
+    for line in analysis_text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            current_section = line.lstrip("#").strip()
+            sections[current_section] = []
+        elif current_section:
+            sections[current_section].append(line)
+    return {k: "\n".join(v) for k, v in sections.items()}
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _time(label, fn, items, total_bytes):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {len(items) / elapsed:8.0f} reports/s  {total_bytes / elapsed / 2**20:6.1f} MB/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=64, help="Bytes per streamed chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    texts = [convert_sales_report_to_string(report) for report in synthetic_reports(args.count, args.seed)]
+    total_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    chunked = [_chunks(text, args.chunk_size) for text in texts]
+
+    _time("flat split (baseline)", flat_sections, texts, total_bytes)
+    _time("section tree, whole text", parse_analysis, texts, total_bytes)
+    _time(f"section tree, {args.chunk_size}B chunks", parse_analysis_stream, chunked, total_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark for convert_sales_report_to_string.
+
+    python -m benchmarks.bench_render -n 5000
+
+Checks that the lightweight competitor table is byte-identical to pandas'
+to_markdown for every synthetic report, then times full report rendering
+with the fast table formatter against the pandas/tabulate table path, and
+the report IR on its own and through several backends.
+"""
+import argparse
+import time
+
+import jsontostring
+from renderers import render_many
+from report_ir import build_report, competitor_table
+from synthetic import synthetic_reports
+
+
+def _time(label, fn, reports):
+    start = time.perf_counter()
+    for report in reports:
+        fn(report)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {len(reports) / elapsed:10.0f} reports/s")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    reports = synthetic_reports(args.count, args.seed)
+
+    mismatches = 0
+    for report in reports:
+        competitors = report["competitive_intelligence_and_customer_psychology"]["competitor_brand_analysis"]
+        table = competitor_table(competitors)
+        if competitors and jsontostring.format_table(table) != jsontostring._format_table_with_pandas(table):
+            mismatches += 1
+    print(f"table output identical to pandas: {args.count - mismatches}/{args.count}")
+
+    fast = _time("render (fast table)", jsontostring.convert_sales_report_to_string, reports)
+
+    original = jsontostring._plain_table_cells
+    jsontostring._plain_table_cells = lambda table: None
+    try:
+        slow = _time("render (pandas table)", jsontostring.convert_sales_report_to_string, reports)
+    finally:
+        jsontostring._plain_table_cells = original
+
+    _time("stream sections", lambda r: list(jsontostring.iter_sales_report_sections(r)), reports)
+    _time("build IR only", build_report, reports)
+    _time("IR -> markdown+html+text", lambda r: next(render_many([r], ("markdown", "html", "text"))), reports)
+    print(f"speedup: {slow / fast:.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
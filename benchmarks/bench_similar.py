@@ -0,0 +1,78 @@
+"""
+Query latency and recall of the "similar calls" index.
+
+    python -m benchmarks.bench_similar -n 20000
+
+Builds a corpus of objection texts drawn from a few hundred topics (each a
+handful of recurring phrases, mixed with unrelated filler), then compares
+the index's top-k against an exhaustive TF-IDF scan.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from similar import FEATURES, SimilarityIndex
+
+
+def synthetic_objections(count, rnd, topics=200):
+    vocab = [f"w{i}" for i in range(2000)]
+    topic_phrases = [[" ".join(rnd.choices(vocab, k=6)) for _ in range(8)] for _ in range(topics)]
+    filler = [" ".join(rnd.choices(vocab, k=5)) for _ in range(3000)]
+    for _ in range(count):
+        parts = rnd.sample(rnd.choice(topic_phrases), 3) + rnd.sample(filler, 3)
+        rnd.shuffle(parts)
+        yield {"sales_barriers": {"objections_raised": ". ".join(parts)}}
+
+
+def exhaustive(index, report_id, k):
+    """The exact top-k the index approximates."""
+    idf = index._idf()
+    indices, values, _ = index._docs[report_id]
+    weights = values * idf[indices]
+    query = np.zeros(FEATURES, dtype=np.float32)
+    query[indices] = weights / np.linalg.norm(weights)
+    scored = []
+    for other, (doc_indices, doc_values, _) in index._docs.items():
+        if other != report_id:
+            doc_weights = doc_values * idf[doc_indices]
+            scored.append((float(query[doc_indices] @ doc_weights) / float(np.linalg.norm(doc_weights)), other))
+    scored.sort(reverse=True)
+    return [other for _, other in scored[:k]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=20000, help="Calls in the index")
+    parser.add_argument("-q", "--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    index = SimilarityIndex(seed=args.seed)
+    start = time.perf_counter()
+    for report_id, analysis in enumerate(synthetic_objections(args.count, rnd), 1):
+        index.add(report_id, analysis)
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {len(index)} calls in {elapsed:.1f} s ({elapsed / len(index) * 1000:.2f} ms/call)")
+
+    queries = rnd.sample(range(1, len(index) + 1), min(args.queries, len(index)))
+    found, index_time, scan_time = 0, 0.0, 0.0
+    for report_id in queries:
+        start = time.perf_counter()
+        approximate = {match for match, _ in index.similar_to_report(report_id, k=args.k)}
+        index_time += time.perf_counter() - start
+        start = time.perf_counter()
+        exact = exhaustive(index, report_id, args.k)
+        scan_time += time.perf_counter() - start
+        found += len(approximate & set(exact))
+
+    print(f"index       {index_time / len(queries) * 1000:8.2f} ms/query")
+    print(f"exhaustive  {scan_time / len(queries) * 1000:8.2f} ms/query")
+    print(f"recall@{args.k}    {found / (len(queries) * args.k):8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Cold-start cost of the API and the Streamlit app, each measured in a fresh
+interpreter.
+
+    python -m benchmarks.bench_startup --runs 5
+
+For naga.py, against a scratch store of --reports synthetic analyses: time
+to import the module, to run its startup (lifespan warm-up), and the first
+and second GET /reports/{id}/similar, which needs the indexes built. For
+app.py: the first script run of the home page and of the dashboard page in
+a new process, which includes every import the page pulls in. Prints the
+median of --runs.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from report_store import ReportStore
+from synthetic import synthetic_reports
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+API_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import naga
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(naga.app) as client:
+    started = time.perf_counter()
+    client.get("/reports/1/similar")
+    first = time.perf_counter()
+    client.get("/reports/2/similar")
+    second = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "startup": started - imported,
+    "first request": first - started,
+    "second request": second - first,
+}))
+"""
+
+APP_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+if sys.argv[1] != "home":
+    at.session_state["page"] = sys.argv[1]
+start = time.perf_counter()
+at.run()
+first = time.perf_counter()
+at.run()
+second = time.perf_counter()
+print(json.dumps({"first run": first - start, "second run": second - first, "exceptions": len(at.exception)}))
+"""
+
+
+def run(script, *args, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", script, *args], cwd=ROOT, env=env, capture_output=True, text=True, timeout=600
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_of(runs, script, *args, env=None):
+    samples = [run(script, *args, env=env) for _ in range(runs)]
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--reports", type=int, default=2000, help="Analyses in the scratch store")
+    parser.add_argument("--pages", default="home,dashboard", help="Comma-separated app pages to time")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # Scratch store so the numbers do not depend on the local history
+        db_path = os.path.join(scratch, "reports.db")
+        store = ReportStore(db_path)
+        for analysis in synthetic_reports(args.reports):
+            store.add(analysis, salesperson="Bench", store="Bench Store")
+        env = dict(os.environ, NAGA_REPORT_DB=db_path, PYTHONWARNINGS="ignore")
+        print("naga.py")
+        for key, value in median_of(args.runs, API_SCRIPT, env=env).items():
+            print(f"  {key:<16} {value * 1000:8.0f} ms")
+        for page in args.pages.split(","):
+            print(f"app.py ({page})")
+            for key, value in median_of(args.runs, APP_SCRIPT, page, env=env).items():
+                print(f"  {key:<16} {value if key == 'exceptions' else f'{value * 1000:8.0f} ms'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Load test for the naga.py API: how many concurrent /analyze-audio/ requests
+one worker sustains, and where it saturates.
+
+    python -m benchmarks.load_test --levels 1,2,4,8,16 --duration 15 --latency 2 --jitter 0.5 --error-rate 0.02
+
+Everything runs locally: a static file server hosts the audio the requests
+point at, the model is the synthetic client (NAGA_MODEL_MODE=synthetic)
+with the given latency and error distribution, and the API runs under
+uvicorn in this process on a scratch report database. For each concurrency
+level the harness reports throughput, p50/p95/p99 latency, errors, the
+process's peak RSS and the API event loop's worst lag.
+
+A loop lag above --max-loop-lag-ms (default 250) means a handler blocks
+the event loop, and every other request waits on it. The run then exits
+with status 1, so the harness can gate changes to the API.
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import io
+import json
+import os
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+import wave
+from urllib.parse import quote
+
+import numpy as np
+
+from benchmarks.bench_fingerprint import synthetic_call
+from fingerprint import SAMPLE_RATE
+
+LAG_INTERVAL = 0.05
+RSS_INTERVAL = 0.05
+
+
+# ===== Audio Host =====
+def write_audio_files(directory, count, seconds):
+    """Distinct synthetic recordings as 16-bit WAV (decodable without ffmpeg)."""
+    names = []
+    for index in range(count):
+        samples = synthetic_call(seconds, seed=10_000 + index)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+        name = f"call_{index:03d}.wav"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(buffer.getvalue())
+        names.append(name)
+    return names
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_file_server(directory):
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ===== API Under Test =====
+class LoopLagMonitor:
+    """Runs on the API's event loop; a late wake-up means something blocked the loop."""
+
+    def __init__(self, interval=LAG_INTERVAL):
+        self.interval = interval
+        self.lags = []
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(loop.time() - start - self.interval)
+
+    def take(self):
+        lags, self.lags = self.lags, []
+        return lags
+
+
+class RssSampler:
+    """Peak resident memory of this process since the last take()."""
+
+    def __init__(self, interval=RSS_INTERVAL):
+        self.interval = interval
+        self.peak = 0
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _rss(self):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except OSError:
+            # ru_maxrss is KiB on Linux; it is the process-wide high-water mark
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, self._rss())
+            time.sleep(self.interval)
+
+    def take(self):
+        peak, self.peak = max(self.peak, self._rss()), 0
+        return peak
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(app, monitor):
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.serve(),), daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    lag_task = asyncio.run_coroutine_threadsafe(monitor.run(), loop)
+    return server, thread, lag_task, f"http://127.0.0.1:{port}"
+
+
+# ===== Driver =====
+async def run_level(api_url, audio_urls, concurrency, duration, timeout):
+    import httpx
+
+    latencies, statuses = [], []
+    deadline = time.perf_counter() + duration
+    counter = iter(range(10 ** 9))
+
+    async def worker(client):
+        while time.perf_counter() < deadline:
+            url = audio_urls[next(counter) % len(audio_urls)]
+            start = time.perf_counter()
+            try:
+                # force: the same files come round again, and the test is about full analyses
+                response = await client.post(f"{api_url}/analyze-audio/", json={"file_url": url, "force": True})
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def summarize(concurrency, latencies, statuses, elapsed, lags, peak_rss):
+    ok = [latency for latency, status in zip(latencies, statuses) if status == 200]
+    p50, p95, p99 = (np.percentile(ok, [50, 95, 99]) * 1000).round(1).tolist() if ok else (None, None, None)
+    return {
+        "concurrency": concurrency,
+        "requests": len(statuses),
+        "errors": len(statuses) - len(ok),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "peak_rss_mb": round(peak_rss / 2 ** 20, 1),
+        "max_loop_lag_ms": round(max(lags) * 1000, 1) if lags else None,
+        "p99_loop_lag_ms": round(float(np.percentile(lags, 99)) * 1000, 1) if lags else None,
+    }
+
+
+def print_row(row):
+    def cell(value, width):
+        return f"{'-' if value is None else value:>{width}}"
+
+    print(
+        cell(row["concurrency"], 5), cell(row["requests"], 6), cell(row["errors"], 6), cell(row["throughput_rps"], 8),
+        cell(row["p50_ms"], 9), cell(row["p95_ms"], 9), cell(row["p99_ms"], 9),
+        cell(row["peak_rss_mb"], 8), cell(row["max_loop_lag_ms"], 9),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per level")
+    parser.add_argument("--latency", type=float, default=2.0, help="Mean model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Log-normal sigma of the model latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of model calls that fail")
+    parser.add_argument("--files", type=int, default=20, help="Distinct audio files to host")
+    parser.add_argument("--seconds", type=float, default=60, help="Length of each audio file")
+    parser.add_argument("--audio-dir", help="Host these recordings instead of synthetic WAVs")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request timeout in seconds")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=250,
+                        help="Fail when the event loop lags longer than this at any level (0 disables the check)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+    levels = [int(level) for level in args.levels.split(",")]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # naga reads its configuration at import time
+        os.environ.update(
+            NAGA_MODEL_MODE="synthetic",
+            NAGA_SYNTHETIC_LATENCY=str(args.latency),
+            NAGA_SYNTHETIC_JITTER=str(args.jitter),
+            NAGA_SYNTHETIC_ERROR_RATE=str(args.error_rate),
+            NAGA_REPORT_DB=os.path.join(scratch, "reports.db"),
+        )
+        import naga
+
+        audio_dir = args.audio_dir or scratch
+        names = sorted(os.listdir(audio_dir)) if args.audio_dir else write_audio_files(scratch, args.files, args.seconds)
+        file_server, file_url = start_file_server(audio_dir)
+        audio_urls = [f"{file_url}/{quote(name)}" for name in names]
+
+        monitor = LoopLagMonitor()
+        rss = RssSampler()
+        api_server, api_thread, lag_task, api_url = start_api(naga.app, monitor)
+        print(f"{len(audio_urls)} audio files; model latency {args.latency}s (jitter {args.jitter}), error rate {args.error_rate}")
+        print(f"{'conc':>5} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MB':>8} {'lag ms':>9}")
+
+        results = []
+        try:
+            for concurrency in levels:
+                monitor.take()
+                rss.take()
+                latencies, statuses, elapsed = asyncio.run(
+                    run_level(api_url, audio_urls, concurrency, args.duration, args.timeout)
+                )
+                row = summarize(concurrency, latencies, statuses, elapsed, monitor.take(), rss.take())
+                results.append(row)
+                print_row(row)
+        finally:
+            lag_task.cancel()
+            api_server.should_exit = True
+            api_thread.join(timeout=10)
+            file_server.shutdown()
+
+    best = max(results, key=lambda row: row["throughput_rps"])
+    print(f"Peak throughput {best['throughput_rps']} req/s at concurrency {best['concurrency']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+    blocked = [row for row in results if args.max_loop_lag_ms and (row["max_loop_lag_ms"] or 0) > args.max_loop_lag_ms]
+    if blocked:
+        worst = max(blocked, key=lambda row: row["max_loop_lag_ms"])
+        print(
+            f"FAIL: event loop lagged {worst['max_loop_lag_ms']} ms at concurrency {worst['concurrency']} "
+            f"(limit {args.max_loop_lag_ms:g} ms); a handler is blocking the loop"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
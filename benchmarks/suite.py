@@ -0,0 +1,212 @@
+"""
+Micro-benchmark suite for the pure-Python hot paths, with a stored baseline.
+
+    python -m benchmarks.suite                       # default tier, compare with benchmarks/baseline.json
+    python -m benchmarks.suite --tier full -o out.json
+    python -m benchmarks.suite --only parse_explicit_counts --save-baseline
+
+Each case builds synthetic input at several sizes (1k to 1M rows or
+reports in the full tier) and keeps the best of --repeat runs. Results are
+compared with the baseline; anything slower by more than --threshold is a
+regression and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from synthetic import BRANDS, CATEGORIES, PRODUCTS, synthetic_markdown, synthetic_reports
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+# Distinct generated inputs per case; larger sizes cycle through them
+POOL_SIZE = 2000
+
+
+def _pool(make, size, rnd):
+    items = [make(rnd) for _ in range(min(size, POOL_SIZE))]
+    return [items[i % len(items)] for i in range(size)]
+
+
+# ===== Cases =====
+# Each case takes (size, rnd), builds its input and returns the function to time.
+def case_parse_explicit_counts(size, rnd):
+    from cube import parse_explicit_counts
+
+    def cell(rnd):
+        items = rnd.sample(PRODUCTS, rnd.randint(1, 5))
+        return ", ".join(f"{item} {rnd.choice('-–')} {rnd.randint(1, 500)}" for item in items)
+
+    series = pd.Series(_pool(cell, size, rnd))
+    return lambda: parse_explicit_counts(series)
+
+
+def case_convert_sales_report_to_string(size, rnd):
+    from jsontostring import convert_sales_report_to_string
+
+    reports = _pool_reports(size, rnd)
+    return lambda: [convert_sales_report_to_string(report) for report in reports]
+
+
+def case_convert_analysis_to_json(size, rnd):
+    # naga.convert_analysis_to_json is parse_analysis; importing naga would open its report store
+    from analysis_parser import parse_analysis
+
+    texts = _pool(synthetic_markdown, size, rnd)
+    return lambda: [parse_analysis(text) for text in texts]
+
+
+def case_build_docx_bytes(size, rnd):
+    from docx_export import build_docx_bytes
+
+    reports = _pool_reports(size, rnd)
+    return lambda: [build_docx_bytes(report) for report in reports]
+
+
+def case_competitor_expansion(size, rnd):
+    from cube import MentionCube, add_products_frame
+
+    def row(rnd):
+        count = rnd.randint(1, 4)
+        return {
+            "Products": rnd.choice(PRODUCTS),
+            "Potential Competitors": ", ".join(rnd.sample(BRANDS, count)),
+            "Reason": ", ".join(rnd.choice(CATEGORIES) for _ in range(count)),
+        }
+
+    df = pd.DataFrame(_pool(row, size, rnd))
+    return lambda: add_products_frame(MentionCube(), df)
+
+
+def _pool_reports(size, rnd):
+    reports = synthetic_reports(min(size, POOL_SIZE), rnd.randrange(2 ** 32))
+    return [reports[i % len(reports)] for i in range(size)]
+
+
+K, M = 1_000, 1_000_000
+CASES = {
+    "parse_explicit_counts": (case_parse_explicit_counts, {"quick": [K], "default": [K, 100 * K], "full": [K, 10 * K, 100 * K, M]}),
+    "convert_sales_report_to_string": (case_convert_sales_report_to_string, {"quick": [K], "default": [K, 10 * K], "full": [K, 10 * K, 100 * K, M]}),
+    "convert_analysis_to_json": (case_convert_analysis_to_json, {"quick": [K], "default": [K, 10 * K], "full": [K, 10 * K, 100 * K, M]}),
+    # python-docx takes ~0.1 s per document; larger sizes only repeat the same per-document cost
+    "build_docx_bytes": (case_build_docx_bytes, {"quick": [20], "default": [100], "full": [100, K]}),
+    "competitor_expansion": (case_competitor_expansion, {"quick": [K], "default": [K, 100 * K], "full": [K, 10 * K, 100 * K, M]}),
+}
+
+
+# ===== Running =====
+def run_case(name, size, repeat, seed):
+    setup, _ = CASES[name]
+    fn = setup(size, random.Random(seed))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "size": size,
+        "min_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "per_item_us": round(min(times) / size * 1e6, 3),
+        "repeat": repeat,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Rows of (key, current, baseline or None, change or None, regressed)."""
+    rows = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            rows.append((key, result["min_s"], None, None, False))
+            continue
+        change = result["min_s"] / base["min_s"] - 1 if base["min_s"] else 0.0
+        rows.append((key, result["min_s"], base["min_s"], change, change > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tier", choices=["quick", "default", "full"], default="default", help="Which input sizes to run")
+    parser.add_argument("--only", action="append", choices=sorted(CASES), help="Run only these cases (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the fastest counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown, e.g. 0.2 for 20%%")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'case':<44} {'best':>10} {'per item':>12} {'baseline':>10} {'change':>8}")
+    for name in args.only or CASES:
+        for size in CASES[name][1][args.tier]:
+            key = f"{name}@{size}"
+            results[key] = result = run_case(name, size, args.repeat, args.seed)
+            (_, current, base, change, regressed), = compare({key: result}, baseline, args.threshold)
+            print(
+                f"{key:<44} {current:>9.4f}s {result['per_item_us']:>11.2f}µs "
+                f"{(f'{base:.4f}s' if base is not None else '-'):>10} "
+                f"{(f'{change:+.0%}' if change is not None else '-'):>8}{'  REGRESSION' if regressed else ''}"
+            )
+
+    document = {"environment": environment(), "tier": args.tier, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+    if args.save_baseline:
+        # Keep entries for cases/sizes not run this time
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                previous = json.load(f)["results"]
+        document["results"] = {**previous, **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = [row for row in compare(results, baseline, args.threshold) if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: " + ", ".join(row[0] for row in regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
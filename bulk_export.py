@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+
+from renderers import RENDERERS
+from report_ir import build_report
+from report_store import DEFAULT_DB_PATH, ReportStore
+
+FORMATS = ("docx", "md", "json")
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(value)).strip("-") or "unknown"
+
+
+def report_basename(record):
+    day = (record.get("created_at") or "")[:10] or "undated"
+    parts = [day, _slug(record.get("salesperson") or "unknown"), _slug(record.get("store") or "unknown"), str(record["id"])]
+    return "_".join(parts)
+
+
+def render_report_files(record, formats=FORMATS):
+    """
+    Renders one stored report into [(archive_name, bytes), ...].
+    Runs inside a worker process, so it only takes and returns plain data.
+    """
+    base = report_basename(record)
+    analysis = record["analysis"]
+    files = []
+    # One IR per report, shared by the DOCX and Markdown backends
+    report = build_report(analysis, record["schema"]) if "docx" in formats or "md" in formats else None
+    if "docx" in formats:
+        files.append((f"docx/{base}.docx", RENDERERS["docx"](report)))
+    if "md" in formats:
+        files.append((f"markdown/{base}.md", RENDERERS["markdown"](report).encode("utf-8")))
+    if "json" in formats:
+        files.append((f"json/{base}.json", json.dumps(analysis, ensure_ascii=False, indent=2).encode("utf-8")))
+    return files
+
+
+def write_export_zip(records, fileobj, formats=FORMATS, max_workers=None, progress=None):
+    """
+    Renders `records` in a process pool and writes each result into a ZIP on
+    `fileobj` as soon as it is ready. At most a few reports per worker are in
+    flight, so memory stays flat no matter how many reports are exported.
+    A report that fails to render is listed in errors.txt instead of aborting
+    the export. `fileobj` may be unseekable (e.g. stdout).
+    Returns (exported, failed) report counts.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    exported = 0
+    errors = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool, \
+            zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        pending = {}
+
+        def drain(return_when):
+            nonlocal exported
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                base = pending.pop(future)
+                try:
+                    files = future.result()
+                except Exception as e:
+                    errors.append(f"{base}: {type(e).__name__}: {e}")
+                else:
+                    for name, data in files:
+                        archive.writestr(name, data)
+                    exported += 1
+                if progress:
+                    progress(exported + len(errors))
+
+        for record in records:
+            pending[pool.submit(render_report_files, record, tuple(formats))] = report_basename(record)
+            if len(pending) >= 2 * max_workers:
+                drain(FIRST_COMPLETED)
+        drain(ALL_COMPLETED)
+        if errors:
+            archive.writestr("errors.txt", "\n".join(errors) + "\n")
+    return exported, len(errors)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored call analyses as a ZIP of DOCX/Markdown/JSON files.")
+    parser.add_argument("-o", "--output", required=True, help="ZIP file to write, or '-' for stdout")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Report store database")
+    parser.add_argument("--salesperson", help="Only reports for this salesperson")
+    parser.add_argument("--store", help="Only reports for this store")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Comma-separated subset of docx,md,json")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"Unknown format(s): {', '.join(sorted(unknown))}")
+
+    store = ReportStore(args.db)
+    records = store.query(
+        salesperson=args.salesperson,
+        store=args.store,
+        date_from=args.date_from,
+        date_to=args.date_to,
+    )
+
+    if args.output == "-":
+        count, failed = write_export_zip(records, sys.stdout.buffer, formats, args.jobs)
+    else:
+        with open(args.output, "wb") as f:
+            count, failed = write_export_zip(records, f, formats, args.jobs)
+    print(f"Exported {count} report(s)", file=sys.stderr)
+    if failed:
+        print(f"{failed} report(s) failed to render; see errors.txt in the ZIP", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
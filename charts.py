@@ -0,0 +1,256 @@
+import heapq
+import os
+from operator import itemgetter
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# ===== Chart Settings =====
+DEFAULT_TOP_N = int(os.getenv("NAGA_TOP_N", "25"))
+OTHER_LABEL = "Other"
+SCORE_COLUMNS = ['Product promotion', 'Scheme leverage', 'Competitor handling', 'Customer psychology understanding']
+SCORE_CATEGORIES = ['Product Promotion Skill', 'Scheme Utilization', 'Competitor Handling Skill', 'Customer Understanding']
+
+
+# ===== Top-N Reduction =====
+def top_n_with_other(counts, n, other_label=OTHER_LABEL, smallest=False, with_other=True):
+    """
+    Keeps the `n` largest (or smallest) items using a heap, so the full item
+    list is never sorted, and folds everything else into one `other_label`
+    bucket. Returns the counts unchanged when they already fit.
+    """
+    if not n or len(counts) <= n:
+        return dict(counts)
+
+    select = heapq.nsmallest if smallest else heapq.nlargest
+    reduced = dict(select(n, counts.items(), key=itemgetter(1)))
+
+    if with_other:
+        rest = sum(counts.values()) - sum(reduced.values())
+        reduced[other_label] = reduced.get(other_label, 0) + rest
+    return reduced
+
+
+def top_n_frame(df, label_column, value_column, n, smallest=False, with_other=True):
+    """top_n_with_other for a two column DataFrame such as the pitch spreadsheets."""
+    counts = {}
+    for label, value in zip(df[label_column], df[value_column]):
+        counts[label] = counts.get(label, 0) + value
+    reduced = top_n_with_other(counts, n, smallest=smallest, with_other=with_other)
+    return pd.DataFrame(list(reduced.items()), columns=[label_column, value_column])
+
+
+def payload_size(data):
+    """Approximate bytes shipped to the browser for a figure or DataFrame."""
+    if isinstance(data, pd.DataFrame):
+        return len(data.to_json(orient="records").encode("utf-8"))
+    return len(data.to_json().encode("utf-8"))
+
+
+def format_payload(item_count, total_items, size):
+    if item_count < total_items:
+        shown = f"Top {item_count} of {total_items:,} items"
+    else:
+        shown = f"{total_items:,} items"
+    return f"{shown} · {size / 1024:.1f} KB sent to the browser"
+
+
+# ===== Figure Builders =====
+def mention_treemap(counts, root_label, item_label):
+    freq_df = pd.DataFrame(counts.items(), columns=[item_label, 'Count'])
+    freq_df = freq_df.sort_values(by='Count', ascending=False)
+
+    fig = px.treemap(
+        freq_df,
+        path=[px.Constant(root_label), item_label],
+        values='Count',
+        color='Count',
+        color_continuous_scale='Blues',
+    )
+    fig.update_layout(
+        margin=dict(t=50, l=25, r=25, b=25),
+        uniformtext=dict(minsize=10, mode='hide')
+    )
+    return fig
+
+
+def score_radar(avg_scores, categories=SCORE_CATEGORIES):
+    fig = go.Figure(data=go.Scatterpolar(
+        r=avg_scores + [avg_scores[0]],
+        theta=categories + [categories[0]],
+        fill='toself',
+        name='Average Monthly Scores',
+        line_color="#6873f9",
+        fillcolor='rgba(164, 173, 248)'
+    ))
+
+    # Layout settings
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0,10]), bgcolor='#e5ecf6',
+            angularaxis=dict(tickfont=dict(size=16))
+            ),
+        showlegend=False,
+        height = 600
+    )
+    return fig
+
+
+def competitor_reason_bar(count_df, product):
+    fig = px.bar(
+        count_df,
+        x='Potential Competitors',
+        y='Count',
+        color='Reason',
+        title=f"Competitor Performance for {product}",
+        text='Count',
+        barmode='stack',
+        color_discrete_sequence=px.colors.qualitative.Set3,
+        height=500
+    )
+
+    fig.update_traces(textposition='inside', textfont_size=15)
+
+    fig.update_layout(
+        xaxis_title="Potential Competitors",
+        yaxis_title="Count of Mentions",
+        legend_title="Reasons",
+        plot_bgcolor="#f9f9f9",
+        paper_bgcolor="#ffffff",
+        font=dict(size=13),
+        title_x=0.5,
+        xaxis = dict(title_font=dict(size=16), tickfont=dict(size=14), categoryorder='total descending'),
+        yaxis = dict(title_font=dict(size=16), tickfont=dict(size=14)),
+    )
+    return fig
+
+
+def concern_bar(counts):
+    concern_df = pd.DataFrame(list(counts.items()), columns=["Concern", "Count"])
+    concern_df = concern_df.sort_values(by="Count", ascending=False)
+
+    fig = px.bar(
+        concern_df,
+        x="Concern",
+        y="Count",
+        text="Count",
+        color="Concern",
+        color_discrete_sequence=px.colors.qualitative.Set2,
+        height=600
+    )
+    fig.update_traces(textposition="outside", textfont_size=15)
+    fig.update_layout(
+        xaxis_title="Concern Type",
+        yaxis_title="Frequency",
+        showlegend=True,
+        template="simple_white",
+        xaxis = dict(title_font=dict(size=16), tickfont=dict(size=14)),
+        yaxis = dict(title_font=dict(size=16), tickfont=dict(size=14))
+    )
+    return fig
+
+
+def discussion_summary_bar(summary_data):
+    fig_summary = px.bar(
+        summary_data,
+        x='Category',
+        y='Count',
+        text='Count',
+        color='Count',
+        color_continuous_scale='Bluered',
+        height = 500
+    )
+
+    # Style adjustments
+    fig_summary.update_traces(textposition='outside', textfont_size=15)
+    fig_summary.update_layout(
+        xaxis_title="Discussion Category",
+        yaxis_title="Total Mentions",
+        template='simple_white',
+        yaxis=dict(showgrid=True, zeroline=False, title_font=dict(size=16), tickfont=dict(size=14)),
+        font = dict(size=14),
+        xaxis = dict(title_font=dict(size=16), tickfont=dict(size=14)),
+    )
+    return fig_summary
+
+
+# ===== Cube-backed Charts =====
+# Each entry turns cube lookups into a figure; None means "no data".
+def _treemap_chart(measure, root_label, item_label):
+    def build(cube, top_n=None, **filters):
+        counts = cube.counts(measure, **filters)
+        if not counts:
+            return None
+        return mention_treemap(top_n_with_other(counts, top_n), root_label, item_label)
+    build.measure = measure
+    return build
+
+
+def _radar_chart(cube, **filters):
+    row = cube.row("individual", **filters)
+    if row is None:
+        return None
+    return score_radar([row[col] for col in SCORE_COLUMNS])
+
+
+def _competitor_chart(cube, product, **filters):
+    competitor_counts = cube.counts("Potential Competitors", product=product, **filters)
+    if not competitor_counts:
+        return None
+
+    # Count occurrences of each competitor-reason combination
+    count_df = pd.DataFrame(
+        [
+            {'Potential Competitors': competitor, 'Reason': reason, 'Count': count}
+            for competitor in competitor_counts
+            for reason, count in cube.counts("Competitor Reasons", product=product, competitor=competitor, **filters).items()
+        ]
+    )
+
+    # Sort by competitor and count for better visualization
+    count_df = count_df.sort_values(['Potential Competitors', 'Count'], ascending=[True, False])
+    return competitor_reason_bar(count_df, product)
+
+
+def _concern_chart(cube, **filters):
+    return concern_bar(cube.counts("Concerns", **filters))
+
+
+def _discussion_summary_chart(cube, **filters):
+    categories = ['Products Discussed', 'Competitors', 'Competitor Products', 'Pricing Concerns']
+    summary_data = pd.DataFrame({
+        'Category': categories,
+        'Count': [cube.total(measure, **filters) for measure in categories]
+    })
+    return discussion_summary_bar(summary_data)
+
+
+CHARTS = {
+    "product_treemap": _treemap_chart("Products Discussed", "Product Mention Rate", "Product"),
+    "competitor_treemap": _treemap_chart("Competitors", "Competitor Mention Rate", "Competitor"),
+    "competitor_product_treemap": _treemap_chart("Competitor Products", "Competitor Product Preference", "Product"),
+    "score_radar": _radar_chart,
+    "competitor_reasons": _competitor_chart,
+    "concerns": _concern_chart,
+    "discussion_summary": _discussion_summary_chart,
+}
+
+
+def build_chart(cube, chart, top_n=None, **filters):
+    """
+    Builds the named chart from cube lookups. Returns None when there is no data.
+    `top_n` only applies to charts that aggregate a measure (the treemaps).
+    """
+    builder = CHARTS[chart]
+    if hasattr(builder, "measure"):
+        return builder(cube, top_n=top_n, **filters)
+    return builder(cube, **filters)
+
+
+def chart_item_count(cube, chart, **filters):
+    """Distinct items behind a measure chart before top-N reduction."""
+    builder = CHARTS[chart]
+    if not hasattr(builder, "measure"):
+        return None
+    return len(cube.counts(builder.measure, **filters))
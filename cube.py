@@ -0,0 +1,363 @@
+import os
+import re
+from collections import Counter
+
+import pandas as pd
+
+from entities import load_catalog
+
+# ===== Cube Dimensions =====
+DIMENSIONS = ("month", "salesperson", "store", "product", "competitor")
+ALL = "*"
+
+DATA_FILES = {
+    "monthly": "monthly.xlsx",
+    "individual": "individually.xlsx",
+    "products": "products.xlsx",
+    "concerns": "concerns.xlsx",
+}
+# Read as plain frames by the dashboard pages, not loaded into the cube,
+# but part of data_version so their caches refresh when they are replaced
+PITCH_FILES = ("TopSalesPitch.xlsx", "LeastPitchedItems.xlsx")
+
+# Monthly columns holding "Item – count" lists, and the dimension each item fills
+MONTHLY_MEASURES = {
+    "Products Discussed": "product",
+    "Competitors": "competitor",
+    "Competitor Products": "product",
+    "Pricing Concerns": "product",
+}
+# Catalog index used to canonicalize each dimension's names
+DIMENSION_ENTITIES = {"product": "products", "competitor": "competitors"}
+
+# KPI row columns that add up when rows roll up; other numeric columns are
+# rates or scores and are averaged, weighted by the number of reports
+ROW_WEIGHT = "Total Reports Analysed"
+ROW_SUMS = {"Total Reports Analysed", "Total Duration"}
+# Derived columns recomputed from the rolled-up sums: column -> (numerator, denominator)
+ROW_RATIOS = {"Average Duration": ("Total Duration", "Total Reports Analysed")}
+
+_QUANTITY = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*(.*?)\s*$")
+
+
+def split_explicit_counts(value):
+    """
+    Yields (item_name, count) pairs from a single cell such as
+    'Item - 100, Other Item – 50'. Items without a count default to 1.
+    """
+    if pd.isna(value) or str(value).strip().lower() == 'nan':
+        return
+
+    # Split by comma for multiple items in one cell
+    items_raw = [i.strip() for i in str(value).split(",") if i.strip()]
+
+    for raw_item in items_raw:
+        # Check for delimiters like '–' (long dash) or '-' (standard dash)
+        if "–" in raw_item:
+            parts = raw_item.split("–")
+        elif "-" in raw_item:
+            parts = raw_item.split("-")
+        else:
+            parts = [raw_item]
+
+        name = parts[0].strip()
+
+        # Extract count if present, otherwise default to 1
+        if len(parts) > 1:
+            # Remove any non-numeric chars before converting
+            count_str = "".join(filter(str.isdigit, parts[1]))
+            count = int(count_str) if count_str else 1
+        else:
+            count = 1
+
+        yield name, count
+
+
+def parse_explicit_counts(data_series, normalize=None):
+    """
+    Parses a pandas Series of strings that may contain comma-separated items
+    with explicit counts like 'Item - 100' or 'Item – 50'.
+    Returns a dictionary of aggregated {item_name: count}; pass `normalize`
+    (e.g. entities.canonical_product) to merge spellings of the same item.
+    """
+    total_counts = {}
+    for value in data_series:
+        for name, count in split_explicit_counts(value):
+            if normalize is not None:
+                name = normalize(name)
+            total_counts[name] = total_counts.get(name, 0) + count
+    return total_counts
+
+
+def expand_competitor_reasons(competitors, reasons):
+    """
+    Pairs comma-separated competitor and reason cells positionally.
+    Competitors without a matching reason are dropped.
+    """
+    competitor_list = [c.strip() for c in str(competitors).split(',')]
+    reason_list = [r.strip() for r in str(reasons).split(',')]
+    return list(zip(competitor_list, reason_list))
+
+
+def _rollup_keys(values):
+    """
+    Returns every cell key a fact contributes to: each dimension is either
+    its own value or ALL. Unknown dimensions only ever roll up to ALL.
+    """
+    keys = [()]
+    for value in values:
+        if value is None:
+            keys = [key + (ALL,) for key in keys]
+        else:
+            keys = [key + (ALL,) for key in keys] + [key + (value,) for key in keys]
+    return keys
+
+
+def _quantity(value):
+    """Splits a KPI cell such as 12, 9.5 or '301.9 min' into (number, unit), or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return None if pd.isna(value) else (value, "")
+    match = _QUANTITY.match(str(value))
+    if match is None:
+        return None
+    number = float(match.group(1))
+    return (int(number) if number.is_integer() else number), match.group(2)
+
+
+def _format_quantity(number, unit):
+    number = round(number, 2)
+    return f"{number:g} {unit}" if unit else number
+
+
+class _RowRollup:
+    """
+    Aggregates the KPI rows rolled up into one cube cell: count columns are
+    summed, rates and scores are averaged weighted by reports, and text
+    columns are kept only while every contributing row agrees.
+    """
+
+    def __init__(self, row):
+        self.first = row
+        self.rows = 0
+        self.weight = 0
+        self.sums = {}
+        self.units = {}
+        self.text = {}
+        self.add(row)
+
+    def add(self, row):
+        self.rows += 1
+        weight = _quantity(row.get(ROW_WEIGHT))
+        weight = weight[0] if weight and weight[0] > 0 else 1
+        self.weight += weight
+        for column, value in row.items():
+            quantity = _quantity(value)
+            if self.rows == 1 and quantity is not None:
+                self.sums[column] = 0
+                self.units[column] = quantity[1]
+            if column in self.sums:
+                if quantity is not None:
+                    self.sums[column] += quantity[0] * (1 if column in ROW_SUMS else weight)
+            elif self.rows == 1:
+                self.text[column] = value
+            elif self.text.get(column) != value:
+                self.text[column] = None
+
+    def value(self):
+        if self.rows == 1:
+            return self.first
+        row = dict(self.text)
+        for column, total in self.sums.items():
+            number = total if column in ROW_SUMS else total / self.weight
+            row[column] = _format_quantity(number, self.units[column])
+        for column, (numerator, denominator) in ROW_RATIOS.items():
+            if column in self.sums and numerator in self.sums and self.sums.get(denominator):
+                number = self.sums[numerator] / self.sums[denominator]
+                row[column] = _format_quantity(number, self.units[column])
+        return row
+
+
+class MentionCube:
+    """
+    Pre-aggregated counts over month × salesperson × store × product × competitor.
+
+    Every fact is rolled up into all 2^5 dimension combinations when it is
+    added, so any filter combination is answered with a single dict lookup
+    instead of a boolean mask over the source DataFrame.
+    """
+
+    def __init__(self):
+        self._cells = {}
+        self._rows = {}
+        self._members = {}
+        self._names = set()
+        self.errors = {}
+
+    def _key(self, filters):
+        unknown = set(filters) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown cube dimension(s): {sorted(unknown)}")
+        return tuple(
+            ALL if filters.get(dim) in (None, ALL) else filters[dim]
+            for dim in DIMENSIONS
+        )
+
+    def _track_members(self, name, key):
+        # Called once per new cell; indexed by the rest of the key so members can be scoped
+        self._names.add(name)
+        for i, (dim, value) in enumerate(zip(DIMENSIONS, key)):
+            if value != ALL:
+                scope = key[:i] + (ALL,) + key[i + 1:]
+                self._members.setdefault((name, dim, scope), set()).add(value)
+
+    def add(self, measure, item, count=1, **dims):
+        """Adds `count` mentions of `item` under `measure` for the given dimensions."""
+        self._key(dims)
+        values = tuple(dims.get(dim) for dim in DIMENSIONS)
+        for key in _rollup_keys(values):
+            cell = self._cells.get((measure, key))
+            if cell is None:
+                self._track_members(measure, key)
+                cell = self._cells[(measure, key)] = Counter()
+            cell[item] += count
+
+    def add_row(self, table, row, **dims):
+        """Indexes a KPI row, aggregating it into every rolled-up combination."""
+        self._key(dims)
+        values = tuple(dims.get(dim) for dim in DIMENSIONS)
+        for key in _rollup_keys(values):
+            rollup = self._rows.get((table, key))
+            if rollup is None:
+                self._track_members(table, key)
+                self._rows[(table, key)] = _RowRollup(row)
+            else:
+                rollup.add(row)
+
+    def counts(self, measure, **filters):
+        """Returns {item: count} for `measure` under the given filters."""
+        return self._cells.get((measure, self._key(filters)), Counter())
+
+    def total(self, measure, **filters):
+        return sum(self.counts(measure, **filters).values())
+
+    def row(self, table, **filters):
+        """Returns the KPI row dict for the given filters, or None."""
+        rollup = self._rows.get((table, self._key(filters)))
+        return None if rollup is None else rollup.value()
+
+    def members(self, dim, name, **filters):
+        """
+        Returns the sorted distinct values of `dim` seen for a measure or table,
+        limited to the facts matching `filters` on the other dimensions.
+        """
+        filters.pop(dim, None)
+        return sorted(self._members.get((name, dim, self._key(filters)), ()))
+
+    def has(self, name):
+        return name in self._names
+
+
+def _clean(value):
+    if pd.isna(value):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _canonical(dim, value):
+    value = _clean(value)
+    if value is None:
+        return None
+    return load_catalog()[DIMENSION_ENTITIES[dim]].canonical(value)
+
+
+def add_monthly_frame(cube, df):
+    for record in df.to_dict("records"):
+        month = _clean(record.get("Period"))
+        cube.add_row("monthly", record, month=month)
+        for measure, item_dim in MONTHLY_MEASURES.items():
+            if measure not in record:
+                continue
+            for name, count in split_explicit_counts(record[measure]):
+                name = _canonical(item_dim, name)
+                cube.add(measure, name, count, month=month, **{item_dim: name})
+
+
+def add_individual_frame(cube, df):
+    for record in df.to_dict("records"):
+        cube.add_row(
+            "individual",
+            record,
+            salesperson=_clean(record.get("SalesPerson")),
+            month=_clean(record.get("Period")),
+        )
+
+
+def add_products_frame(cube, df):
+    required_columns = ['Products', 'Potential Competitors', 'Reason']
+    if not all(col in df.columns for col in required_columns):
+        cube.errors["products"] = f"Missing required columns. Expected: {required_columns}"
+        return
+    df = df.dropna(subset=required_columns)
+    for record in df.to_dict("records"):
+        product = _canonical("product", record["Products"])
+        for competitor, reason in expand_competitor_reasons(record['Potential Competitors'], record['Reason']):
+            competitor = _canonical("competitor", competitor)
+            cube.add("Competitor Reasons", reason, product=product, competitor=competitor)
+            cube.add("Potential Competitors", competitor, product=product, competitor=competitor)
+
+
+def add_concerns_frame(cube, df):
+    if "Products" not in df.columns or "Concerns" not in df.columns:
+        cube.errors["concerns"] = "Excel must contain 'Product' and 'Concerns' columns"
+        return
+    for record in df.to_dict("records"):
+        product = _canonical("product", record["Products"])
+        if product is None:
+            continue
+        cube.add_row("concerns", record, product=product)
+        for name, count in split_explicit_counts(record["Concerns"]):
+            cube.add("Concerns", name, count, product=product)
+
+
+FRAME_LOADERS = {
+    "monthly": add_monthly_frame,
+    "individual": add_individual_frame,
+    "products": add_products_frame,
+    "concerns": add_concerns_frame,
+}
+
+
+def data_version(data_dir="data"):
+    """
+    Cheap fingerprint of the dashboard data files (name, mtime, size).
+    Changes whenever a spreadsheet is replaced, so it can key caches.
+    """
+    version = []
+    for name in sorted((*DATA_FILES.values(), *PITCH_FILES)):
+        path = os.path.join(data_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        version.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+def build_dashboard_cube(data_dir="data"):
+    """
+    Reads every dashboard spreadsheet once and returns a populated MentionCube.
+    Read failures are recorded per source in `cube.errors` instead of raising,
+    so one broken file does not take down the other pages.
+    """
+    cube = MentionCube()
+    for source, file_name in DATA_FILES.items():
+        try:
+            df = pd.read_excel(os.path.join(data_dir, file_name))
+        except Exception as e:
+            cube.errors[source] = f"Failed to read Excel file: {e}"
+            continue
+        FRAME_LOADERS[source](cube, df)
+    return cube
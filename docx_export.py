@@ -0,0 +1,140 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from docx import Document
+from docx.shared import Pt
+
+from report_ir import Heading, Paragraph, Table, build_report, cell_text
+from report_store import APP_SCHEMA
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOCX_CACHE_SIZE = int(os.getenv("NAGA_DOCX_CACHE_SIZE", "64"))
+
+_docx_cache = OrderedDict()
+_docx_cache_lock = threading.Lock()
+
+
+def _add_paragraph(doc, block):
+    if block.marker == "-":
+        level = block.indent // 2 + 1
+        paragraph = doc.add_paragraph(style="List Bullet" if level == 1 else f"List Bullet {min(level, 3)}")
+    else:
+        paragraph = doc.add_paragraph()
+        if block.indent:
+            paragraph.paragraph_format.left_indent = Pt(9 * block.indent)
+        if block.marker:
+            paragraph.add_run(f"{block.marker} ")
+
+    for span in block.spans:
+        if span.text:
+            run = paragraph.add_run(span.text)
+            if span.bold:
+                run.bold = True
+
+
+def _add_table(doc, block):
+    table = doc.add_table(rows=1, cols=len(block.headers))
+    table.style = "Table Grid"
+    for cell, header in zip(table.rows[0].cells, block.headers):
+        cell.paragraphs[0].add_run(header).bold = True
+    for values in block.rows:
+        for cell, value in zip(table.add_row().cells, values):
+            cell.text = cell_text(value)
+
+
+def render_docx(report) -> bytes:
+    """
+    Builds the Word report straight from the report IR: headings, bullets
+    and bold spans map to Word styles and runs, the competitor table to a
+    real Word table. Returns the .docx bytes.
+    """
+    doc = Document()
+    doc.add_heading(report.title, 0)
+
+    for section in report.sections:
+        for block in section.blocks:
+            kind = type(block)
+            if kind is Paragraph:
+                _add_paragraph(doc, block)
+            elif kind is Heading:
+                doc.add_heading(block.text, min(block.level, 9))
+            elif kind is Table:
+                _add_table(doc, block)
+            # Blank lines and rules only exist for the text layouts
+
+    # Save to BytesIO
+    doc_buffer = BytesIO()
+    doc.save(doc_buffer)
+    return doc_buffer.getvalue()
+
+
+def build_docx_bytes(analysis: dict, schema=APP_SCHEMA) -> bytes:
+    """Builds the Word report for a stored analysis and returns the .docx bytes."""
+    return render_docx(build_report(analysis, schema))
+
+
+def report_hash(analysis: dict) -> str:
+    canonical = json.dumps(analysis, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def report_to_docx_bytes(analysis: dict, schema=APP_SCHEMA) -> bytes:
+    """
+    Memoized build_docx_bytes, keyed by the analysis hash. Safe to call from the
+    download button's worker thread; at most DOCX_CACHE_SIZE documents are kept.
+    """
+    key = (schema, report_hash(analysis))
+    with _docx_cache_lock:
+        if key in _docx_cache:
+            _docx_cache.move_to_end(key)
+            return _docx_cache[key]
+
+    data = build_docx_bytes(analysis, schema)
+
+    with _docx_cache_lock:
+        _docx_cache[key] = data
+        _docx_cache.move_to_end(key)
+        while len(_docx_cache) > DOCX_CACHE_SIZE:
+            _docx_cache.popitem(last=False)
+    return data
+
+
+def export_many(analyses, max_workers=None, chunksize=4):
+    """
+    Builds Word documents for many analyses in a process pool.
+    Yields the .docx bytes in the same order as `analyses`.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(build_docx_bytes, analyses, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert analysis JSON files to Word reports.")
+    parser.add_argument("reports", nargs="+", help="Analysis JSON files")
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory for the .docx files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    def read_reports():
+        for path in args.reports:
+            with open(path, encoding="utf-8") as f:
+                yield json.load(f)
+
+    for path, data in zip(args.reports, export_many(read_reports(), max_workers=args.jobs)):
+        base_filename = os.path.splitext(os.path.basename(path))[0]
+        out_path = os.path.join(args.output_dir, f"{base_filename}_report.docx")
+        with open(out_path, "wb") as f:
+            f.write(data)
+        print(out_path)
+
+
+if __name__ == "__main__":
+    main()
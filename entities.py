@@ -0,0 +1,293 @@
+"""
+Canonical product and competitor names.
+
+Names reach the dashboards and the report store in many spellings
+("Naga Atta", "naga atta 1kg", "Shakti" for "Sakthi"). An EntityIndex maps
+them onto the catalog in data/entities.json, trying in order:
+
+1. an exact hash lookup of the normalized name (case, pack sizes and
+   filler words such as "naga" or "packet" removed),
+2. trigram candidates verified by a bounded edit distance (typos),
+3. an Aho-Corasick scan for catalog names inside longer text
+   ("Aachi: mentioned by the customer ...").
+
+Results are memoized, so repeated names cost a dict lookup.
+"""
+import json
+import os
+import re
+from collections import Counter, deque
+
+from report_store import API_SCHEMA, APP_SCHEMA
+
+DEFAULT_CATALOG_PATH = os.getenv("NAGA_ENTITY_CATALOG", os.path.join("data", "entities.json"))
+KINDS = ("products", "competitors")
+
+_PARENTHESES = re.compile(r"\([^)]*\)")
+_PACK_SIZE = re.compile(r"\b\d+(?:\.\d+)?\s*(?:kg|kgs|g|gm|gms|gram|grams|ml|l|ltr|litre|litres)\b")
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+_MEMO_SIZE = 50_000
+
+# Report sections each kind of entity is read from, per report schema (see
+# report_store): coaching text such as strengths or the call summary names
+# products and brands in passing and would inflate the counts.
+# API section titles are matched without their "N. " numbering.
+ENTITY_SECTIONS = {
+    APP_SCHEMA: {
+        "products": ("brand_product_mapping", "sales_matrix", "customer_buying_patterns",
+                     "competitive_intelligence_and_customer_psychology", "product_price_analysis"),
+        "competitors": ("brand_product_mapping", "sales_matrix",
+                        "competitive_intelligence_and_customer_psychology"),
+    },
+    API_SCHEMA: {
+        "products": ("brand & product mapping", "sales matrix", "customer buying patterns",
+                     "competitive intelligence & customer psychology", "product price analysis"),
+        "competitors": ("brand & product mapping", "sales matrix",
+                        "competitive intelligence & customer psychology"),
+    },
+}
+_SECTION_NUMBER = re.compile(r"^\s*\d+\.\s*")
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        best = i
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            best = min(best, current[j])
+        if best > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _fuzzy_limit(text):
+    """Edits allowed for a name of this length; short names (MTR) must match exactly."""
+    if len(text) <= 4:
+        return 0
+    if len(text) <= 8:
+        return 1
+    return 2
+
+
+class _PatternScanner:
+    """Aho-Corasick automaton over normalized names, matching whole words only."""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for pattern, value in patterns.items():
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] = self._out[state] + ((len(pattern), value),)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state:
+                    fail = self._fail[state]
+                    while fail and char not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text):
+        """Leftmost-longest, non-overlapping whole-word matches: [(start, end, value)]."""
+        found = []
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in out[state]:
+                start = end - length
+                if (start == 0 or text[start - 1] == " ") and (end == len(text) or text[end] == " "):
+                    found.append((start, end, value))
+
+        found.sort(key=lambda match: (match[0], -(match[1] - match[0])))
+        result, last_end = [], -1
+        for start, end, value in found:
+            if start >= last_end:
+                result.append((start, end, value))
+                last_end = end
+        return result
+
+
+class EntityIndex:
+    """Precompiled matcher for one kind of entity (products or competitors)."""
+
+    def __init__(self, entities, ignore_words=()):
+        self._ignore = frozenset(ignore_words)
+        self.names = []
+        self._exact = {}
+        # Text scans keep filler words, so "Local Brand" is not found as any "local"
+        patterns = {}
+        for entity in entities:
+            canonical = entity["name"]
+            self.names.append(canonical)
+            for alias in [canonical] + list(entity.get("aliases", [])):
+                key = self.normalize(alias)
+                if key:
+                    self._exact.setdefault(key, canonical)
+                    patterns.setdefault(self.normalize(alias, keep_filler=True), canonical)
+
+        self._keys = list(self._exact)
+        # Trigram postings bucketed by key length: a typo changes the length by
+        # at most the edit limit, so lookups only visit nearby buckets
+        self._postings = {}
+        for index, key in enumerate(self._keys):
+            for gram in _trigrams(key):
+                self._postings.setdefault((len(key), gram), []).append(index)
+        self._scanner = _PatternScanner(patterns)
+        self._memo = {}
+
+    def normalize(self, name, keep_filler=False):
+        """Lowercase words without pack sizes, brackets, punctuation or (unless kept) filler words."""
+        text = _PARENTHESES.sub(" ", str(name).casefold())
+        text = _PACK_SIZE.sub(" ", text)
+        words = _NON_WORD.sub(" ", text).split()
+        if not keep_filler:
+            words = [word for word in words if word not in self._ignore]
+        return " ".join(words)
+
+    def _fuzzy(self, key):
+        limit = _fuzzy_limit(key)
+        if not limit:
+            return None
+        shared = Counter()
+        grams = _trigrams(key)
+        for length in range(len(key) - limit, len(key) + limit + 1):
+            for gram in grams:
+                shared.update(self._postings.get((length, gram), ()))
+        best, best_distance = None, limit + 1
+        for index, _ in shared.most_common(8):
+            candidate = self._keys[index]
+            distance = edit_distance(key, candidate, min(limit, _fuzzy_limit(candidate)))
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return self._exact[best] if best is not None else None
+
+    def resolve(self, name):
+        """Canonical name for `name`, or None when nothing in the catalog matches."""
+        cached = self._memo.get(name, self)
+        if cached is not self:
+            return cached
+
+        key = self.normalize(name)
+        result = None
+        if key:
+            result = self._exact.get(key) or self._fuzzy(key)
+            if result is None:
+                matches = self._scanner.scan(self.normalize(name, keep_filler=True))
+                if matches:
+                    # The longest catalog name mentioned wins ("Rava Idli Mix" over "Rava")
+                    result = max(matches, key=lambda match: match[1] - match[0])[2]
+
+        if len(self._memo) >= _MEMO_SIZE:
+            self._memo.clear()
+        self._memo[name] = result
+        return result
+
+    def canonical(self, name):
+        """Like resolve, but unknown names come back stripped instead of None."""
+        if name is None:
+            return None
+        return self.resolve(name) or str(name).strip()
+
+    def find_all(self, text):
+        """Every catalog entity mentioned in free text, in order of appearance, without repeats."""
+        seen = {}
+        for _, _, value in self._scanner.scan(self.normalize(text, keep_filler=True)):
+            seen.setdefault(value, None)
+        return list(seen)
+
+
+class EntityCatalog:
+    def __init__(self, data):
+        ignore = data.get("ignore_words", ())
+        self.indexes = {kind: EntityIndex(data.get(kind, []), ignore) for kind in KINDS}
+
+    def __getitem__(self, kind):
+        return self.indexes[kind]
+
+
+_catalogs = {}
+
+
+def load_catalog(path=DEFAULT_CATALOG_PATH):
+    """The catalog at `path`, compiled once per process. A missing file gives an empty catalog."""
+    catalog = _catalogs.get(path)
+    if catalog is None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        catalog = _catalogs[path] = EntityCatalog(data)
+    return catalog
+
+
+def canonical_product(name):
+    return load_catalog()["products"].canonical(name)
+
+
+def canonical_competitor(name):
+    return load_catalog()["competitors"].canonical(name)
+
+
+def _text_values(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _text_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _text_values(item)
+
+
+def _entity_sections(analysis, schema):
+    """{section key: value} of the report body, keyed as in ENTITY_SECTIONS."""
+    if schema == API_SCHEMA:
+        report = analysis.get("report") or {}
+        return {_SECTION_NUMBER.sub("", title).casefold(): section for title, section in report.items()}
+    return analysis
+
+
+def annotate_entities(analysis: dict, catalog=None, schema=APP_SCHEMA) -> dict:
+    """
+    Adds analysis["entities"] = {"products": [...], "competitors": [...]}:
+    the canonical names of every catalog entity mentioned in the sections
+    ENTITY_SECTIONS lists for that kind, so stored reports can be aggregated
+    without re-reading their text. Returns the analysis.
+    """
+    catalog = catalog or load_catalog()
+    sections = _entity_sections(analysis, schema)
+    entities = {}
+    for kind in KINDS:
+        text = "\n".join(_text_values([sections.get(key) for key in ENTITY_SECTIONS[schema][kind]]))
+        entities[kind] = catalog[kind].find_all(text)
+    analysis["entities"] = entities
+    return analysis
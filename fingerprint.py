@@ -0,0 +1,245 @@
+"""
+Acoustic fingerprints for spotting the same call uploaded twice: the
+WhatsApp recordings in audio/ come back re-exported ("Edited 5-...mp3"),
+re-encoded from .mp4/.aac or trimmed, so their bytes never match.
+
+A fingerprint is one 32-bit hash per ~23 ms of audio (Haitsma & Kalker):
+each bit says whether the energy difference between two neighbouring
+frequency bands (300-2000 Hz) grew or shrank since the previous frame.
+Re-encoding flips a few bits; different audio disagrees on about half.
+
+AudioIndex keeps the fingerprints of analyzed calls. Every fourth hash is
+looked up exactly to propose (call, time offset) alignments, and the best
+alignments are verified by the bit error rate over the whole overlap.
+"""
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+
+SAMPLE_RATE = 5512
+FRAME = 2048
+HOP = 128
+BANDS = 33
+LOW_HZ, HIGH_HZ = 300, 2000
+# Only every INDEX_STEP-th hash of a stored call goes into the lookup table
+INDEX_STEP = 4
+# Hashes this common in the table (silence, hum) are not used as lookup keys
+MAX_POSTINGS = 200
+CANDIDATES = 5
+# A duplicate agrees on at least this share of bits over the overlap...
+MATCH_THRESHOLD = 0.7
+# ...and the overlap covers at least this share of the shorter recording
+MIN_COVERAGE = 0.5
+DECODE_TIMEOUT = 300
+
+_BAND_EDGES = np.geomspace(LOW_HZ, HIGH_HZ, BANDS + 1)
+_BIN_FREQUENCIES = np.fft.rfftfreq(FRAME, 1 / SAMPLE_RATE)
+# (bins, BANDS) matrix summing the power spectrum into bands
+_BAND_MATRIX = np.stack(
+    [(_BIN_FREQUENCIES >= lo) & (_BIN_FREQUENCIES < hi) for lo, hi in zip(_BAND_EDGES, _BAND_EDGES[1:])], axis=1
+).astype(np.float32)
+_WINDOW = np.hanning(FRAME).astype(np.float32)
+_BIT_VALUES = (1 << np.arange(BANDS - 1, dtype=np.uint64)).astype(np.uint64)
+
+
+class FingerprintError(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class Fingerprint:
+    hashes: np.ndarray  # uint32, one per HOP samples
+    duration: float  # seconds
+
+    def to_bytes(self) -> bytes:
+        return self.hashes.astype("<u4").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, duration: float):
+        return cls(np.frombuffer(data, dtype="<u4").astype(np.uint32), duration)
+
+
+@dataclass(slots=True)
+class Match:
+    report_id: int
+    similarity: float  # share of matching bits over the overlap
+    offset: float  # seconds into the stored call where the upload starts (negative: before it)
+    coverage: float  # share of the shorter recording that overlaps
+
+
+# ===== Decoding =====
+def _read_wav(source):
+    """`source`: a path or a binary file object."""
+    with wave.open(source) as wav:
+        if wav.getsampwidth() != 2:
+            raise FingerprintError("Only 16-bit WAV can be read without ffmpeg")
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2").astype(np.float32) / 32768
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE and len(samples):
+        positions = np.arange(0, len(samples) - 1, rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+def decode_audio_file(path) -> np.ndarray:
+    """
+    Mono float32 samples at SAMPLE_RATE. Uses ffmpeg for every format it
+    knows (mp3, mp4, aac, m4a, ogg, ...); without ffmpeg only 16-bit WAV
+    can be read.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        try:
+            return _read_wav(path)
+        except (wave.Error, EOFError):
+            raise FingerprintError("ffmpeg is needed to decode this audio format") from None
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-nostdin", "-v", "error", "-i", path, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"],
+            capture_output=True,
+            timeout=DECODE_TIMEOUT,
+        )
+    except subprocess.TimeoutExpired:
+        raise FingerprintError("Decoding took too long") from None
+    if result.returncode != 0:
+        raise FingerprintError(result.stderr.decode("utf-8", "replace").strip() or "ffmpeg could not decode the audio")
+    return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768
+
+
+def decode_audio(data: bytes) -> np.ndarray:
+    """decode_audio_file for audio held in memory."""
+    if shutil.which("ffmpeg") is None:
+        try:
+            return _read_wav(io.BytesIO(data))
+        except (wave.Error, EOFError):
+            raise FingerprintError("ffmpeg is needed to decode this audio format") from None
+
+    # A file rather than a pipe, so ffmpeg can seek (mp4 keeps its index at the end)
+    with tempfile.NamedTemporaryFile(suffix=".audio", delete=False) as f:
+        f.write(data)
+    try:
+        return decode_audio_file(f.name)
+    finally:
+        os.unlink(f.name)
+
+
+# ===== Fingerprints =====
+def fingerprint_samples(samples: np.ndarray) -> Fingerprint:
+    duration = len(samples) / SAMPLE_RATE
+    if len(samples) < FRAME + 2 * HOP:
+        return Fingerprint(np.zeros(0, dtype=np.uint32), duration)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME)[::HOP]
+    energy = (np.abs(np.fft.rfft(frames * _WINDOW, axis=1)) ** 2).astype(np.float32) @ _BAND_MATRIX
+    band_difference = energy[:, :-1] - energy[:, 1:]
+    bits = (band_difference[1:] - band_difference[:-1]) > 0
+    hashes = (bits.astype(np.uint64) @ _BIT_VALUES).astype(np.uint32)
+    return Fingerprint(hashes, duration)
+
+
+def fingerprint_audio(data: bytes) -> Fingerprint:
+    """Fingerprint of an encoded recording. Raises FingerprintError if it cannot be decoded."""
+    return fingerprint_samples(decode_audio(data))
+
+
+def fingerprint_file(path) -> Fingerprint:
+    """fingerprint_audio for a recording on disk, which ffmpeg then reads in place."""
+    return fingerprint_samples(decode_audio_file(path))
+
+
+def _bit_errors(a, b):
+    return int(np.unpackbits((a ^ b).view(np.uint8)).sum())
+
+
+def compare(stored: np.ndarray, query: np.ndarray, shift: int):
+    """(similarity, overlap in hashes) with query[i] aligned to stored[i + shift]."""
+    start = max(0, -shift)
+    end = min(len(query), len(stored) - shift)
+    if end <= start:
+        return 0.0, 0
+    overlap = end - start
+    errors = _bit_errors(stored[start + shift:end + shift], query[start:end])
+    return 1 - errors / (overlap * (BANDS - 1)), overlap
+
+
+# ===== Index =====
+class AudioIndex:
+    """In-memory lookup over the fingerprints kept in a ReportStore."""
+
+    def __init__(self):
+        self._calls = {}
+        self._pending = []
+        self._keys = np.zeros(0, dtype=np.uint32)
+        self._postings = np.zeros((0, 2), dtype=np.int64)
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._calls)
+
+    def add(self, report_id, fingerprint: Fingerprint) -> None:
+        with self._lock:
+            self.last_id = max(self.last_id, report_id)
+            if report_id in self._calls or not len(fingerprint.hashes):
+                return
+            self._calls[report_id] = fingerprint
+            offsets = np.arange(0, len(fingerprint.hashes), INDEX_STEP)
+            self._pending.append((fingerprint.hashes[offsets], np.full(len(offsets), report_id), offsets))
+
+    def sync(self, store) -> int:
+        """Adds the fingerprints stored since the last sync. Returns how many."""
+        added = 0
+        for report_id, data, duration in store.fingerprints(after=self.last_id):
+            self.add(report_id, Fingerprint.from_bytes(data, duration))
+            added += 1
+        return added
+
+    def _merge_pending(self):
+        # New calls are sorted into the lookup table lazily, at the next match
+        keys = [self._keys] + [keys for keys, _, _ in self._pending]
+        postings = [self._postings] + [np.column_stack([ids, offsets]) for _, ids, offsets in self._pending]
+        keys, postings = np.concatenate(keys), np.concatenate(postings)
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._postings = keys[order], postings[order]
+        self._pending = []
+
+    def match(self, fingerprint: Fingerprint, threshold=MATCH_THRESHOLD):
+        """The best stored call this recording duplicates, as a Match, or None."""
+        query = fingerprint.hashes
+        if not len(query):
+            return None
+        with self._lock:
+            if self._pending:
+                self._merge_pending()
+            if not len(self._keys):
+                return None
+
+            lo = np.searchsorted(self._keys, query, side="left")
+            hi = np.searchsorted(self._keys, query, side="right")
+            counts = hi - lo
+            usable = (counts > 0) & (counts <= MAX_POSTINGS) & (query != 0)
+            if not usable.any():
+                return None
+            lo, counts, query_offsets = lo[usable], counts[usable], np.flatnonzero(usable)
+            # Expand every [lo, hi) range into the posting rows it covers
+            rows = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            hits = self._postings[rows]
+            shifts = hits[:, 1] - np.repeat(query_offsets, counts)
+            pairs, votes = np.unique(np.column_stack([hits[:, 0], shifts]), axis=0, return_counts=True)
+
+            best = None
+            for index in np.argsort(votes)[::-1][:CANDIDATES]:
+                report_id, shift = int(pairs[index][0]), int(pairs[index][1])
+                stored = self._calls[report_id].hashes
+                similarity, overlap = compare(stored, query, shift)
+                coverage = overlap / min(len(stored), len(query))
+                if similarity >= threshold and coverage >= MIN_COVERAGE and (best is None or similarity > best.similarity):
+                    best = Match(report_id, round(similarity, 4), round(shift * HOP / SAMPLE_RATE, 2), round(coverage, 4))
+        return best
@@ -0,0 +1,90 @@
+"""
+One requests.Session per process for outbound HTTP (audio downloads), so
+repeated downloads from the same host reuse keep-alive connections instead
+of a new TCP + TLS handshake per request. connection_stats() counts the
+requests sent and the sockets actually opened per host.
+"""
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Hosts with a pool kept open, and connections kept per host. Per host it
+# matches the default worker thread limit of the API (anyio's 40), so
+# concurrent downloads from one host never wait for a connection.
+POOL_HOSTS = 16
+POOL_PER_HOST = 40
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_session = None
+_lock = threading.Lock()
+_requests = Counter()
+_connects = Counter()
+
+
+def _count(counter, host):
+    with _lock:
+        counter[host] += 1
+
+
+# ===== Counting Pools =====
+# urllib3 reconnects a dropped keep-alive connection in place, so the pools'
+# own num_connections undercounts; these count every socket opened.
+class _CountingHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        _count(_connects, f"{self.host}:{self.port}")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        _count(_connects, f"{self.host}:{self.port}")
+        return super()._new_conn()
+
+
+class _CountingHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _CountingHTTPPool, "https": _CountingHTTPSPool}
+
+    def send(self, request, *args, **kwargs):
+        url = urlsplit(request.url)
+        _count(_requests, f"{url.hostname}:{url.port or DEFAULT_PORTS.get(url.scheme)}")
+        return super().send(request, *args, **kwargs)
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = _CountingAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def connection_stats() -> dict:
+    """Requests sent and connections opened since the process started, in total and per host."""
+    with _lock:
+        hosts = {
+            host: {"requests": _requests[host], "connections_opened": _connects[host]}
+            for host in sorted(set(_requests) | set(_connects))
+        }
+    sent = sum(host["requests"] for host in hosts.values())
+    opened = sum(host["connections_opened"] for host in hosts.values())
+    return {"requests": sent, "connections_opened": opened, "reused": max(sent - opened, 0), "hosts": hosts}
@@ -0,0 +1,92 @@
+"""
+Process-wide background pool for analyses started from the Streamlit app,
+so a user's script does not sit in a spinner for the whole model call.
+submit() returns a Job right away; pages poll it by id and pick up the
+result whenever the user comes back to it.
+
+Finished jobs are kept for JOB_TTL seconds so a user who navigated away
+still finds the outcome.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+DEFAULT_WORKERS = int(os.getenv("NAGA_ANALYSIS_WORKERS", "4"))
+JOB_TTL = 3600
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    label: str
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    result: object = None
+    error: str = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the job was submitted, or its total time once finished."""
+        return (self.finished_at or time.time()) - self.submitted_at
+
+
+class JobQueue:
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label="", **kwargs) -> Job:
+        """Runs fn(*args, **kwargs) on a worker; the Job holds its return value or error."""
+        job = Job(uuid.uuid4().hex, label)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            job.result = fn(*args, **kwargs)
+            status = DONE
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            status = FAILED
+        # Timestamp first: a job that reads as finished always has finished_at
+        job.finished_at = time.time()
+        job.status = status
+
+    def _prune(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id) if job_id is not None else None
+
+    def position(self, job: Job) -> int:
+        """Queued jobs submitted before this one (0 once it runs)."""
+        if job.status != QUEUED:
+            return 0
+        with self._lock:
+            return sum(1 for other in self._jobs.values() if other.status == QUEUED and other.submitted_at < job.submitted_at)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {"workers": self.workers, **{status: statuses.count(status) for status in (QUEUED, RUNNING, DONE, FAILED)}}
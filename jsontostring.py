@@ -1,240 +1,155 @@
-import pandas as pd
-
-def convert_sales_report_to_string(json_data: dict) -> str:
-    output = ""
-
-    # Brand & Product Mapping
-    output += "# Brand & Product Mapping\n\n"
-    
-    brand_mapping = json_data.get("brand_product_mapping", {})
-    naga_products = brand_mapping.get("naga_brand_products", {})
-    
-    if naga_products.get("products_list"):
-        output += "A. Naga Brand Products\n\n"
-        for product in naga_products.get("products_list", []):
-            output += f"- {product}\n"
-
-    else:
-        output += "No Naga products mentioned.\n\n------------------------------------------------------------\n\n"
-    
-    output += "\nB. Competitor Brands Mentioned\n\n"
-    competitor_list = json_data.get("competitive_intelligence_and_customer_psychology", {}).get('competitor_brand_analysis', [])
-    
-    if competitor_list:
-        df = pd.DataFrame(competitor_list)
-        # Ensure columns exist, filling missing ones with N/A
-        expected_cols = ['brand_name', 'product', 'reasons_for_preference', 'category']
-        for col in expected_cols:
-            if col not in df.columns:
-                df[col] = "N/A"
-                
-        cols_to_keep = ['brand_name', 'product', 'reasons_for_preference', 'category']
-        filtered_df = df[cols_to_keep]
-        filtered_df = filtered_df.rename(columns={
-            'brand_name': 'Competitor Brand Name',
-            'product': 'Products',
-            'reasons_for_preference': 'Preference Reasons',
-            'category': 'Category'
-        })
-        table_string = filtered_df.to_markdown(index=False)
-        output += table_string + "\n\n------------------------------------------------------------\n\n"
-    else:
-        output += "No competitor brands mentioned.\n\n------------------------------------------------------------\n\n"
-
-    # 1. Conversation Summary
-    output += "# 1. Conversation Summary\n\n"
-    conversation_summary = json_data.get("conversation_summary", {})
-    if conversation_summary.get('summary_points'):
-        for point in conversation_summary.get("summary_points", []):
-            output += f"- {point}\n"
-    else:
-        output += "No conversation summary available.\n"
-    output += "\n------------------------------------------------------------\n\n"
-
-    # 2. Sales Matrix
-    output += "# 2. Sales Matrix\n\n"
-    output += "**Naga Products Performance**\n\n"
-    
-    sales_matrix = json_data.get("sales_matrix", {})
-    naga_performance = sales_matrix.get("naga_products_performance", {})
-    if naga_performance:
-        output += f"- **Naga products promoted**: {naga_performance.get('naga_products_promoted', 'N/A')}\n\n"
-        output += f"- **Volume pushed / upselling**: {naga_performance.get('volume_pushed_upselling', 'N/A')}\n\n"
-        
-        schemes_offered = naga_performance.get("schemes_offered", {})
-        output += "- **Schemes offered**:\n\n"
-        if schemes_offered:
-            output += f"{schemes_offered.get('description', 'No description available')}\n\n"
-            for scheme in schemes_offered.get("scheme_details", []):
-                output += f"  - **{scheme.get('product', 'N/A')}**: {scheme.get('scheme', 'N/A')}\n"
-            output += "\n"
-        else:
-            output += "  No schemes offered.\n\n"
-
-        output += f"- **Cross-selling within Naga portfolio**: {naga_performance.get('cross_selling_within_naga_portfolio', 'N/A')}\n\n"
-        
-        acceptance_rejection = naga_performance.get("acceptance_rejection", {})
-        output += "- **Acceptance/Rejection**:\n\n"
-        output += "  - **Accepted**: "
-        accepted = acceptance_rejection.get("accepted", [])
-        output += ", ".join(accepted) if accepted else "No products accepted"
-        output += "\n\n  - **Rejected**: "
-        rejected = acceptance_rejection.get("rejected", [])
-        output += ", ".join(rejected) if rejected else "No products rejected"
-        output += "\n\n"
-    else:
-        output += "No Naga products performance data available.\n\n"
-    
-    sales_barriers = sales_matrix.get("sales_barriers", {})
-    if sales_barriers:
-        output += "**Sales Barriers**\n\n"
-        output += f"- **Objections raised**: {sales_barriers.get('objections_raised', 'No objections raised')}\n\n"
-        output += f"- **Competitor advantages cited**: {sales_barriers.get('competitor_advantages_cited', 'No competitor advantages cited')}\n\n"
-    else:
-        output += "No sales barriers data available.\n\n"
-    output += "------------------------------------------------------------\n\n"
-
-    # 3. Customer Buying Patterns
-    output += "# 3. Customer Buying Patterns\n\n"
-    buying_patterns = json_data.get("customer_buying_patterns", {})
-    if buying_patterns:
-        regular = buying_patterns.get("regularly_buying_products", {})
-        if regular.get('products'):
-            output += f"A. Regularly buying products ({regular.get('description', 'N/A')})\n\n"
-            regular_products = regular.get("products", [])
-            for product in regular_products:
-                output += f"- {product}\n"
-        else:
-            output += "No Regular buying products found\n"
-        output += "\n"
-        
-        scheme_based = buying_patterns.get("scheme_based_orders", {})
-        if scheme_based.get('products'):
-            output += f"B. Scheme Based Orders ({scheme_based.get('description', 'N/A')})\n\n"
-            scheme_products = scheme_based.get("products", [])
-            for product in scheme_products:
-                output += f"- {product}\n"
-        else:
-            output += "No Scheme Based Orders found\n"
-    else:
-        output += "No customer buying patterns data available.\n"
-    output += "\n------------------------------------------------------------\n\n"
-
-    # 4. Competitive Intelligence & Customer Psychology
-    output += "# 4. Competitive Intelligence & Customer Psychology\n\n"
-    competitive_intel = json_data.get("competitive_intelligence_and_customer_psychology", {})
-    if competitive_intel:
-        output += "A. Competitor Brand Analysis\n\n"
-        if competitive_intel.get("competitor_brand_analysis"):
-            for index, brand in enumerate(competitive_intel.get("competitor_brand_analysis", [])):
-                output += f"**Brand {index + 1}:**\n\n"
-                output += f"- **Brand Name**: {brand.get('brand_name', 'N/A')}\n"
-                output += f"- **Products**: {brand.get('product', 'N/A')}\n"
-                output += f"- **Customer's Current Status**: {brand.get('customer_current_status', 'N/A')}\n"
-                output += f"- **Reasons for Preference**: {brand.get('reasons_for_preference', 'N/A')}\n"
-                output += f"- **Category**: {brand.get('category', 'N/A')}\n\n"
-        else:
-            output += "No competitor brand analysis data available.\n\n"
-
-        online_retailers = competitive_intel.get("online_retailers_mentioned", [])
-        if online_retailers:
-            output += "B. Online Retailers Mentioned\n\n"
-            for index, retailer in enumerate(online_retailers):
-                output += f"**Retailer {index + 1}:**\n\n"
-                output += f"- **Name**: {retailer.get('name', 'N/A')}\n"
-                output += f"- **Product Range**: {retailer.get('product_range', 'N/A')}\n"
-                output += f"- **Pricing Strategy**: {retailer.get('pricing_strategy', 'N/A')}\n"
-                output += f"- **Customer Perception**: {retailer.get('customer_perception', 'N/A')}\n"
-                output += f"- **Unique Selling Points**: {retailer.get('unique_selling_points', 'N/A')}\n\n"
-
-        customer_psychology = competitive_intel.get("customer_buying_psychology", {})
-        if customer_psychology:
-            output += "C. Customer Buying Psychology\n\n"
-            output += "- **What truly drives purchase decisions**:\n\n"
-            if customer_psychology.get("purchase_decision_drivers_ranked"):
-                for index, driver in enumerate(customer_psychology.get("purchase_decision_drivers_ranked", [])):
-                    output += f"  {index + 1}. {driver}\n"
-            else:
-                output += "  No purchase decision drivers data available.\n"
-            output += "\n"
-            output += f"- **Customer's risk tolerance**: {customer_psychology.get('risk_tolerance', 'N/A')}\n\n"
-            output += f"- **Stock rotation preferences**: {customer_psychology.get('stock_rotation_preferences', 'N/A')}\n\n"
-            output += f"- **Openness to switching brands**: {customer_psychology.get('openness_to_switching', 'N/A')}\n\n"
-            output += f"- **How is the customer buying behaviour**: {customer_psychology.get('buying_behaviour', 'N/A')}\n\n"
-        else:
-            output += "No customer buying psychology data available.\n\n"
-    else:
-        output += "No competitive intelligence or customer psychology data available.\n\n"
-    output += "------------------------------------------------------------\n\n"
-
-    # 5. Salesperson Effectiveness Score
-    output += "# 5. Salesperson Effectiveness Score\n\n"
-    effectiveness = json_data.get("salesperson_effectiveness_score", {})
-    scores = effectiveness.get("scores", {})
-    if scores:
-        product_promo = scores.get("product_promotion", {})
-        output += f"**Product promotion ({product_promo.get('weight_percentage', 'N/A')}% weight):** {product_promo.get('score', 'N/A')}/10\n"
-        output += f"- {product_promo.get('justification', 'N/A')}\n\n"
-        
-        scheme_lev = scores.get("scheme_leverage", {})
-        output += f"**Scheme leverage ({scheme_lev.get('weight_percentage', 'N/A')}% weight):** {scheme_lev.get('score', 'N/A')}/10\n"
-        output += f"- {scheme_lev.get('justification', 'N/A')}\n\n"
-        
-        competitor_handling = scores.get("competitor_handling", {})
-        output += f"**Competitor handling ({competitor_handling.get('weight_percentage', 'N/A')}% weight):** {competitor_handling.get('score', 'N/A')}/10"
-        if competitor_handling.get("is_na"):
-            output += " (N/A)"
-        output += "\n"
-        output += f"- {competitor_handling.get('justification', 'N/A')}\n\n"
-        
-        cust_psych = scores.get("customer_psychology_understanding", {})
-        output += f"**Customer psychology understanding ({cust_psych.get('weight_percentage', 'N/A')}% weight):** {cust_psych.get('score', 'N/A')}/10\n"
-        output += f"- {cust_psych.get('justification', 'N/A')}\n\n"
-    else:
-        output += "No salesperson effectiveness scores available.\n\n"
-    
-    final_calc = effectiveness.get("final_score_calculation", {})
-    if final_calc:
-        output += "**Final Score Calculation:**\n\n"
-        output += f"{final_calc.get('formula', 'N/A')} = {final_calc.get('final_score', 'N/A')} / 10\n\n"
-    else:
-        output += "No final score calculation available.\n\n"
-    output += "------------------------------------------------------------\n\n"
-
-    # 6. Salesperson Ability Analysis
-    output += "# 6. Salesperson Ability Analysis\n\n"
-    output += f"- {json_data.get('salesperson_ability_analysis', 'N/A')}\n\n"
-    output += "------------------------------------------------------------\n\n"
-
-    # 7. Product Price Analysis
-    output += "# 7. Product Price Analysis\n\n"
-    price_analysis = json_data.get("product_price_analysis", {})
-    if price_analysis:
-        output += f"- {price_analysis.get('summary', 'N/A')}\n\n"
-        for product in price_analysis.get("high_price_products", []):
-            output += f"  - **{product.get('product', 'N/A')}**\n"
-            output += f"    - Price Point: {product.get('price_point', 'N/A')}\n"
-            output += f"    - Customer's Exact Concerns: {product.get('customer_exact_concerns', 'N/A')}\n\n"
-    else:
-        output += "No product price analysis data available.\n\n"
-    output += "------------------------------------------------------------\n\n"
-
-    # 8. Salesperson Strengths
-    output += "# 8. Salesperson Strengths\n\n"
-    if json_data.get("salesperson_strengths"):
-        for strength in json_data.get("salesperson_strengths", []):
-            output += f"- {strength}\n"
-    else:
-        output += "No salesperson strengths found.\n"
-    output += "\n------------------------------------------------------------\n\n"
-
-    # 9. Areas for Improvement
-    output += "# 9. Areas for Improvement\n\n"
-    if json_data.get("areas_for_improvement"):
-        for area in json_data.get("areas_for_improvement", []):
-            output += f"- {area}\n"
-    else:
-        output += "No areas for improvement found.\n"
-    output += "\n------------------------------------------------------------\n"
-
-    return output
\ No newline at end of file
+import re
+
+from report_ir import Blank, Heading, Paragraph, Rule, Table, build_report, competitor_table, iter_report_sections
+from report_store import APP_SCHEMA
+
+try:
+    # tabulate measures cells with wcwidth when it is installed; match it
+    from wcwidth import wcswidth as _text_width
+except ImportError:
+    _text_width = len
+
+_NUMERIC_WITH_SEPARATORS = re.compile(r"^[+-]?[0-9,]*\.?[0-9]*$")
+
+RULE = "------------------------------------------------------------"
+
+
+# ===== Competitor Table =====
+def _is_number_like(value):
+    """Cells tabulate would type as numbers or booleans (erring on the side of True)."""
+    if value in ("True", "False") or _NUMERIC_WITH_SEPARATORS.match(value):
+        return True
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _plain_table_cells(table):
+    """
+    Returns the table as rows of stripped strings when every cell is plain
+    single-line text, i.e. when pandas/tabulate would lay it out as
+    left-aligned text columns. Returns None for anything else.
+    """
+    rows = [[] for _ in table.rows]
+    for i in range(len(table.headers)):
+        has_text = False
+        for row, cells in zip(rows, table.rows):
+            value = cells[i]
+            if value is None or (isinstance(value, float) and value != value):
+                # pandas turns missing cells into NaN, which tabulate prints as 'nan'
+                row.append("nan")
+                continue
+            if not isinstance(value, str) or not value.isprintable() or "\x1b" in value:
+                return None
+            value = value.strip()
+            if value and not _is_number_like(value):
+                has_text = True
+            row.append(value)
+
+        # Columns without any text would be typed as numbers and right-aligned
+        if not has_text:
+            return None
+    return rows
+
+
+def _format_pipe_table(headers, rows):
+    """Left-aligned markdown pipe table, laid out like DataFrame.to_markdown(index=False)."""
+    # tabulate pads headers by two characters before measuring the cells
+    widths = [_text_width(header) + 2 for header in headers]
+    cell_widths = [[_text_width(cell) for cell in row] for row in rows]
+    for row_widths in cell_widths:
+        for i, width in enumerate(row_widths):
+            if width > widths[i]:
+                widths[i] = width
+
+    lines = [
+        "| " + " | ".join(header + " " * (width - _text_width(header)) for header, width in zip(headers, widths)) + " |",
+        "|" + "|".join(":" + "-" * (width + 1) for width in widths) + "|",
+    ]
+    for row, row_widths in zip(rows, cell_widths):
+        lines.append(
+            "| " + " | ".join(cell + " " * (width - cell_width) for cell, cell_width, width in zip(row, row_widths, widths)) + " |"
+        )
+    return "\n".join(lines)
+
+
+def _format_table_with_pandas(table):
+    import pandas as pd
+
+    # Build from records like DataFrame(competitor_list) so columns are typed the same way
+    df = pd.DataFrame([dict(zip(table.headers, cells)) for cells in table.rows], columns=list(table.headers))
+    return df.to_markdown(index=False)
+
+
+def format_table(table):
+    """
+    Markdown pipe table for a Table block. Plain text cells go through the
+    lightweight formatter; numbers, multi-line or non-text cells fall back to
+    pandas' to_markdown so the output is identical either way.
+    """
+    rows = _plain_table_cells(table)
+    if rows is None:
+        return _format_table_with_pandas(table)
+    return _format_pipe_table(table.headers, rows)
+
+
+def format_competitor_table(competitor_list):
+    """Markdown table of the competitor brands."""
+    return format_table(competitor_table(competitor_list))
+
+
+# ===== Markdown Backend =====
+def _paragraph_markdown(block):
+    text = "".join(f"**{span.text}**" if span.bold else span.text for span in block.spans)
+    if block.marker:
+        text = f"{block.marker} {text}"
+    if block.indent:
+        text = " " * block.indent + text
+    return text
+
+
+def _write_blocks(blocks, w):
+    for block in blocks:
+        kind = type(block)
+        if kind is Paragraph:
+            w(_paragraph_markdown(block))
+            w("\n")
+        elif kind is Blank:
+            w("\n")
+        elif kind is Heading:
+            w(f"{'#' * block.level} {block.text}\n")
+        elif kind is Rule:
+            w(f"{RULE}\n")
+        elif kind is Table:
+            w(format_table(block))
+            w("\n")
+
+
+def render_markdown(report) -> str:
+    """Renders a report IR to the markdown shown in the app."""
+    parts = []
+    w = parts.append
+    for section in report.sections:
+        _write_blocks(section.blocks, w)
+    return "".join(parts)
+
+
+# ===== Public API =====
+def iter_sales_report_sections(json_data: dict, schema=APP_SCHEMA):
+    """Yields the rendered report one section at a time, for streaming output."""
+    for section in iter_report_sections(json_data, schema):
+        parts = []
+        _write_blocks(section.blocks, parts.append)
+        yield "".join(parts)
+
+
+def write_sales_report(json_data: dict, fp, schema=APP_SCHEMA) -> None:
+    """Writes the rendered report to a text file object section by section."""
+    for section in iter_sales_report_sections(json_data, schema):
+        fp.write(section)
+
+
+def convert_sales_report_to_string(json_data: dict, schema=APP_SCHEMA) -> str:
+    return render_markdown(build_report(json_data, schema))
@@ -0,0 +1,422 @@
+"""
+Model clients for the audio analysis calls, so the app and the API can run
+without a Gemini key or network. The mode comes from NAGA_MODEL_MODE:
+
+- live (default): Gemini, needs GOOGLE_API_KEY.
+- record: live, and each response (text, streamed chunks, token usage,
+  latency) is saved to NAGA_RECORDINGS_DIR under a fingerprint of the request.
+- replay: serves those recordings, no network. NAGA_REPLAY_LATENCY is
+  "recorded" to sleep as long as the original call took, a number of
+  seconds, or unset for no delay. A request that was never recorded raises
+  RecordingNotFound.
+- synthetic: random reports in the requested shape (JSON for the app,
+  the markdown template for the API), seeded by the request fingerprint so
+  the same audio always gets the same report. NAGA_SYNTHETIC_LATENCY
+  (mean seconds per call), NAGA_SYNTHETIC_JITTER (log-normal sigma) and
+  NAGA_SYNTHETIC_ERROR_RATE make it behave like a slow, flaky model.
+
+NAGA_MODEL_RPM caps the calls per minute to each model, in any mode. The
+limit is shared by every caller in the process (API routes, app sessions,
+batch analyses), so a burst waits for a free slot instead of hitting the
+provider's quota errors.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+MODES = ("live", "record", "replay", "synthetic")
+DEFAULT_RECORDINGS_DIR = os.path.join("data", "recordings")
+# Replayed and synthetic streams are cut into chunks of about this many characters
+STREAM_CHUNK_CHARS = 200
+
+
+class RecordingNotFound(KeyError):
+    pass
+
+
+@dataclass(slots=True)
+class ModelResponse:
+    text: str
+    usage: dict = field(default_factory=dict)
+    latency: float = 0.0
+
+
+def request_fingerprint(model_name, prompt, audio, mime_type, json_mode=False) -> str:
+    """Stable id of one model request: model, prompt, audio bytes, MIME type and output mode."""
+    digest = hashlib.sha256()
+    for part in (model_name, prompt, mime_type, "json" if json_mode else "text"):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(hashlib.sha256(audio).digest())
+    return digest.hexdigest()
+
+
+def _usage(response):
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(metadata, "prompt_token_count", None),
+        "output_tokens": getattr(metadata, "candidates_token_count", None),
+        "total_tokens": getattr(metadata, "total_token_count", None),
+    }
+
+
+class ModelClient:
+    """generate() returns the whole response; stream() yields text chunks as they arrive."""
+
+    name = "model"
+
+    def generate(self, prompt, audio, mime_type="audio/mp3", json_mode=False) -> ModelResponse:
+        """`audio`: the encoded recording as bytes or any buffer (memoryview, mmap)."""
+        raise NotImplementedError
+
+    def stream(self, prompt, audio, mime_type="audio/mp3", json_mode=False):
+        yield self.generate(prompt, audio, mime_type, json_mode).text
+
+    def warm_up(self) -> None:
+        """Does the one-off setup (SDK import, auth) now rather than in the first call."""
+
+    def stats(self) -> dict:
+        """Counters about connection and model reuse, where the client keeps any."""
+        return {}
+
+
+# ===== Live =====
+class GeminiClient(ModelClient):
+    """
+    One configured GenerativeModel per generation config, built on first use
+    and shared by every later call. All of them go through the SDK's single
+    generative service client, so calls reuse its gRPC channel.
+    """
+
+    def __init__(self, model_name):
+        self.name = model_name
+        # Streams run concurrently on job threads; each thread sees its own call's usage
+        self._local = threading.local()
+        self._genai = None
+        self._models = {}
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def last_usage(self):
+        """Token counts of the last stream() finished on the calling thread."""
+        return getattr(self._local, "usage", {})
+
+    def warm_up(self) -> None:
+        # The SDK takes most of a second to import, so it is loaded on first use
+        with self._lock:
+            if self._genai is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                self._genai = genai
+
+    def _model(self, json_mode):
+        if self._genai is None:
+            self.warm_up()
+        with self._lock:
+            self._calls += 1
+            model = self._models.get(json_mode)
+            if model is None:
+                # JSON mode makes the model return a bare JSON document
+                config = {"response_mime_type": "application/json"} if json_mode else None
+                model = self._models[json_mode] = self._genai.GenerativeModel(self.name, generation_config=config)
+        return model
+
+    def stats(self) -> dict:
+        return {"calls": self._calls, "models_built": len(self._models), "models_reused": self._calls - len(self._models)}
+
+    def generate(self, prompt, audio, mime_type="audio/mp3", json_mode=False) -> ModelResponse:
+        start = time.perf_counter()
+        # The SDK's protobuf needs bytes; a memoryview of a spooled upload is copied only here
+        response = self._model(json_mode).generate_content([prompt, {"mime_type": mime_type, "data": bytes(audio)}])
+        return ModelResponse(response.text, _usage(response), time.perf_counter() - start)
+
+    def stream(self, prompt, audio, mime_type="audio/mp3", json_mode=False):
+        response = self._model(json_mode).generate_content([prompt, {"mime_type": mime_type, "data": bytes(audio)}], stream=True)
+        for chunk in response:
+            yield chunk.text
+        # Token counts arrive with the last chunk
+        self._local.usage = _usage(response)
+
+
+# ===== Record / Replay =====
+class RecordingClient(ModelClient):
+    """Passes calls through to `inner` and saves every response under its request fingerprint."""
+
+    def __init__(self, inner, directory=DEFAULT_RECORDINGS_DIR):
+        self.inner = inner
+        self.name = inner.name
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def warm_up(self) -> None:
+        self.inner.warm_up()
+
+    def stats(self) -> dict:
+        return self.inner.stats()
+
+    def _save(self, fingerprint, mime_type, audio, json_mode, response, chunks=None):
+        recording = {
+            "request": {
+                "model": self.name,
+                "mime_type": mime_type,
+                "audio_bytes": len(audio),
+                "json_mode": json_mode,
+            },
+            "text": response.text,
+            "chunks": chunks,
+            "usage": response.usage,
+            "latency": round(response.latency, 3),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        path = os.path.join(self.directory, f"{fingerprint}.json")
+        # Write then rename, so a concurrent replay never reads half a file
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(recording, f, ensure_ascii=False, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def generate(self, prompt, audio, mime_type="audio/mp3", json_mode=False) -> ModelResponse:
+        response = self.inner.generate(prompt, audio, mime_type, json_mode)
+        fingerprint = request_fingerprint(self.name, prompt, audio, mime_type, json_mode)
+        self._save(fingerprint, mime_type, audio, json_mode, response)
+        return response
+
+    def stream(self, prompt, audio, mime_type="audio/mp3", json_mode=False):
+        start = time.perf_counter()
+        chunks = []
+        for text in self.inner.stream(prompt, audio, mime_type, json_mode):
+            chunks.append({"text": text, "at": round(time.perf_counter() - start, 3)})
+            yield text
+        response = ModelResponse(
+            "".join(chunk["text"] for chunk in chunks),
+            getattr(self.inner, "last_usage", {}),
+            time.perf_counter() - start,
+        )
+        fingerprint = request_fingerprint(self.name, prompt, audio, mime_type, json_mode)
+        self._save(fingerprint, mime_type, audio, json_mode, response, chunks)
+
+
+class ReplayClient(ModelClient):
+    def __init__(self, model_name, directory=DEFAULT_RECORDINGS_DIR, latency=None):
+        """`latency`: None for no delay, "recorded" for the original timing, or seconds per call."""
+        self.name = model_name
+        self.directory = directory
+        self.latency = latency
+
+    def _load(self, prompt, audio, mime_type, json_mode):
+        fingerprint = request_fingerprint(self.name, prompt, audio, mime_type, json_mode)
+        try:
+            with open(os.path.join(self.directory, f"{fingerprint}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise RecordingNotFound(
+                f"No recording of this request ({fingerprint[:12]}) in {self.directory}; run it once with NAGA_MODEL_MODE=record"
+            ) from None
+
+    def _delay(self, recording):
+        if self.latency == "recorded":
+            return recording["latency"]
+        return float(self.latency or 0)
+
+    def generate(self, prompt, audio, mime_type="audio/mp3", json_mode=False) -> ModelResponse:
+        recording = self._load(prompt, audio, mime_type, json_mode)
+        delay = self._delay(recording)
+        if delay:
+            time.sleep(delay)
+        return ModelResponse(recording["text"], recording.get("usage") or {}, delay)
+
+    def stream(self, prompt, audio, mime_type="audio/mp3", json_mode=False):
+        recording = self._load(prompt, audio, mime_type, json_mode)
+        chunks = recording.get("chunks")
+        if not chunks:
+            # Recorded with generate(): stream the text in even pieces over the same time
+            text = recording["text"]
+            pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+            total = recording["latency"]
+            chunks = [{"text": piece, "at": total * (i + 1) / len(pieces)} for i, piece in enumerate(pieces)]
+
+        # Chunks keep their recorded spacing, stretched to the replay delay
+        delay = self._delay(recording)
+        total = chunks[-1]["at"]
+        start = time.perf_counter()
+        for i, chunk in enumerate(chunks):
+            share = chunk["at"] / total if total else (i + 1) / len(chunks)
+            wait = share * delay - (time.perf_counter() - start)
+            if wait > 0:
+                time.sleep(wait)
+            yield chunk["text"]
+
+
+# ===== Synthetic =====
+class SyntheticModelError(RuntimeError):
+    pass
+
+
+class SyntheticClient(ModelClient):
+    name = "synthetic"
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0):
+        """
+        Each call takes `latency` seconds on average, log-normally spread by
+        `jitter` (sigma; 0 for a fixed delay), and fails with
+        SyntheticModelError with probability `error_rate`.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # Timing and failures vary per call; the report text depends only on the request
+        self._timing = random.Random()
+
+    def _text(self, prompt, audio, mime_type, json_mode):
+        from synthetic import synthetic_markdown, synthetic_report
+
+        rnd = random.Random(request_fingerprint(self.name, prompt, audio, mime_type, json_mode))
+        return json.dumps(synthetic_report(rnd), ensure_ascii=False) if json_mode else synthetic_markdown(rnd)
+
+    def _call_latency(self):
+        if not self.jitter:
+            return self.latency
+        return self.latency * self._timing.lognormvariate(-self.jitter ** 2 / 2, self.jitter)
+
+    def _maybe_fail(self):
+        if self.error_rate and self._timing.random() < self.error_rate:
+            raise SyntheticModelError("Synthetic model error (NAGA_SYNTHETIC_ERROR_RATE)")
+
+    def generate(self, prompt, audio, mime_type="audio/mp3", json_mode=False) -> ModelResponse:
+        text = self._text(prompt, audio, mime_type, json_mode)
+        latency = self._call_latency()
+        if latency:
+            time.sleep(latency)
+        self._maybe_fail()
+        return ModelResponse(text, {}, latency)
+
+    def stream(self, prompt, audio, mime_type="audio/mp3", json_mode=False):
+        text = self._text(prompt, audio, mime_type, json_mode)
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+        latency = self._call_latency()
+        for i, piece in enumerate(pieces):
+            if latency:
+                time.sleep(latency / len(pieces))
+            if i == len(pieces) // 2:
+                # Failures surface mid-stream, as a dropped connection would
+                self._maybe_fail()
+            yield piece
+
+
+# ===== Rate Limit =====
+class RateLimiter:
+    """At most `per_minute` calls in any 60 second window; acquire() blocks until the call may go."""
+
+    WINDOW = 60.0
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._slots = deque()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited = 0.0
+
+    def acquire(self) -> float:
+        """Reserves the next free slot and sleeps until it. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            while self._slots and self._slots[0] <= now - self.WINDOW:
+                self._slots.popleft()
+            slot = now
+            if len(self._slots) >= self.per_minute:
+                slot = max(now, self._slots[-self.per_minute] + self.WINDOW, self._slots[-1])
+            self._slots.append(slot)
+            self.calls += 1
+            self.waited += slot - now
+        if slot > now:
+            time.sleep(slot - now)
+        return slot - now
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"per_minute": self.per_minute, "calls": self.calls, "waited_seconds": round(self.waited, 1)}
+
+
+class RateLimitedClient(ModelClient):
+    """Passes calls through to `inner` once `limiter` has a slot for them."""
+
+    def __init__(self, inner, limiter):
+        self.inner = inner
+        self.name = inner.name
+        self.limiter = limiter
+
+    @property
+    def last_usage(self):
+        return getattr(self.inner, "last_usage", {})
+
+    def warm_up(self) -> None:
+        self.inner.warm_up()
+
+    def stats(self) -> dict:
+        return {**self.inner.stats(), "rate_limit": self.limiter.stats()}
+
+    def generate(self, prompt, audio, mime_type="audio/mp3", json_mode=False) -> ModelResponse:
+        self.limiter.acquire()
+        return self.inner.generate(prompt, audio, mime_type, json_mode)
+
+    def stream(self, prompt, audio, mime_type="audio/mp3", json_mode=False):
+        self.limiter.acquire()
+        yield from self.inner.stream(prompt, audio, mime_type, json_mode)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+# One limiter per model name, shared by the clients of every mode and setting
+_limiters = {}
+
+
+def get_model_client(model_name, mode=None) -> ModelClient:
+    """
+    The client for NAGA_MODEL_MODE (or `mode`), wrapping `model_name` where a
+    real model is involved. Clients are kept per process: asking again with
+    the same model and settings returns the same instance. With
+    NAGA_MODEL_RPM set, calls go through the model's shared RateLimiter.
+    """
+    mode = (mode or os.getenv("NAGA_MODEL_MODE") or "live").lower()
+    settings = tuple(os.getenv(name) for name in (
+        "NAGA_RECORDINGS_DIR", "NAGA_REPLAY_LATENCY",
+        "NAGA_SYNTHETIC_LATENCY", "NAGA_SYNTHETIC_JITTER", "NAGA_SYNTHETIC_ERROR_RATE", "NAGA_MODEL_RPM",
+    ))
+    key = (model_name, mode, settings)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _build_client(model_name, mode)
+            per_minute = int(os.getenv("NAGA_MODEL_RPM") or 0)
+            if per_minute > 0:
+                limiter = _limiters.get(model_name)
+                if limiter is None or limiter.per_minute != per_minute:
+                    limiter = _limiters[model_name] = RateLimiter(per_minute)
+                client = RateLimitedClient(client, limiter)
+            _clients[key] = client
+    return client
+
+
+def _build_client(model_name, mode):
+    directory = os.getenv("NAGA_RECORDINGS_DIR", DEFAULT_RECORDINGS_DIR)
+    if mode == "live":
+        return GeminiClient(model_name)
+    if mode == "record":
+        return RecordingClient(GeminiClient(model_name), directory)
+    if mode == "replay":
+        return ReplayClient(model_name, directory, os.getenv("NAGA_REPLAY_LATENCY") or None)
+    if mode == "synthetic":
+        return SyntheticClient(
+            float(os.getenv("NAGA_SYNTHETIC_LATENCY") or 0),
+            float(os.getenv("NAGA_SYNTHETIC_JITTER") or 0),
+            float(os.getenv("NAGA_SYNTHETIC_ERROR_RATE") or 0),
+        )
+    raise ValueError(f"Unknown NAGA_MODEL_MODE {mode!r}; expected one of {', '.join(MODES)}")
@@ -1,23 +1,50 @@
-from fastapi import FastAPI, HTTPException, Request
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Optional
+
+from fastapi import Body, FastAPI, HTTPException, Query
 from fastapi.responses import JSONResponse
-import google.generativeai as genai
 import dotenv
-import requests
 import os
+import requests
 
-# Load environment variables
+# Load environment variables before the modules below read their NAGA_* settings at import time
 dotenv.load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+from analysis_parser import parse_analysis, parse_analysis_stream
+from entities import annotate_entities, load_catalog
+from fingerprint import AudioIndex, FingerprintError, fingerprint_audio
+from http_pool import connection_stats, get_session
+from model_client import get_model_client
+from profiling import ProfilingMiddleware, profiled
+from report_store import API_SCHEMA, ReportStore, prompt_version
+from scoring import COMPONENTS, DEFAULT_WEIGHTS, component_scores, final_score, score_formula
+from similar import SimilarityIndex
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Runs once before the first request is served
+    warm_up()
+    yield
+
 
 app = FastAPI(
     title="Sales Call Audio Analysis API",
     description="Send a public audio file URL (e.g., Salesforce file link) for Gemini analysis.",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan,
 )
+# Profiles requests sent with "X-Naga-Profile: 1" (or all of them with NAGA_PROFILE=1)
+app.add_middleware(ProfilingMiddleware)
 
 # ===== Gemini Model Setup =====
 # MODEL_NAME = "gemini-2.5-pro"
 MODEL_NAME = "gemini-2.0-flash"
+# Live Gemini by default; NAGA_MODEL_MODE=record/replay/synthetic for offline runs
+model_client = get_model_client(MODEL_NAME)
+# (connect, read) seconds for audio downloads
+DOWNLOAD_TIMEOUT = (10, float(os.getenv("NAGA_DOWNLOAD_TIMEOUT", "120")))
 
 # ===== Prompt Definition =====
 ANALYSIS_PROMPT = """
@@ -196,9 +223,7 @@ C. Customer Buying Psychology
 
 Based on specific criteria - Score each component objectively.  
 
-IMPORTANT: If any criterion does not apply to this conversation (e.g., no competitor brands mentioned → Competitor handling = N/A), then:
-1. Mark that category as "N/A".
-2. Give full score for that category.
+IMPORTANT: If any criterion does not apply to this conversation (e.g., no competitor brands mentioned → Competitor handling = N/A), write "N/A" instead of a score. Its full score is applied automatically.
 
 ---
 
@@ -226,11 +251,7 @@ IMPORTANT: If any criterion does not apply to this conversation (e.g., no compet
 - 4-5: Basic awareness of customer concerns
 - 1-3: Poor understanding of what drives customer decisions
 
----
-
-**Final Score Calculation:**
-- If all 4 criteria apply:  
-  (Product promotion × 0.3) + (Scheme leverage × 0.2) + (Competitor handling × 0.25) + (Customer psychology × 0.25)  
+Do NOT calculate a final score - it is computed from the component scores after the analysis.
 
 ------------------------------------------------------------
 
@@ -407,9 +428,6 @@ C. Customer Buying Psychology
 **Competitor handling (25% weight):** _/10
 **Customer psychology understanding (25% weight):** _/10
 
-**Final Score Calculation:**
-[Calculation formula] = _/10
-
 ------------------------------------------------------------
 
 # 6. Salesperson Ability Analysis
@@ -446,53 +464,90 @@ CRITICAL REMINDERS
 - FOLLOW THE EXACT FORMAT ABOVE - DO NOT DEVIATE TO PARAGRAPH STYLE
 """
 
+PROMPT_VERSION = prompt_version(ANALYSIS_PROMPT)
+
+# ===== Report Store =====
+report_store = ReportStore()
+# Filled from the store on first use and kept current by sync()
+similar_index = SimilarityIndex()
+audio_index = AudioIndex()
+
+
+def warm_up():
+    """What the first request would otherwise pay for: the model SDK, the HTTP pool, the entity catalog and both indexes."""
+    model_client.warm_up()
+    get_session()
+    load_catalog()
+    audio_index.sync(report_store)
+    similar_index.sync(report_store)
+
+
 # ===== Gemini Helper Functions =====
 def analyze_audio_with_gemini(audio_bytes: bytes, mime_type: str = "audio/mp3") -> str:
-    model = genai.GenerativeModel(MODEL_NAME)
-    response = model.generate_content([
-        ANALYSIS_PROMPT,
-        {"mime_type": mime_type, "data": audio_bytes}
-    ])
-    return response.text
+    return model_client.generate(ANALYSIS_PROMPT, audio_bytes, mime_type).text
 
 
-def convert_analysis_to_json(analysis_text: str) -> dict:
-    sections = {}
-    current_section = None
-    lines = analysis_text.split("\n")
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
+def stream_analysis_with_gemini(audio_bytes: bytes, mime_type: str = "audio/mp3"):
+    """Yields the analysis text chunk by chunk as the model produces it."""
+    yield from model_client.stream(ANALYSIS_PROMPT, audio_bytes, mime_type)
 
-        if line.startswith("#"):
-            current_section = line.lstrip("#").strip()
-            sections[current_section] = []
-        elif current_section:
-            sections[current_section].append(line)
 
-    return {k: "\n".join(v) for k, v in sections.items()}
+def convert_analysis_to_json(analysis_text: str) -> dict:
+    """Section tree of a complete analysis; see analysis_parser for the node layout."""
+    return parse_analysis(analysis_text)
+
+
+def section_scores(report_json: dict) -> dict:
+    """Component scores found anywhere in the parsed report."""
+    components = dict.fromkeys(COMPONENTS)
+    for section in report_json.values():
+        for key, value in section["scores"].items():
+            components[key] = value["score"]
+    return components
+
+
+def score_summary(components: dict) -> dict:
+    """The "score" the API returns and stores: components, weights and the local final score."""
+    return {
+        "components": components,
+        "weights": DEFAULT_WEIGHTS,
+        "formula": score_formula(),
+        "final_score": final_score(components),
+    }
 
 
 # ===== API Endpoint =====
 @app.post("/analyze-audio/")
-async def analyze_audio_from_url(request: Request):
+@profiled
+def analyze_audio_from_url(data: dict = Body(...)):
     """
     Accepts a JSON body like:
     {
-        "file_url": "https://your.salesforce.public.link/audio.mp3"
+        "file_url": "https://your.salesforce.public.link/audio.mp3",
+        "salesperson": "optional",
+        "store": "optional",
+        "force": false
     }
+    The analysis is stored and can be fetched again from GET /reports.
+    A recording that matches an already analyzed call (same audio,
+    re-exported or re-encoded) returns that call's report with
+    "status": "duplicate" instead of calling the model, unless "force" is true.
+
+    A plain def, so FastAPI runs it on its thread pool: the download,
+    fingerprinting, SQLite writes and model stream all block, and would
+    stall every other request on the event loop.
     """
     try:
-        data = await request.json()
         file_url = data.get("file_url")
 
         if not file_url:
             raise HTTPException(status_code=400, detail="Missing 'file_url' in request body")
 
-        # Step 1️⃣: Download the audio file from URL
-        response = requests.get(file_url, stream=True)
+        # Step 1️⃣: Download the audio file from URL, over a pooled keep-alive connection
+        try:
+            response = get_session().get(file_url, timeout=DOWNLOAD_TIMEOUT)
+        except requests.RequestException as e:
+            raise HTTPException(status_code=400, detail=f"Failed to download file ({e})")
         if response.status_code != 200:
             raise HTTPException(
                 status_code=400,
@@ -501,28 +556,166 @@ async def analyze_audio_from_url(request: Request):
 
         audio_bytes = response.content
 
-        # Step 2️⃣: Detect MIME type if available
+        # Step 2️⃣: Skip the model for a recording that was already analyzed
+        try:
+            fingerprint = fingerprint_audio(audio_bytes)
+        except FingerprintError as e:
+            print("Duplicate check skipped ::::::", e)
+            fingerprint = None
+        if fingerprint is not None:
+            audio_index.sync(report_store)
+            duplicate = audio_index.match(fingerprint)
+            record = report_store.get(duplicate.report_id) if duplicate is not None else None
+            if record is not None and not data.get("force"):
+                analysis = record["analysis"]
+                # A call first analyzed in the app returns the app's analysis JSON as its report
+                if record["schema"] == API_SCHEMA:
+                    report, score = analysis["report"], analysis["score"]
+                else:
+                    report, score = analysis, score_summary(component_scores(analysis, record["schema"]))
+                return JSONResponse(
+                    content={
+                        "status": "duplicate",
+                        "id": record["id"],
+                        "schema": record["schema"],
+                        "similarity": duplicate.similarity,
+                        "source_url": file_url,
+                        "report": report,
+                        "score": score,
+                    },
+                    status_code=200
+                )
+
+        # Step 3️⃣: Detect MIME type if available
         mime_type = response.headers.get("Content-Type", "audio/mp3")
 
-        # Step 3️⃣: Analyze with Gemini
-        analysis_text = analyze_audio_with_gemini(audio_bytes, mime_type=mime_type)
-
-        # Step 4️⃣: Convert text to structured JSON
-        report_json = convert_analysis_to_json(analysis_text)
+        # Step 4️⃣: Analyze with Gemini, parsing the section tree while the text streams in
+        report_json = parse_analysis_stream(stream_analysis_with_gemini(audio_bytes, mime_type=mime_type))
+
+        # Step 5️⃣: Compute the final score locally from the component scores
+        score = score_summary(section_scores(report_json))
+
+        # Step 6️⃣: Keep the analysis so it can be queried later without re-running it
+        report_id = report_store.add(
+            annotate_entities({"report": report_json, "score": score}, schema=API_SCHEMA),
+            salesperson=data.get("salesperson"),
+            store=data.get("store"),
+            source_name=file_url,
+            model=model_client.name,
+            prompt_version=PROMPT_VERSION,
+            schema=API_SCHEMA,
+        )
+        if fingerprint is not None:
+            report_store.add_fingerprint(report_id, fingerprint.to_bytes(), fingerprint.duration)
 
         return JSONResponse(
             content={
                 "status": "success",
+                "id": report_id,
                 "source_url": file_url,
-                "report": report_json
+                "report": report_json,
+                "score": score,
             },
             status_code=200
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during analysis: {str(e)}")
 
 
+@app.get("/reports")
+@profiled
+def list_reports(
+    salesperson: Optional[str] = None,
+    store: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    model: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    schema: Optional[str] = Query(None, pattern="^(app|api)$", description="Only reports stored by the app or by this API"),
+    sections: Optional[str] = Query(None, description="Comma-separated sections to return: top-level keys of app reports, section titles or 'score' of API reports"),
+):
+    """Stored analyses, newest first by default, with keyset pagination."""
+    projection = [s.strip() for s in sections.split(",") if s.strip()] if sections else None
+    records, next_cursor = report_store.page(
+        limit=limit,
+        after=after,
+        newest_first=order == "desc",
+        sections=projection,
+        salesperson=salesperson,
+        store=store,
+        date_from=date_from,
+        date_to=date_to,
+        model=model,
+        prompt_version=prompt_version,
+        schema=schema,
+    )
+    return {"reports": records, "next_cursor": next_cursor}
+
+
+@app.get("/search")
+@profiled
+def search_reports(
+    q: str = Query(..., min_length=1, description='Words, "quoted phrases", OR/NOT, prefix*'),
+    salesperson: Optional[str] = None,
+    store: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Full-text search over stored analyses, best match first, one hit per report."""
+    if not report_store.search_enabled:
+        raise HTTPException(status_code=501, detail="Full-text search is not available on this server")
+    hits = report_store.search(
+        q,
+        limit=limit,
+        salesperson=salesperson,
+        store=store,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return {"query": q, "results": hits}
+
+
+@app.get("/reports/{report_id}")
+@profiled
+def get_report(report_id: int):
+    record = report_store.get(report_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return record
+
+
+@app.get("/reports/{report_id}/similar")
+@profiled
+def similar_reports(report_id: int, k: int = Query(5, ge=1, le=50)):
+    """Stored calls whose objections and sales barriers are most like this one's."""
+    similar_index.sync(report_store)
+    if report_store.get(report_id) is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    matches = similar_index.similar_to_report(report_id, k=k)
+    return {
+        "id": report_id,
+        "similar": [
+            {"id": match_id, "similarity": score, "preview": similar_index.previews[match_id]}
+            for match_id, score in matches
+        ],
+    }
+
+
+@app.get("/stats")
+@profiled
+def stats():
+    """Connection and model client reuse since the process started."""
+    return {"model": {"name": model_client.name, **model_client.stats()}, "http": connection_stats()}
+
+
 @app.get("/")
+@profiled
 def root():
     return {"message": "Sales Call Audio Analysis API (URL mode) is running!"}
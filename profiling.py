@@ -0,0 +1,280 @@
+"""
+Opt-in sampling profiler for slow API requests and dashboard pages.
+
+Off by default. A request is profiled when NAGA_PROFILE=1 is set (every
+request) or when it asks for it: the `X-Naga-Profile: 1` header on the API,
+`?profile=1` in the app's URL. While profiling, a background thread samples
+the stack of the thread doing the work every NAGA_PROFILE_INTERVAL seconds
+(default 0.001), and each profiled request writes three files to
+NAGA_PROFILE_DIR (default "profiles"):
+
+- <stamp>-<name>.speedscope.json: open on https://www.speedscope.app
+- <stamp>-<name>.folded: collapsed stacks for flamegraph.pl / inferno
+- <stamp>-<name>.txt: the top functions by self and total time
+
+When nothing asks for a profile the hooks cost one environment lookup and
+one context variable read per call.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_INTERVAL = 0.001
+PROFILE_HEADER = "X-Naga-Profile"
+# Response header naming the files written for a profiled API request
+FILES_HEADER = "X-Naga-Profile-Files"
+TOP_N = 25
+
+# Set per request by the API middleware; copied into the worker thread of sync routes
+_requested = contextvars.ContextVar("naga_profile_requested", default=None)
+
+
+def _truthy(value):
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def enabled_by_env() -> bool:
+    return _truthy(os.getenv("NAGA_PROFILE"))
+
+
+# ===== Sampler =====
+class Profile:
+    """Stacks seen while sampling, root first, with their sample count and time."""
+
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+        self.stacks = defaultdict(lambda: [0, 0.0])
+        self.samples = 0
+        self.duration = 0.0
+
+    def add(self, stack, seconds):
+        entry = self.stacks[stack]
+        entry[0] += 1
+        entry[1] += seconds
+        self.samples += 1
+
+
+def _frame_key(code, _cache={}):
+    key = _cache.get(code)
+    if key is None:
+        key = _cache[code] = (code.co_qualname, code.co_filename, code.co_firstlineno)
+    return key
+
+
+class Sampler:
+    """Samples one thread's Python stack from a background thread."""
+
+    def __init__(self, name, thread_id=None, interval=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.profile = Profile(name, interval or float(os.getenv("NAGA_PROFILE_INTERVAL") or DEFAULT_INTERVAL))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{name}", daemon=True)
+
+    def _run(self):
+        profile, last = self.profile, time.perf_counter()
+        while not self._stop.wait(profile.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                # Weighted by the real gap: the sampler wakes late under load or while waiting for the GIL
+                profile.add(tuple(reversed(stack)), now - last)
+            last = now
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        self.profile.duration = time.perf_counter() - self._started
+        return self.profile
+
+
+# ===== Output =====
+def _label(key):
+    name, filename, line = key
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def speedscope(profile: Profile) -> dict:
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, (_, seconds) in profile.stacks.items():
+        row = []
+        for key in stack:
+            if key not in index:
+                index[key] = len(frames)
+                frames.append({"name": key[0], "file": key[1], "line": key[2]})
+            row.append(index[key])
+        samples.append(row)
+        weights.append(round(seconds, 6))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": profile.name,
+        "exporter": "naga profiling",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": profile.name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": round(sum(weights), 6),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+def folded(profile: Profile) -> str:
+    """One "root;...;leaf count" line per stack."""
+    lines = []
+    for stack, (count, _) in sorted(profile.stacks.items()):
+        lines.append(";".join(_label(key).replace(";", ",") for key in stack) + f" {count}")
+    return "\n".join(lines) + "\n"
+
+
+def summary(profile: Profile, top=TOP_N) -> str:
+    self_time, total_time = defaultdict(float), defaultdict(float)
+    for stack, (_, seconds) in profile.stacks.items():
+        self_time[stack[-1]] += seconds
+        # Recursive functions count once per stack
+        for key in set(stack):
+            total_time[key] += seconds
+    sampled = sum(seconds for _, seconds in profile.stacks.values()) or 1.0
+
+    def table(title, times):
+        rows = [title, f"{'seconds':>9} {'share':>6}  function"]
+        for key, seconds in sorted(times.items(), key=lambda item: -item[1])[:top]:
+            rows.append(f"{seconds:9.4f} {seconds / sampled:6.1%}  {_label(key)}")
+        return rows
+
+    header = [
+        f"{profile.name}",
+        f"{profile.duration:.3f} s wall, {profile.samples} samples every {profile.interval * 1000:g} ms",
+        "",
+    ]
+    return "\n".join(header + table("Self time", self_time) + [""] + table("Total time", total_time)) + "\n"
+
+
+def write_profile(profile: Profile, directory=None) -> list:
+    """Writes the speedscope, folded and summary files. Returns their paths."""
+    directory = directory or os.getenv("NAGA_PROFILE_DIR", DEFAULT_PROFILE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", profile.name).strip("_")[:80] or "profile"
+    base = os.path.join(directory, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{slug}")
+    paths = [base + ".speedscope.json", base + ".folded", base + ".txt"]
+    with open(paths[0], "w", encoding="utf-8") as f:
+        json.dump(speedscope(profile), f)
+    with open(paths[1], "w", encoding="utf-8") as f:
+        f.write(folded(profile))
+    with open(paths[2], "w", encoding="utf-8") as f:
+        f.write(summary(profile))
+    return paths
+
+
+# ===== Hooks =====
+def request_profiling(name, flag=None):
+    """
+    Marks the rest of this request (context) for profiling when `flag` (the
+    header or query parameter value) or NAGA_PROFILE asks for it. Returns a
+    token for reset_request_profiling, or None when not profiling.
+    """
+    if not (_truthy(flag) or enabled_by_env()):
+        return None
+    return _requested.set({"name": name, "paths": []})
+
+
+def reset_request_profiling(token) -> list:
+    """Unmarks the request. Returns the paths of the files written during it."""
+    if token is None:
+        return []
+    paths = _requested.get()["paths"]
+    _requested.reset(token)
+    return paths
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware for the API: marks requests for profiling and lists the
+    files written for them in the X-Naga-Profile-Files response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._header = PROFILE_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        flag = next((value.decode("latin-1") for key, value in scope["headers"] if key == self._header), None)
+        token = request_profiling(f"{scope['method']} {scope['path']}", flag)
+        if token is None:
+            return await self.app(scope, receive, send)
+        request = _requested.get()
+
+        async def send_with_files(message):
+            # Routes write their profile before the response starts
+            if message["type"] == "http.response.start" and request["paths"]:
+                files = ", ".join(request["paths"]).encode("latin-1", "replace")
+                message["headers"] = list(message.get("headers", [])) + [(FILES_HEADER.lower().encode("latin-1"), files)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_files)
+        finally:
+            reset_request_profiling(token)
+
+
+def profiled(func):
+    """
+    Profiles `func` when the current request was marked by
+    request_profiling (or ProfilingMiddleware). Works on sync and async functions; an async one is
+    sampled on the event loop thread, so other requests awaiting at the same
+    time show up in its profile too.
+    """
+    def start():
+        request = _requested.get()
+        if request is None:
+            return None, None
+        return request, Sampler(f"{request['name']} {func.__qualname__}").start()
+
+    def finish(request, sampler):
+        request["paths"].extend(write_profile(sampler.stop()))
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request, sampler = start()
+            if sampler is None:
+                return await func(*args, **kwargs)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                finish(request, sampler)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            request, sampler = start()
+            if sampler is None:
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finish(request, sampler)
+    return wrapper
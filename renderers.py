@@ -0,0 +1,116 @@
+"""
+Report backends. Each renderer takes a report IR (see report_ir) and
+returns str or bytes; render_many() builds the IR once per analysis and
+hands it to every requested backend.
+"""
+import html
+from itertools import repeat
+
+from docx_export import render_docx
+from jsontostring import format_table, render_markdown
+from report_ir import Blank, Heading, Paragraph, Rule, Table, build_report, cell_text
+from report_store import APP_SCHEMA
+
+
+# ===== HTML =====
+def _spans_html(spans):
+    return "".join(
+        f"<strong>{html.escape(span.text)}</strong>" if span.bold else html.escape(span.text)
+        for span in spans
+    )
+
+
+def render_html(report) -> str:
+    """Self-contained HTML fragment; bullets and numbered items become nested lists."""
+    parts = [f"<h1>{html.escape(report.title)}</h1>"]
+    w = parts.append
+    open_lists = []  # (tag, depth) of the lists currently open
+
+    def close_lists(depth=-1):
+        while open_lists and open_lists[-1][1] > depth:
+            w(f"</{open_lists.pop()[0]}>")
+
+    for section in report.sections:
+        for block in section.blocks:
+            kind = type(block)
+            if kind is Blank:
+                continue
+            if kind is Paragraph and block.marker:
+                depth = block.indent // 2
+                tag = "ul" if block.marker == "-" else "ol"
+                close_lists(depth)
+                if open_lists and open_lists[-1][1] == depth and open_lists[-1][0] != tag:
+                    w(f"</{open_lists.pop()[0]}>")
+                if not open_lists or open_lists[-1][1] < depth:
+                    w(f"<{tag}>")
+                    open_lists.append((tag, depth))
+                w(f"<li>{_spans_html(block.spans)}</li>")
+                continue
+
+            close_lists()
+            if kind is Paragraph:
+                w(f"<p>{_spans_html(block.spans)}</p>")
+            elif kind is Heading:
+                level = min(block.level + 1, 6)
+                w(f"<h{level}>{html.escape(block.text)}</h{level}>")
+            elif kind is Table:
+                w("<table><thead><tr>")
+                w("".join(f"<th>{html.escape(header)}</th>" for header in block.headers))
+                w("</tr></thead><tbody>")
+                for values in block.rows:
+                    w("<tr>" + "".join(f"<td>{html.escape(cell_text(value))}</td>" for value in values) + "</tr>")
+                w("</tbody></table>")
+            elif kind is Rule:
+                w("<hr>")
+    close_lists()
+    return "\n".join(parts) + "\n"
+
+
+# ===== Plain Text =====
+def render_text(report) -> str:
+    """Plain text without markdown markup, e.g. for emails or logs."""
+    parts = [report.title, "=" * len(report.title), ""]
+    w = parts.append
+    for section in report.sections:
+        for block in section.blocks:
+            kind = type(block)
+            if kind is Paragraph:
+                text = block.text
+                if block.marker:
+                    text = f"{'•' if block.marker == '-' else block.marker} {text}"
+                w(" " * block.indent + text)
+            elif kind is Blank:
+                w("")
+            elif kind is Heading:
+                w(block.text.upper())
+            elif kind is Rule:
+                w("-" * 60)
+            elif kind is Table:
+                w(format_table(block))
+    return "\n".join(parts) + "\n"
+
+
+RENDERERS = {
+    "markdown": render_markdown,
+    "docx": render_docx,
+    "html": render_html,
+    "text": render_text,
+}
+
+
+def render(analysis: dict, fmt="markdown", schema=APP_SCHEMA):
+    return RENDERERS[fmt](build_report(analysis, schema))
+
+
+def render_many(analyses, formats=("markdown",), schemas=None):
+    """
+    Renders many analyses in one pass: the IR is built once per analysis and
+    shared by all `formats`. `schemas` gives each analysis's schema; all are
+    app reports without it. Yields {format: output} in input order.
+    """
+    renderers = [(fmt, RENDERERS[fmt]) for fmt in formats]
+    if schemas is None:
+        schemas = repeat(APP_SCHEMA)
+    for analysis, schema in zip(analyses, schemas):
+        report = build_report(analysis, schema)
+        yield {fmt: renderer(report) for fmt, renderer in renderers}
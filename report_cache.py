@@ -0,0 +1,101 @@
+"""
+Process-wide cache of report bodies for the Streamlit app. Sessions keep
+only a report id; the analysis JSON and its rendered markdown live here
+once, however many sessions show the same report, and the least recently
+used reports are dropped when the cache grows past its byte budget
+(NAGA_REPORT_CACHE_MB, default 64). A dropped report is read back from the
+ReportStore on its next view.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from jsontostring import convert_sales_report_to_string
+from report_store import APP_SCHEMA
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("NAGA_REPORT_CACHE_MB", "64")) * 2 ** 20)
+
+
+def deep_size(obj) -> int:
+    """Approximate bytes held by a JSON-like value (dicts, lists, strings, numbers)."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return total
+
+
+@dataclass(slots=True)
+class CachedReport:
+    report_id: int
+    analysis: dict
+    markdown: str
+    nbytes: int
+    schema: str = APP_SCHEMA
+
+
+class ReportCache:
+    def __init__(self, store, max_bytes=DEFAULT_MAX_BYTES):
+        self.store = store
+        self.max_bytes = max_bytes
+        self._reports = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def put(self, report_id, analysis, markdown=None, schema=APP_SCHEMA) -> CachedReport:
+        """Caches a report that is already at hand (e.g. just analyzed), rendering it if needed."""
+        if markdown is None:
+            markdown = convert_sales_report_to_string(analysis, schema)
+        report = CachedReport(report_id, analysis, markdown, deep_size(analysis) + sys.getsizeof(markdown), schema)
+        with self._lock:
+            previous = self._reports.pop(report_id, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._reports[report_id] = report
+            self._bytes += report.nbytes
+            # The newest report always stays, even if it alone is over budget
+            while self._bytes > self.max_bytes and len(self._reports) > 1:
+                _, evicted = self._reports.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+        return report
+
+    def get(self, report_id):
+        """The cached report, loaded from the store on a miss. None if the store has no such report."""
+        with self._lock:
+            report = self._reports.get(report_id)
+            if report is not None:
+                self._reports.move_to_end(report_id)
+                self.hits += 1
+                return report
+            self.misses += 1
+        record = self.store.get(report_id)
+        if record is None:
+            return None
+        return self.put(report_id, record["analysis"], schema=record["schema"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "reports": len(self._reports),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,484 @@
+"""
+Intermediate representation of a sales analysis report.
+
+build_report() turns the analysis JSON into a Report once; the Markdown,
+DOCX, HTML and plain text backends all render from it, so nothing has to
+re-parse rendered markdown. Blocks are line-level so the Markdown backend
+can reproduce the original report layout exactly.
+
+Reports the API stored (API_SCHEMA: the model's markdown, parsed into
+sections) are rebuilt from their section text instead.
+"""
+import re
+from dataclasses import dataclass
+
+from report_store import API_SCHEMA, APP_SCHEMA
+
+COMPETITOR_TABLE_COLUMNS = ['brand_name', 'product', 'reasons_for_preference', 'category']
+COMPETITOR_TABLE_HEADERS = ['Competitor Brand Name', 'Products', 'Preference Reasons', 'Category']
+
+
+# ===== Blocks =====
+@dataclass(slots=True)
+class Span:
+    text: str
+    bold: bool = False
+
+
+@dataclass(slots=True)
+class Heading:
+    text: str
+    level: int = 1
+
+
+@dataclass(slots=True)
+class Paragraph:
+    """One line of text. `marker` is "-" for bullets or "1.", "2." ... for numbered items."""
+    spans: tuple
+    marker: str = ""
+    indent: int = 0
+
+    @property
+    def text(self):
+        return "".join(span.text for span in self.spans)
+
+
+@dataclass(slots=True)
+class Table:
+    """Cells keep their original values; MISSING (NaN, as in pandas) marks a cell with no value."""
+    headers: tuple
+    rows: tuple
+
+
+@dataclass(slots=True)
+class Rule:
+    pass
+
+
+@dataclass(slots=True)
+class Blank:
+    pass
+
+
+@dataclass(slots=True)
+class Section:
+    key: str
+    blocks: tuple
+
+    @property
+    def title(self):
+        return self.blocks[0].text if self.blocks and isinstance(self.blocks[0], Heading) else self.key
+
+
+@dataclass(slots=True)
+class Report:
+    sections: tuple
+    title: str = "Sales Performance Analysis Report"
+
+
+RULE = Rule()
+BLANK = Blank()
+MISSING = float("nan")
+
+
+def cell_text(value):
+    """Display text of a Table cell; None and MISSING cells are blank."""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return value if isinstance(value, str) else f"{value}"
+
+
+def _text(value):
+    return value if type(value) is str else f"{value}"
+
+
+def _bold(text):
+    return Span(_text(text), True)
+
+
+def _plain(text):
+    return Span(_text(text))
+
+
+def _line(*spans, marker="", indent=0):
+    return Paragraph(spans, marker, indent)
+
+
+def _labelled(label, value, marker="-", indent=0):
+    """'- **Label**: value'"""
+    return Paragraph((Span(label, True), Span(f": {_text(value)}")), marker, indent)
+
+
+def competitor_table(competitor_list):
+    """Table of the competitor brands; columns nobody mentioned are filled with 'N/A'."""
+    present = {key for brand in competitor_list for key in brand}
+    rows = []
+    for brand in competitor_list:
+        rows.append(tuple(brand.get(col, MISSING) if col in present else "N/A" for col in COMPETITOR_TABLE_COLUMNS))
+    return Table(tuple(COMPETITOR_TABLE_HEADERS), tuple(rows))
+
+
+# ===== Report Sections =====
+def _brand_product_mapping(json_data, b):
+    b(Heading("Brand & Product Mapping"))
+    b(BLANK)
+
+    brand_mapping = json_data.get("brand_product_mapping", {})
+    naga_products = brand_mapping.get("naga_brand_products", {})
+
+    if naga_products.get("products_list"):
+        b(_line(_plain("A. Naga Brand Products")))
+        b(BLANK)
+        for product in naga_products.get("products_list", []):
+            b(_line(_plain(product), marker="-"))
+    else:
+        b(_line(_plain("No Naga products mentioned.")))
+        b(BLANK)
+        b(RULE)
+        b(BLANK)
+
+    b(BLANK)
+    b(_line(_plain("B. Competitor Brands Mentioned")))
+    b(BLANK)
+    competitor_list = json_data.get("competitive_intelligence_and_customer_psychology", {}).get('competitor_brand_analysis', [])
+
+    if competitor_list:
+        b(competitor_table(competitor_list))
+    else:
+        b(_line(_plain("No competitor brands mentioned.")))
+    b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _conversation_summary(json_data, b):
+    b(Heading("1. Conversation Summary"))
+    b(BLANK)
+    conversation_summary = json_data.get("conversation_summary", {})
+    if conversation_summary.get('summary_points'):
+        for point in conversation_summary.get("summary_points", []):
+            b(_line(_plain(point), marker="-"))
+    else:
+        b(_line(_plain("No conversation summary available.")))
+    b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _sales_matrix(json_data, b):
+    b(Heading("2. Sales Matrix"))
+    b(BLANK)
+    b(_line(_bold("Naga Products Performance")))
+    b(BLANK)
+
+    sales_matrix = json_data.get("sales_matrix", {})
+    naga_performance = sales_matrix.get("naga_products_performance", {})
+    if naga_performance:
+        b(_labelled("Naga products promoted", naga_performance.get('naga_products_promoted', 'N/A')))
+        b(BLANK)
+        b(_labelled("Volume pushed / upselling", naga_performance.get('volume_pushed_upselling', 'N/A')))
+        b(BLANK)
+
+        schemes_offered = naga_performance.get("schemes_offered", {})
+        b(_line(_bold("Schemes offered"), _plain(":"), marker="-"))
+        b(BLANK)
+        if schemes_offered:
+            b(_line(_plain(schemes_offered.get('description', 'No description available'))))
+            b(BLANK)
+            for scheme in schemes_offered.get("scheme_details", []):
+                b(_labelled(_text(scheme.get('product', 'N/A')), scheme.get('scheme', 'N/A'), indent=2))
+            b(BLANK)
+        else:
+            b(_line(_plain("No schemes offered."), indent=2))
+            b(BLANK)
+
+        b(_labelled("Cross-selling within Naga portfolio", naga_performance.get('cross_selling_within_naga_portfolio', 'N/A')))
+        b(BLANK)
+
+        acceptance_rejection = naga_performance.get("acceptance_rejection", {})
+        b(_line(_bold("Acceptance/Rejection"), _plain(":"), marker="-"))
+        b(BLANK)
+        accepted = acceptance_rejection.get("accepted", [])
+        b(_labelled("Accepted", ", ".join(accepted) if accepted else "No products accepted", indent=2))
+        b(BLANK)
+        rejected = acceptance_rejection.get("rejected", [])
+        b(_labelled("Rejected", ", ".join(rejected) if rejected else "No products rejected", indent=2))
+        b(BLANK)
+    else:
+        b(_line(_plain("No Naga products performance data available.")))
+        b(BLANK)
+
+    sales_barriers = sales_matrix.get("sales_barriers", {})
+    if sales_barriers:
+        b(_line(_bold("Sales Barriers")))
+        b(BLANK)
+        b(_labelled("Objections raised", sales_barriers.get('objections_raised', 'No objections raised')))
+        b(BLANK)
+        b(_labelled("Competitor advantages cited", sales_barriers.get('competitor_advantages_cited', 'No competitor advantages cited')))
+        b(BLANK)
+    else:
+        b(_line(_plain("No sales barriers data available.")))
+        b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _customer_buying_patterns(json_data, b):
+    b(Heading("3. Customer Buying Patterns"))
+    b(BLANK)
+    buying_patterns = json_data.get("customer_buying_patterns", {})
+    if buying_patterns:
+        regular = buying_patterns.get("regularly_buying_products", {})
+        if regular.get('products'):
+            b(_line(_plain(f"A. Regularly buying products ({_text(regular.get('description', 'N/A'))})")))
+            b(BLANK)
+            for product in regular.get("products", []):
+                b(_line(_plain(product), marker="-"))
+        else:
+            b(_line(_plain("No Regular buying products found")))
+        b(BLANK)
+
+        scheme_based = buying_patterns.get("scheme_based_orders", {})
+        if scheme_based.get('products'):
+            b(_line(_plain(f"B. Scheme Based Orders ({_text(scheme_based.get('description', 'N/A'))})")))
+            b(BLANK)
+            for product in scheme_based.get("products", []):
+                b(_line(_plain(product), marker="-"))
+        else:
+            b(_line(_plain("No Scheme Based Orders found")))
+    else:
+        b(_line(_plain("No customer buying patterns data available.")))
+    b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _competitive_intelligence(json_data, b):
+    b(Heading("4. Competitive Intelligence & Customer Psychology"))
+    b(BLANK)
+    competitive_intel = json_data.get("competitive_intelligence_and_customer_psychology", {})
+    if competitive_intel:
+        b(_line(_plain("A. Competitor Brand Analysis")))
+        b(BLANK)
+        if competitive_intel.get("competitor_brand_analysis"):
+            for index, brand in enumerate(competitive_intel.get("competitor_brand_analysis", [])):
+                b(_line(_bold(f"Brand {index + 1}:")))
+                b(BLANK)
+                b(_labelled("Brand Name", brand.get('brand_name', 'N/A')))
+                b(_labelled("Products", brand.get('product', 'N/A')))
+                b(_labelled("Customer's Current Status", brand.get('customer_current_status', 'N/A')))
+                b(_labelled("Reasons for Preference", brand.get('reasons_for_preference', 'N/A')))
+                b(_labelled("Category", brand.get('category', 'N/A')))
+                b(BLANK)
+        else:
+            b(_line(_plain("No competitor brand analysis data available.")))
+            b(BLANK)
+
+        online_retailers = competitive_intel.get("online_retailers_mentioned", [])
+        if online_retailers:
+            b(_line(_plain("B. Online Retailers Mentioned")))
+            b(BLANK)
+            for index, retailer in enumerate(online_retailers):
+                b(_line(_bold(f"Retailer {index + 1}:")))
+                b(BLANK)
+                b(_labelled("Name", retailer.get('name', 'N/A')))
+                b(_labelled("Product Range", retailer.get('product_range', 'N/A')))
+                b(_labelled("Pricing Strategy", retailer.get('pricing_strategy', 'N/A')))
+                b(_labelled("Customer Perception", retailer.get('customer_perception', 'N/A')))
+                b(_labelled("Unique Selling Points", retailer.get('unique_selling_points', 'N/A')))
+                b(BLANK)
+
+        customer_psychology = competitive_intel.get("customer_buying_psychology", {})
+        if customer_psychology:
+            b(_line(_plain("C. Customer Buying Psychology")))
+            b(BLANK)
+            b(_line(_bold("What truly drives purchase decisions"), _plain(":"), marker="-"))
+            b(BLANK)
+            if customer_psychology.get("purchase_decision_drivers_ranked"):
+                for index, driver in enumerate(customer_psychology.get("purchase_decision_drivers_ranked", [])):
+                    b(_line(_plain(driver), marker=f"{index + 1}.", indent=2))
+            else:
+                b(_line(_plain("No purchase decision drivers data available."), indent=2))
+            b(BLANK)
+            b(_labelled("Customer's risk tolerance", customer_psychology.get('risk_tolerance', 'N/A')))
+            b(BLANK)
+            b(_labelled("Stock rotation preferences", customer_psychology.get('stock_rotation_preferences', 'N/A')))
+            b(BLANK)
+            b(_labelled("Openness to switching brands", customer_psychology.get('openness_to_switching', 'N/A')))
+            b(BLANK)
+            b(_labelled("How is the customer buying behaviour", customer_psychology.get('buying_behaviour', 'N/A')))
+            b(BLANK)
+        else:
+            b(_line(_plain("No customer buying psychology data available.")))
+            b(BLANK)
+    else:
+        b(_line(_plain("No competitive intelligence or customer psychology data available.")))
+        b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _score_lines(b, label, score, is_na=False):
+    spans = [
+        _bold(f"{label} ({_text(score.get('weight_percentage', 'N/A'))}% weight):"),
+        _plain(f" {_text(score.get('score', 'N/A'))}/10"),
+    ]
+    if is_na:
+        spans.append(_plain(" (N/A)"))
+    b(Paragraph(tuple(spans)))
+    b(_line(_plain(score.get('justification', 'N/A')), marker="-"))
+    b(BLANK)
+
+
+def _effectiveness_score(json_data, b):
+    b(Heading("5. Salesperson Effectiveness Score"))
+    b(BLANK)
+    effectiveness = json_data.get("salesperson_effectiveness_score", {})
+    scores = effectiveness.get("scores", {})
+    if scores:
+        _score_lines(b, "Product promotion", scores.get("product_promotion", {}))
+        _score_lines(b, "Scheme leverage", scores.get("scheme_leverage", {}))
+        competitor_handling = scores.get("competitor_handling", {})
+        _score_lines(b, "Competitor handling", competitor_handling, is_na=competitor_handling.get("is_na"))
+        _score_lines(b, "Customer psychology understanding", scores.get("customer_psychology_understanding", {}))
+    else:
+        b(_line(_plain("No salesperson effectiveness scores available.")))
+        b(BLANK)
+
+    final_calc = effectiveness.get("final_score_calculation", {})
+    if final_calc:
+        b(_line(_bold("Final Score Calculation:")))
+        b(BLANK)
+        b(_line(_plain(f"{_text(final_calc.get('formula', 'N/A'))} = {_text(final_calc.get('final_score', 'N/A'))} / 10")))
+        b(BLANK)
+    else:
+        b(_line(_plain("No final score calculation available.")))
+        b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _ability_analysis(json_data, b):
+    b(Heading("6. Salesperson Ability Analysis"))
+    b(BLANK)
+    b(_line(_plain(json_data.get('salesperson_ability_analysis', 'N/A')), marker="-"))
+    b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _price_analysis(json_data, b):
+    b(Heading("7. Product Price Analysis"))
+    b(BLANK)
+    price_analysis = json_data.get("product_price_analysis", {})
+    if price_analysis:
+        b(_line(_plain(price_analysis.get('summary', 'N/A')), marker="-"))
+        b(BLANK)
+        for product in price_analysis.get("high_price_products", []):
+            b(_line(_bold(product.get('product', 'N/A')), marker="-", indent=2))
+            b(_line(_plain(f"Price Point: {_text(product.get('price_point', 'N/A'))}"), marker="-", indent=4))
+            b(_line(_plain(f"Customer's Exact Concerns: {_text(product.get('customer_exact_concerns', 'N/A'))}"), marker="-", indent=4))
+            b(BLANK)
+    else:
+        b(_line(_plain("No product price analysis data available.")))
+        b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _bullet_list(json_data, b, key, title, empty_text):
+    b(Heading(title))
+    b(BLANK)
+    if json_data.get(key):
+        for item in json_data.get(key, []):
+            b(_line(_plain(item), marker="-"))
+    else:
+        b(_line(_plain(empty_text)))
+    b(BLANK)
+    b(RULE)
+
+
+def _strengths(json_data, b):
+    _bullet_list(json_data, b, "salesperson_strengths", "8. Salesperson Strengths", "No salesperson strengths found.")
+    b(BLANK)
+
+
+def _areas_for_improvement(json_data, b):
+    _bullet_list(json_data, b, "areas_for_improvement", "9. Areas for Improvement", "No areas for improvement found.")
+
+
+SECTIONS = (
+    ("brand_product_mapping", _brand_product_mapping),
+    ("conversation_summary", _conversation_summary),
+    ("sales_matrix", _sales_matrix),
+    ("customer_buying_patterns", _customer_buying_patterns),
+    ("competitive_intelligence", _competitive_intelligence),
+    ("effectiveness_score", _effectiveness_score),
+    ("ability_analysis", _ability_analysis),
+    ("price_analysis", _price_analysis),
+    ("strengths", _strengths),
+    ("areas_for_improvement", _areas_for_improvement),
+)
+
+
+def build_section(key, build, json_data):
+    blocks = []
+    build(json_data, blocks.append)
+    return Section(key, tuple(blocks))
+
+
+# ===== API Reports =====
+_BULLET = re.compile(r"^([-*•]|\d+[.)])\s+(.*)$")
+
+
+def _markdown_spans(text):
+    """'**Label:** value' → bold and plain spans."""
+    parts = text.split("**")
+    if len(parts) % 2 == 0:
+        # Unbalanced markers are kept as they are
+        return (_plain(text),)
+    return tuple(Span(part, i % 2 == 1) for i, part in enumerate(parts) if part)
+
+
+def _section_tree_blocks(node, b):
+    b(Heading(node["title"]))
+    b(BLANK)
+    for line in node["text"].split("\n"):
+        match = _BULLET.match(line)
+        if match:
+            marker = "-" if match[1] in "-*•" else match[1]
+            b(Paragraph(_markdown_spans(match[2]), marker))
+        else:
+            b(Paragraph(_markdown_spans(line)))
+    b(BLANK)
+    b(RULE)
+    b(BLANK)
+
+
+def _api_score(score, b):
+    b(Heading("Final Score"))
+    b(BLANK)
+    final = score.get("final_score")
+    b(_line(_plain(f"{_text(score.get('formula', 'N/A'))} = {_text('N/A' if final is None else final)} / 10")))
+    b(BLANK)
+
+
+def _api_sections(json_data):
+    for title, node in json_data.get("report", {}).items():
+        yield build_section(title, _section_tree_blocks, node)
+    if json_data.get("score"):
+        yield build_section("score", _api_score, json_data["score"])
+
+
+def build_report(json_data: dict, schema=APP_SCHEMA) -> Report:
+    """Builds the report IR from a stored analysis of the given schema (see report_store)."""
+    return Report(tuple(iter_report_sections(json_data, schema)))
+
+
+def iter_report_sections(json_data: dict, schema=APP_SCHEMA):
+    """Like build_report, but yields each section as soon as it is built."""
+    if schema == API_SCHEMA:
+        yield from _api_sections(json_data)
+        return
+    for key, build in SECTIONS:
+        yield build_section(key, build, json_data)
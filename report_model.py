@@ -0,0 +1,380 @@
+"""
+Typed model of the analysis JSON returned by the model.
+
+parse_report() validates the whole document in one pass and returns a tree
+of slotted dataclasses, or raises ReportValidationError listing every
+problem with its JSON path. Lists become tuples and short repeated strings
+(brands, products, categories) are interned, so tens of thousands of parsed
+reports fit comfortably in memory for analytics.
+
+Missing fields fall back to empty values, like the renderer's .get()
+defaults; only values of the wrong type or out of range are errors.
+"""
+import json
+import sys
+from dataclasses import dataclass, field
+
+# The categories the app prompt offers the model (the same list as data/concerns.xlsx); the prompt is built from this
+COMPETITOR_CATEGORIES = (
+    "Price Concern",
+    "Local Brand Preference",
+    "Taste & Quality Preference",
+    "Brand Loyalty / Trust",
+    "Availability & Supply Strength",
+    "Retailer Margin Advantage",
+    "Promotions & Schemes",
+    "Packaging Preference",
+    "Customer Demand / Pull",
+    "Regional Taste / Cultural Fit",
+    "Other Factors",
+)
+SCORE_RANGE = (0, 10)
+_INTERN_MAX_LENGTH = 64
+
+
+class ReportValidationError(ValueError):
+    """Raised by parse_report; `errors` is a list of (path, message) tuples."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = [f"{path or '<root>'}: {message}" for path, message in errors]
+        super().__init__(f"{len(errors)} validation error(s):\n" + "\n".join(lines))
+
+
+# ===== Field Kinds =====
+# Each kind is fn(value, path, errors) -> parsed value; problems are appended to `errors`.
+def _type_name(value):
+    return "null" if value is None else type(value).__name__
+
+
+def _text(value, path, errors):
+    if isinstance(value, str):
+        return sys.intern(value) if len(value) <= _INTERN_MAX_LENGTH else value
+    errors.append((path, f"expected string, got {_type_name(value)}"))
+    return ""
+
+
+def _number(low=None, high=None):
+    def parse(value, path, errors):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            errors.append((path, f"expected number, got {_type_name(value)}"))
+            return None
+        if (low is not None and value < low) or (high is not None and value > high):
+            errors.append((path, f"{value} is outside {low}..{high}"))
+        return value
+    return parse
+
+
+def _boolean(value, path, errors):
+    if isinstance(value, bool):
+        return value
+    errors.append((path, f"expected true/false, got {_type_name(value)}"))
+    return False
+
+
+def _choice(options):
+    def parse(value, path, errors):
+        value = _text(value, path, errors)
+        if value and value not in options:
+            errors.append((path, f"{value!r} is not one of {', '.join(options)}"))
+        return value
+    return parse
+
+
+def _text_or_object(value, path, errors):
+    """Product lists may hold plain strings or objects with more context."""
+    if isinstance(value, dict):
+        return value
+    return _text(value, path, errors)
+
+
+def _list_of(kind):
+    def parse(value, path, errors):
+        if not isinstance(value, list):
+            errors.append((path, f"expected list, got {_type_name(value)}"))
+            return ()
+        return tuple(kind(item, f"{path}[{index}]", errors) for index, item in enumerate(value))
+    return parse
+
+
+def _object(cls):
+    def parse(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append((path, f"expected object, got {_type_name(value)}"))
+            return cls()
+        return _parse_fields(cls, value, path, errors)
+    return parse
+
+
+def _parse_fields(cls, data, path, errors):
+    values = {}
+    prefix = f"{path}." if path else ""
+    for name, kind in cls.FIELDS:
+        value = data.get(name)
+        if value is not None:
+            values[name] = kind(value, prefix + name, errors)
+    return cls(**values)
+
+
+_TEXT_LIST = _list_of(_text)
+_PRODUCT_LIST = _list_of(_text_or_object)
+
+
+# ===== Report Schema =====
+@dataclass(slots=True)
+class NagaBrandProducts:
+    products_list: tuple = ()
+    FIELDS = (("products_list", _PRODUCT_LIST),)
+
+
+@dataclass(slots=True)
+class BrandProductMapping:
+    naga_brand_products: NagaBrandProducts = field(default_factory=NagaBrandProducts)
+    competitor_brands_mentioned: tuple = ()
+    FIELDS = (
+        ("naga_brand_products", _object(NagaBrandProducts)),
+        ("competitor_brands_mentioned", _PRODUCT_LIST),
+    )
+
+
+@dataclass(slots=True)
+class ConversationSummary:
+    summary_points: tuple = ()
+    FIELDS = (("summary_points", _TEXT_LIST),)
+
+
+@dataclass(slots=True)
+class SchemeDetail:
+    product: str = ""
+    scheme: str = ""
+    FIELDS = (("product", _text), ("scheme", _text))
+
+
+@dataclass(slots=True)
+class SchemesOffered:
+    description: str = ""
+    scheme_details: tuple = ()
+    FIELDS = (("description", _text), ("scheme_details", _list_of(_object(SchemeDetail))))
+
+
+@dataclass(slots=True)
+class AcceptanceRejection:
+    accepted: tuple = ()
+    rejected: tuple = ()
+    FIELDS = (("accepted", _TEXT_LIST), ("rejected", _TEXT_LIST))
+
+
+@dataclass(slots=True)
+class NagaProductsPerformance:
+    naga_products_promoted: str = ""
+    volume_pushed_upselling: str = ""
+    schemes_offered: SchemesOffered = field(default_factory=SchemesOffered)
+    cross_selling_within_naga_portfolio: str = ""
+    acceptance_rejection: AcceptanceRejection = field(default_factory=AcceptanceRejection)
+    FIELDS = (
+        ("naga_products_promoted", _text),
+        ("volume_pushed_upselling", _text),
+        ("schemes_offered", _object(SchemesOffered)),
+        ("cross_selling_within_naga_portfolio", _text),
+        ("acceptance_rejection", _object(AcceptanceRejection)),
+    )
+
+
+@dataclass(slots=True)
+class SalesBarriers:
+    objections_raised: str = ""
+    competitor_advantages_cited: str = ""
+    FIELDS = (("objections_raised", _text), ("competitor_advantages_cited", _text))
+
+
+@dataclass(slots=True)
+class SalesMatrix:
+    naga_products_performance: NagaProductsPerformance = field(default_factory=NagaProductsPerformance)
+    sales_barriers: SalesBarriers = field(default_factory=SalesBarriers)
+    FIELDS = (
+        ("naga_products_performance", _object(NagaProductsPerformance)),
+        ("sales_barriers", _object(SalesBarriers)),
+    )
+
+
+@dataclass(slots=True)
+class ProductGroup:
+    description: str = ""
+    products: tuple = ()
+    FIELDS = (("description", _text), ("products", _PRODUCT_LIST))
+
+
+@dataclass(slots=True)
+class CustomerBuyingPatterns:
+    regularly_buying_products: ProductGroup = field(default_factory=ProductGroup)
+    scheme_based_orders: ProductGroup = field(default_factory=ProductGroup)
+    FIELDS = (
+        ("regularly_buying_products", _object(ProductGroup)),
+        ("scheme_based_orders", _object(ProductGroup)),
+    )
+
+
+@dataclass(slots=True)
+class CompetitorBrand:
+    brand_name: str = ""
+    product: str = ""
+    customer_current_status: str = ""
+    reasons_for_preference: str = ""
+    category: str = ""
+    FIELDS = (
+        ("brand_name", _text),
+        ("product", _text),
+        ("customer_current_status", _text),
+        ("reasons_for_preference", _text),
+        ("category", _choice(COMPETITOR_CATEGORIES)),
+    )
+
+
+@dataclass(slots=True)
+class OnlineRetailer:
+    name: str = ""
+    product_range: str = ""
+    pricing_strategy: str = ""
+    customer_perception: str = ""
+    unique_selling_points: str = ""
+    FIELDS = (
+        ("name", _text),
+        ("product_range", _text),
+        ("pricing_strategy", _text),
+        ("customer_perception", _text),
+        ("unique_selling_points", _text),
+    )
+
+
+@dataclass(slots=True)
+class CustomerBuyingPsychology:
+    purchase_decision_drivers_ranked: tuple = ()
+    risk_tolerance: str = ""
+    stock_rotation_preferences: str = ""
+    openness_to_switching: str = ""
+    buying_behaviour: str = ""
+    FIELDS = (
+        ("purchase_decision_drivers_ranked", _TEXT_LIST),
+        ("risk_tolerance", _text),
+        ("stock_rotation_preferences", _text),
+        ("openness_to_switching", _text),
+        ("buying_behaviour", _text),
+    )
+
+
+@dataclass(slots=True)
+class CompetitiveIntelligence:
+    competitor_brand_analysis: tuple = ()
+    online_retailers_mentioned: tuple = ()
+    customer_buying_psychology: CustomerBuyingPsychology = field(default_factory=CustomerBuyingPsychology)
+    FIELDS = (
+        ("competitor_brand_analysis", _list_of(_object(CompetitorBrand))),
+        ("online_retailers_mentioned", _list_of(_object(OnlineRetailer))),
+        ("customer_buying_psychology", _object(CustomerBuyingPsychology)),
+    )
+
+
+@dataclass(slots=True)
+class ComponentScore:
+    score: float = None
+    weight_percentage: float = None
+    justification: str = ""
+    is_na: bool = False
+    FIELDS = (
+        ("score", _number(*SCORE_RANGE)),
+        ("weight_percentage", _number(0, 100)),
+        ("justification", _text),
+        ("is_na", _boolean),
+    )
+
+
+@dataclass(slots=True)
+class Scores:
+    product_promotion: ComponentScore = field(default_factory=ComponentScore)
+    scheme_leverage: ComponentScore = field(default_factory=ComponentScore)
+    competitor_handling: ComponentScore = field(default_factory=ComponentScore)
+    customer_psychology_understanding: ComponentScore = field(default_factory=ComponentScore)
+    FIELDS = (
+        ("product_promotion", _object(ComponentScore)),
+        ("scheme_leverage", _object(ComponentScore)),
+        ("competitor_handling", _object(ComponentScore)),
+        ("customer_psychology_understanding", _object(ComponentScore)),
+    )
+
+
+@dataclass(slots=True)
+class FinalScoreCalculation:
+    formula: str = ""
+    final_score: float = None
+    FIELDS = (("formula", _text), ("final_score", _number(*SCORE_RANGE)))
+
+
+@dataclass(slots=True)
+class EffectivenessScore:
+    scores: Scores = field(default_factory=Scores)
+    final_score_calculation: FinalScoreCalculation = field(default_factory=FinalScoreCalculation)
+    FIELDS = (
+        ("scores", _object(Scores)),
+        ("final_score_calculation", _object(FinalScoreCalculation)),
+    )
+
+
+@dataclass(slots=True)
+class HighPriceProduct:
+    product: str = ""
+    price_point: str = ""
+    customer_exact_concerns: str = ""
+    FIELDS = (("product", _text), ("price_point", _text), ("customer_exact_concerns", _text))
+
+
+@dataclass(slots=True)
+class ProductPriceAnalysis:
+    summary: str = ""
+    high_price_products: tuple = ()
+    FIELDS = (("summary", _text), ("high_price_products", _list_of(_object(HighPriceProduct))))
+
+
+@dataclass(slots=True)
+class SalesReport:
+    brand_product_mapping: BrandProductMapping = field(default_factory=BrandProductMapping)
+    conversation_summary: ConversationSummary = field(default_factory=ConversationSummary)
+    sales_matrix: SalesMatrix = field(default_factory=SalesMatrix)
+    customer_buying_patterns: CustomerBuyingPatterns = field(default_factory=CustomerBuyingPatterns)
+    competitive_intelligence_and_customer_psychology: CompetitiveIntelligence = field(default_factory=CompetitiveIntelligence)
+    salesperson_effectiveness_score: EffectivenessScore = field(default_factory=EffectivenessScore)
+    salesperson_ability_analysis: str = ""
+    product_price_analysis: ProductPriceAnalysis = field(default_factory=ProductPriceAnalysis)
+    salesperson_strengths: tuple = ()
+    areas_for_improvement: tuple = ()
+    FIELDS = (
+        ("brand_product_mapping", _object(BrandProductMapping)),
+        ("conversation_summary", _object(ConversationSummary)),
+        ("sales_matrix", _object(SalesMatrix)),
+        ("customer_buying_patterns", _object(CustomerBuyingPatterns)),
+        ("competitive_intelligence_and_customer_psychology", _object(CompetitiveIntelligence)),
+        ("salesperson_effectiveness_score", _object(EffectivenessScore)),
+        ("salesperson_ability_analysis", _text),
+        ("product_price_analysis", _object(ProductPriceAnalysis)),
+        ("salesperson_strengths", _TEXT_LIST),
+        ("areas_for_improvement", _TEXT_LIST),
+    )
+
+
+# ===== Public API =====
+def validate_report(data) -> tuple:
+    """Returns (SalesReport, errors) without raising; errors is a list of (path, message)."""
+    errors = []
+    report = _object(SalesReport)(data, "", errors)
+    return report, errors
+
+
+def parse_report(data) -> SalesReport:
+    """Validates an analysis dict and returns the typed report, or raises ReportValidationError."""
+    report, errors = validate_report(data)
+    if errors:
+        raise ReportValidationError(errors)
+    return report
+
+
+def parse_report_json(text: str) -> SalesReport:
+    return parse_report(json.loads(text))
@@ -0,0 +1,399 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_DB_PATH = os.getenv("NAGA_REPORT_DB", os.path.join("data", "reports.db"))
+MAX_PAGE_SIZE = 500
+# query() reads this many rows per short-lived connection
+QUERY_BATCH_SIZE = 200
+
+# Shapes of the stored analysis JSON, kept per row in the "schema" column:
+# the app's analysis JSON (see report_model), or the API's parsed markdown
+# section tree under "report" with its locally computed "score".
+APP_SCHEMA = "app"
+API_SCHEMA = "api"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    salesperson TEXT,
+    store TEXT,
+    source_name TEXT,
+    model TEXT,
+    prompt_version TEXT,
+    schema TEXT,
+    analysis_json TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    report_id INTEGER PRIMARY KEY REFERENCES reports (id),
+    duration REAL NOT NULL,
+    fingerprint BLOB NOT NULL
+);
+"""
+
+# Columns added after the first release, with their types
+MIGRATED_COLUMNS = {
+    "model": "TEXT",
+    "prompt_version": "TEXT",
+    "schema": "TEXT",
+}
+# Rows stored before the schema column are told apart by their shape
+BACKFILL_SCHEMA = f"""
+UPDATE reports SET schema = CASE WHEN json_type(analysis_json, '$.report') = 'object'
+    THEN '{API_SCHEMA}' ELSE '{APP_SCHEMA}' END
+WHERE schema IS NULL
+"""
+
+# SQLite appends the rowid to every index, so an equality match on
+# salesperson/store is already ordered by id for keyset pagination
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports (created_at);
+CREATE INDEX IF NOT EXISTS idx_reports_salesperson ON reports (salesperson);
+CREATE INDEX IF NOT EXISTS idx_reports_store ON reports (store);
+CREATE INDEX IF NOT EXISTS idx_reports_model ON reports (model, prompt_version);
+"""
+
+# One row per report section; report_id/section are stored but not tokenized
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS report_fts USING fts5(
+    report_id UNINDEXED,
+    section UNINDEXED,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+# PRAGMA user_version once the search index covers every stored report
+FTS_INDEX_VERSION = 1
+_FTS_OPERATORS = {"AND", "OR", "NOT"}
+_QUERY_TOKENS = re.compile(r'"([^"]*)"|(\S+)')
+
+META_COLUMNS = ("id", "created_at", "salesperson", "store", "source_name", "model", "prompt_version", "schema")
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def prompt_version(prompt: str) -> str:
+    """Short stable id for a prompt text, stored with every analysis made with it."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def _strings(value):
+    """All text in a JSON value, depth first. Parsed sections contribute their 'text' only."""
+    if isinstance(value, str):
+        if value:
+            yield value
+    elif isinstance(value, dict):
+        if isinstance(value.get("text"), str):
+            yield from _strings(value["title"]) if isinstance(value.get("title"), str) else ()
+            yield value["text"]
+            return
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def report_sections(analysis: dict, schema=APP_SCHEMA):
+    """
+    (section, text) pairs to index for one analysis: the top-level keys of
+    the app's analysis JSON, or the sections of the API's parsed tree.
+    """
+    sections = analysis["report"] if schema == API_SCHEMA else analysis
+    for name, value in sections.items():
+        text = "\n".join(_strings(value))
+        if text:
+            yield name, text
+
+
+def to_fts_query(text: str) -> str:
+    """
+    Turns search box input into an FTS5 query: words and "quoted phrases"
+    must all match, AND/OR/NOT are kept as operators and a trailing * does a
+    prefix search. Anything else is quoted, so user input never raises a
+    syntax error.
+    """
+    terms = []
+    for phrase, word in _QUERY_TOKENS.findall(text):
+        if word in _FTS_OPERATORS and terms:
+            terms.append(word)
+            continue
+        token = phrase if phrase else word
+        prefix = not phrase and token.endswith("*") and len(token) > 1
+        token = token.rstrip("*") if prefix else token
+        token = token.replace('"', "")
+        if token.strip():
+            terms.append(f'"{token}"' + ("*" if prefix else ""))
+    while terms and terms[-1] in _FTS_OPERATORS:
+        terms.pop()
+    return " ".join(terms)
+
+
+def _row_to_record(row):
+    record = dict(row)
+    record["analysis"] = json.loads(record.pop("analysis_json"))
+    return record
+
+
+class ReportStore:
+    """
+    SQLite-backed archive of analysis JSON returned by the model, with the
+    salesperson/store it was recorded for and the model and prompt version
+    that produced it. Connections are opened per call, so one store can be
+    shared across Streamlit script threads and API requests.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            # Readers never block the writer (and vice versa) while an export runs
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(reports)")}
+            for column, column_type in MIGRATED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE reports ADD COLUMN {column} {column_type}")
+            conn.execute(BACKFILL_SCHEMA)
+            conn.executescript(INDEXES)
+            self.search_enabled = self._init_search(conn)
+
+    def _init_search(self, conn):
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; everything but search keeps working
+            return False
+        if conn.execute("PRAGMA user_version").fetchone()[0] < FTS_INDEX_VERSION:
+            # First open since search was added: index the reports stored so far
+            conn.execute("DELETE FROM report_fts")
+            for row in conn.execute("SELECT id, schema, analysis_json FROM reports"):
+                self._index(conn, row["id"], json.loads(row["analysis_json"]), row["schema"])
+            conn.execute(f"PRAGMA user_version = {FTS_INDEX_VERSION}")
+        return True
+
+    @staticmethod
+    def _index(conn, report_id, analysis, schema):
+        conn.executemany(
+            "INSERT INTO report_fts (report_id, section, body) VALUES (?, ?, ?)",
+            [(report_id, section, text) for section, text in report_sections(analysis, schema)],
+        )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def add(self, analysis: dict, salesperson=None, store=None, source_name=None, created_at=None,
+            model=None, prompt_version=None, schema=APP_SCHEMA) -> int:
+        """Stores one analysis of the given `schema` (APP_SCHEMA or API_SCHEMA) and returns its id."""
+        if schema not in (APP_SCHEMA, API_SCHEMA):
+            raise ValueError(f"Unknown report schema: {schema!r}")
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO reports (created_at, salesperson, store, source_name, model, prompt_version, schema, analysis_json)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    created_at or _utc_now(),
+                    salesperson or None,
+                    store or None,
+                    source_name,
+                    model,
+                    prompt_version,
+                    schema,
+                    json.dumps(analysis, ensure_ascii=False),
+                ),
+            )
+            # Same transaction, so the search index never misses a report
+            if self.search_enabled:
+                self._index(conn, cursor.lastrowid, analysis, schema)
+            return cursor.lastrowid
+
+    def get(self, report_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        return _row_to_record(row) if row else None
+
+    def _where(self, salesperson=None, store=None, date_from=None, date_to=None, model=None, prompt_version=None,
+               schema=None):
+        clauses, params = [], []
+        for column, value in (("salesperson", salesperson), ("store", store), ("model", model),
+                              ("prompt_version", prompt_version), ("schema", schema)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if date_from:
+            clauses.append("created_at >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            # Dates are inclusive: everything before the start of the next day
+            clauses.append("created_at < ?")
+            params.append((date_to + timedelta(days=1)).isoformat())
+        return clauses, params
+
+    @staticmethod
+    def _sql_where(clauses):
+        return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    def count(self, **filters):
+        clauses, params = self._where(**filters)
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM reports{self._sql_where(clauses)}", params).fetchone()[0]
+
+    def query(self, **filters):
+        """
+        Yields stored reports matching the filters (salesperson, store,
+        date_from, date_to, model, prompt_version, schema) oldest first, one row at a time.
+        Rows are read in keyset batches on id, so a slow consumer never keeps a
+        read transaction open for the whole iteration.
+        """
+        clauses, params = self._where(**filters)
+        last_id = 0
+        while True:
+            sql = f"SELECT * FROM reports{self._sql_where(clauses + ['id > ?'])} ORDER BY id LIMIT ?"
+            with closing(self._connect()) as conn:
+                rows = conn.execute(sql, params + [last_id, QUERY_BATCH_SIZE]).fetchall()
+            for row in rows:
+                yield _row_to_record(row)
+            if len(rows) < QUERY_BATCH_SIZE:
+                return
+            last_id = rows[-1]["id"]
+
+    def page(self, limit=50, after=None, newest_first=True, sections=None, **filters):
+        """
+        One page of reports using keyset pagination on id: pass the returned
+        cursor as `after` to continue. `sections` limits "analysis" to those
+        sections, extracted inside SQLite so the full JSON is never loaded:
+        top-level keys of app reports, and section titles (or the top-level
+        "score"/"entities") of API reports; each record's "schema" says which.
+        Returns (records, next_cursor); next_cursor is None on the last page.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = self._where(**filters)
+        if after is not None:
+            clauses.append("id < ?" if newest_first else "id > ?")
+            params.append(int(after))
+
+        if sections is None:
+            columns = "*"
+            select_params = []
+        else:
+            sections = list(sections)
+            if any('"' in section for section in sections):
+                raise ValueError("Section names cannot contain '\"'")
+            # json_quote keeps objects as JSON and quotes plain strings, so every value decodes the same way
+            extract = (
+                f"json_quote(CASE WHEN schema = '{API_SCHEMA}'"
+                " THEN coalesce(json_extract(analysis_json, ?), json_extract(analysis_json, ?))"
+                " ELSE json_extract(analysis_json, ?) END) AS s{}"
+            )
+            columns = ", ".join(list(META_COLUMNS) + [extract.format(i) for i in range(len(sections))])
+            select_params = [
+                path
+                for section in sections
+                for path in (f'$.report."{section}"', f'$."{section}"', f'$."{section}"')
+            ]
+
+        sql = (
+            f"SELECT {columns} FROM reports{self._sql_where(clauses)}"
+            f" ORDER BY id {'DESC' if newest_first else 'ASC'} LIMIT ?"
+        )
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, select_params + params + [limit + 1]).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if sections is None:
+            records = [_row_to_record(row) for row in rows]
+        else:
+            records = []
+            for row in rows:
+                record = {column: row[column] for column in META_COLUMNS}
+                # Sections the report does not have come back as None
+                record["analysis"] = {section: json.loads(row[f"s{i}"]) for i, section in enumerate(sections)}
+                records.append(record)
+        next_cursor = records[-1]["id"] if has_more and records else None
+        return records, next_cursor
+
+    def search(self, text, limit=20, highlight=("**", "**"), **filters):
+        """
+        Full-text search over report sections, best match first (BM25).
+        Returns one hit per report: its metadata plus the best matching
+        `section`, a `snippet` with the matches wrapped in `highlight` and
+        the `rank` (lower is better). Takes the same filters as query().
+        """
+        if not self.search_enabled:
+            raise RuntimeError("Full-text search needs SQLite with FTS5")
+        match = to_fts_query(text)
+        if not match:
+            return []
+        clauses, params = self._where(**filters)
+        join = " JOIN reports r ON r.id = f.report_id" if clauses else ""
+        clauses = ["report_fts MATCH ?"] + [f"r.{clause}" for clause in clauses]
+
+        with closing(self._connect()) as conn:
+            # Rank first without snippets: snippet() is costly and only the top hits need it.
+            # Several sections of one report can match; grouping keeps each report's best one,
+            # and SQLite takes the bare rowid/section columns from that min(rank) row.
+            ranked = conn.execute(
+                f"SELECT f.rowid, f.report_id, f.section, min(f.rank) AS best_rank FROM report_fts f{join}"
+                f" WHERE {' AND '.join(clauses)} GROUP BY f.report_id ORDER BY best_rank LIMIT ?",
+                [match] + params + [limit],
+            )
+            best = {report_id: (fts_rowid, section, rank) for fts_rowid, report_id, section, rank in ranked}
+            if not best:
+                return []
+
+            fts_rowids = [hit[0] for hit in best.values()]
+            marks = ", ".join("?" * len(best))
+            snippets = dict(conn.execute(
+                f"SELECT rowid, snippet(report_fts, 2, ?, ?, '…', 16) FROM report_fts"
+                f" WHERE report_fts MATCH ? AND rowid IN ({marks})",
+                [highlight[0], highlight[1], match] + fts_rowids,
+            ))
+            rows = conn.execute(
+                f"SELECT {', '.join(META_COLUMNS)} FROM reports WHERE id IN ({marks})",
+                list(best),
+            )
+            meta = {row["id"]: dict(row) for row in rows}
+
+        hits = []
+        for report_id, (fts_rowid, section, rank) in best.items():
+            hit = meta[report_id]
+            hit.update(section=section, snippet=snippets.get(fts_rowid, ""), rank=rank)
+            hits.append(hit)
+        return hits
+
+    def add_fingerprint(self, report_id, fingerprint: bytes, duration: float) -> None:
+        """Keeps the acoustic fingerprint of the recording a report was made from (see fingerprint.py)."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (report_id, duration, fingerprint) VALUES (?, ?, ?)",
+                (report_id, duration, fingerprint),
+            )
+
+    def fingerprints(self, after=0):
+        """Yields (report_id, fingerprint bytes, duration) for report ids above `after`, in id order."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT report_id, fingerprint, duration FROM fingerprints WHERE report_id > ? ORDER BY report_id",
+                (after,),
+            )
+            for row in rows:
+                yield row["report_id"], row["fingerprint"], row["duration"]
+
+    def distinct(self, column):
+        if column not in ("salesperson", "store", "model", "prompt_version"):
+            raise ValueError(f"Unsupported column: {column}")
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT DISTINCT {column} FROM reports WHERE {column} IS NOT NULL ORDER BY {column}")
+            return [row[0] for row in rows]
@@ -0,0 +1,226 @@
+"""
+Salesperson effectiveness scoring, computed locally from the component
+scores the model returns. The weights and the N/A rule live here instead
+of in the prompt, so changing them never needs a model call: stored
+analyses are simply recomputed (see archive_scores).
+"""
+import argparse
+import re
+
+import numpy as np
+
+from report_store import API_SCHEMA, APP_SCHEMA
+
+COMPONENTS = ("product_promotion", "scheme_leverage", "competitor_handling", "customer_psychology_understanding")
+COMPONENT_LABELS = {
+    "product_promotion": "Product promotion",
+    "scheme_leverage": "Scheme leverage",
+    "competitor_handling": "Competitor handling",
+    "customer_psychology_understanding": "Customer psychology understanding",
+}
+# Percentages; must add up to 100
+DEFAULT_WEIGHTS = {
+    "product_promotion": 30,
+    "scheme_leverage": 20,
+    "competitor_handling": 25,
+    "customer_psychology_understanding": 25,
+}
+# A criterion that does not apply to the call (is_na) gets the full score
+FULL_SCORE = 10
+
+_MARKDOWN_SCORE = re.compile(
+    r"^\s*(?:[-*•]\s+)?\*\*(?P<label>Product promotion|Scheme leverage|Competitor handling|Customer psychology understanding)"
+    r"[^*]*\*\*\s*(?:(?P<na>N/?A)|(?P<score>\d+(?:\.\d+)?)\s*(?:/\s*10)?(?P<na_suffix>\s*\(N/?A\))?)",
+    re.IGNORECASE,
+)
+_LABEL_COMPONENTS = {label.lower(): key for key, label in COMPONENT_LABELS.items()}
+
+
+def _check_weights(weights):
+    missing = set(COMPONENTS) - set(weights)
+    if missing:
+        raise ValueError(f"Missing weights for: {', '.join(sorted(missing))}")
+    total = sum(weights[key] for key in COMPONENTS)
+    if abs(total - 100) > 1e-6:
+        raise ValueError(f"Weights must add up to 100, got {total}")
+
+
+def _as_score(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+# ===== Single Report =====
+def score_entries(analysis: dict, schema=APP_SCHEMA) -> dict:
+    """
+    {component: {"score", "is_na", ...}} as the model gave them: from the
+    effectiveness score block of app reports, or from the score lines of any
+    section of API reports.
+    """
+    if schema == API_SCHEMA:
+        entries = {}
+        for section in analysis.get("report", {}).values():
+            entries.update(section.get("scores", {}))
+        return entries
+    return analysis.get("salesperson_effectiveness_score", {}).get("scores", {})
+
+
+def component_scores(analysis: dict, schema=APP_SCHEMA) -> dict:
+    """Component scores of one analysis, with N/A criteria at FULL_SCORE. Unusable scores are None."""
+    scores = score_entries(analysis, schema)
+    result = {}
+    for key in COMPONENTS:
+        component = scores.get(key) or {}
+        result[key] = float(FULL_SCORE) if component.get("is_na") else _as_score(component.get("score"))
+    return result
+
+
+def final_score(components: dict, weights=DEFAULT_WEIGHTS):
+    """Weighted final score out of 10, or None if any component score is missing."""
+    _check_weights(weights)
+    if any(components.get(key) is None for key in COMPONENTS):
+        return None
+    return round(sum(components[key] * weights[key] for key in COMPONENTS) / 100, 2)
+
+
+def score_formula(weights=DEFAULT_WEIGHTS) -> str:
+    return " + ".join(f"({COMPONENT_LABELS[key]} × {weights[key] / 100:g})" for key in COMPONENTS)
+
+
+def apply_scores(analysis: dict, weights=DEFAULT_WEIGHTS) -> dict:
+    """
+    Fills in the weights, N/A full scores and final_score_calculation of an
+    analysis in place and returns it. Anything the model wrote there is replaced.
+    """
+    components = component_scores(analysis)
+    effectiveness = analysis.setdefault("salesperson_effectiveness_score", {})
+    scores = effectiveness.setdefault("scores", {})
+    for key in COMPONENTS:
+        component = scores.get(key)
+        if not isinstance(component, dict):
+            continue
+        component["weight_percentage"] = weights[key]
+        if component.get("is_na"):
+            component["score"] = FULL_SCORE
+
+    total = final_score(components, weights)
+    effectiveness["final_score_calculation"] = {
+        "formula": score_formula(weights),
+        "final_score": total if total is not None else "N/A",
+    }
+    return analysis
+
+
+def _score_from_match(match):
+    key = _LABEL_COMPONENTS[match["label"].lower()]
+    is_na = bool(match["na"] or match["na_suffix"])
+    return key, float(FULL_SCORE) if is_na else float(match["score"]), is_na
+
+
+def parse_score_line(line: str):
+    """
+    (component, score, is_na) for a markdown line like
+    '**Competitor handling (25% weight):** 7/10' or '... N/A', optionally
+    behind a list marker ('- **...'), else None.
+    """
+    match = _MARKDOWN_SCORE.match(line)
+    return _score_from_match(match) if match else None
+
+
+# ===== Archive =====
+def score_matrix(analyses, schemas=None):
+    """
+    Stacks the component scores of many analyses into an (n, 4) float array
+    (NaN where a score is missing) and a boolean N/A mask of the same shape.
+    `schemas` gives each analysis's schema; all are app reports without it.
+    """
+    rows, na_rows = [], []
+    schemas = schemas or [APP_SCHEMA] * len(analyses)
+    for analysis, schema in zip(analyses, schemas):
+        scores = score_entries(analysis, schema)
+        row, na_row = [], []
+        for key in COMPONENTS:
+            component = scores.get(key) or {}
+            score = _as_score(component.get("score"))
+            row.append(np.nan if score is None else score)
+            na_row.append(bool(component.get("is_na")))
+        rows.append(row)
+        na_rows.append(na_row)
+    shape = (len(rows), len(COMPONENTS))
+    return np.array(rows, dtype=float).reshape(shape), np.array(na_rows, dtype=bool).reshape(shape)
+
+
+def recompute_final_scores(scores, na_mask, weights=DEFAULT_WEIGHTS):
+    """Final scores for a whole score_matrix at once; NaN where a component is missing."""
+    _check_weights(weights)
+    vector = np.array([weights[key] for key in COMPONENTS], dtype=float) / 100
+    effective = np.where(na_mask, FULL_SCORE, scores)
+    return np.round(effective @ vector, 2)
+
+
+def archive_scores(store, weights=DEFAULT_WEIGHTS, **filters):
+    """
+    DataFrame of every stored report (optionally filtered like
+    ReportStore.query) with its component scores and the final score
+    recomputed under `weights`.
+    """
+    import pandas as pd
+
+    meta, analyses, schemas = [], [], []
+    for record in store.query(**filters):
+        meta.append({key: record[key] for key in ("id", "created_at", "salesperson", "store")})
+        analyses.append(record["analysis"])
+        schemas.append(record["schema"])
+
+    scores, na_mask = score_matrix(analyses, schemas)
+    df = pd.DataFrame(meta, columns=["id", "created_at", "salesperson", "store"])
+    effective = np.where(na_mask, FULL_SCORE, scores)
+    for index, key in enumerate(COMPONENTS):
+        df[key] = effective[:, index]
+    df["final_score"] = recompute_final_scores(scores, na_mask, weights)
+    return df
+
+
+def aggregate_scores(df, by="salesperson"):
+    """Mean component and final scores per group, plus the number of calls."""
+    columns = list(COMPONENTS) + ["final_score"]
+    grouped = df.groupby(by, dropna=False)
+    result = grouped[columns].mean().round(2)
+    result.insert(0, "calls", grouped.size())
+    return result.sort_values("final_score", ascending=False)
+
+
+def parse_weights(text):
+    """'30,20,25,25' → weights dict in COMPONENTS order."""
+    values = [float(part) for part in text.split(",")]
+    if len(values) != len(COMPONENTS):
+        raise ValueError(f"Expected {len(COMPONENTS)} weights, got {len(values)}")
+    return dict(zip(COMPONENTS, values))
+
+
+def main(argv=None):
+    from report_store import DEFAULT_DB_PATH, ReportStore
+
+    parser = argparse.ArgumentParser(description="Recompute effectiveness scores for stored analyses.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Report store database")
+    parser.add_argument("--weights", type=parse_weights, default=DEFAULT_WEIGHTS,
+                        help="Comma-separated percentages for " + ", ".join(COMPONENTS))
+    parser.add_argument("--by", default="salesperson", choices=["salesperson", "store"], help="Group the averages by")
+    parser.add_argument("--csv", help="Also write the per-report scores to this CSV file")
+    args = parser.parse_args(argv)
+
+    try:
+        _check_weights(args.weights)
+    except ValueError as e:
+        parser.error(str(e))
+
+    df = archive_scores(ReportStore(args.db), args.weights)
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    print(f"Formula: {score_formula(args.weights)}")
+    print(aggregate_scores(df, args.by).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Registry of the Streamlit sessions this process serves, so resources held
+for a session (its spooled upload, Streamlit's copy of the uploaded file)
+are released once the session has been idle for NAGA_SESSION_IDLE_MINUTES
+(default 30) or its browser has disconnected. Session state only holds
+small values (page, report id), so a session that comes back after being
+evicted still finds its report; only the upload has to be repeated.
+"""
+import os
+import threading
+import time
+
+DEFAULT_IDLE_TIMEOUT = float(os.getenv("NAGA_SESSION_IDLE_MINUTES", "30")) * 60
+# Idle sessions are looked for at most this often, from touch()
+SWEEP_INTERVAL = 60
+
+
+class SessionRegistry:
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, on_evict=None, is_active=None):
+        """
+        `on_evict(session_id, reason)` releases what the session holds, with
+        reason "idle" or "disconnected"; `is_active(session_id)` says whether
+        Streamlit still has the session connected.
+        """
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+        self.is_active = is_active
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
+
+    def touch(self, session_id, **info) -> None:
+        """Records activity of a session, with whatever describes it (page, report id, ...)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, {"first_seen": time.time()})
+            entry.update(info, last_seen=now)
+            due = now - self._last_sweep >= SWEEP_INTERVAL
+            if due:
+                self._last_sweep = now
+        if due:
+            self.sweep()
+
+    def sweep(self) -> list:
+        """Evicts idle and disconnected sessions. Returns their ids."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = list(self._sessions.items())
+        stale = []
+        for session_id, entry in candidates:
+            if now - entry["last_seen"] > self.idle_timeout:
+                stale.append((session_id, "idle"))
+            elif self.is_active is not None and not self.is_active(session_id):
+                stale.append((session_id, "disconnected"))
+        for session_id, reason in stale:
+            with self._lock:
+                if self._sessions.pop(session_id, None) is None:
+                    continue
+                self.evicted += 1
+            if self.on_evict is not None:
+                self.on_evict(session_id, reason)
+        return [session_id for session_id, _ in stale]
+
+    def snapshot(self) -> list:
+        """One dict per known session, most recently active first."""
+        now = time.monotonic()
+        with self._lock:
+            entries = [(session_id, dict(entry)) for session_id, entry in self._sessions.items()]
+        rows = []
+        for session_id, entry in entries:
+            entry["idle_seconds"] = round(now - entry.pop("last_seen"), 1)
+            rows.append({"session_id": session_id, **entry})
+        return sorted(rows, key=lambda row: row["idle_seconds"])
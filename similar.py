@@ -0,0 +1,237 @@
+"""
+"Similar calls": finds stored analyses whose objections and sales barriers
+read like those of a given call, so a manager can see how similar
+pushback was handled before.
+
+Each analysis becomes a TF-IDF vector over hashed words and word pairs
+(no vocabulary to refit, so calls are added one at a time as they are
+stored), plus a small dense random projection of it. The sketches are
+grouped into k-means clusters (an inverted-file index): a query scores the
+sketches in its nearest clusters (PROBE_ROWS of them in all) and reranks the best RERANK by
+exact cosine similarity of the TF-IDF vectors. Until the archive is large
+enough to cluster, every sketch is scored.
+
+The index lives in memory and is built from the ReportStore on first use;
+sync() picks up reports stored since, including those saved by other
+processes.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from report_store import MAX_PAGE_SIZE
+
+FEATURES = 2 ** 16
+# Dense sketch size: TF-IDF vectors are randomly projected to this many dimensions
+SKETCH_DIM = 256
+# Coarse clusters are (re)trained once the archive reaches this size, and again each time it doubles
+TRAIN_AT = 2000
+# Clusters are probed nearest first until this many sketches are scored
+PROBE_ROWS = 2000
+RERANK = 100
+PREVIEW_CHARS = 300
+
+_FOCUS = re.compile(r"objection|barrier|concern|pushback|resist|hesita", re.IGNORECASE)
+_WORD = re.compile(r"[a-z0-9]{2,}")
+_STOPWORDS = frozenset(
+    "the and for are was were but not with this that they them their there from have has had you your our "
+    "she his her its into than then also very just about which what when who will would could should "
+    "been being any all some more most such only own same too can did does doing out off over under "
+    "again further once here why how both each few other nor".split()
+)
+
+
+def _strings(value):
+    if isinstance(value, str):
+        if value.strip():
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def _focus_strings(value):
+    """Text under keys or section titles about objections, barriers and concerns."""
+    if isinstance(value, dict):
+        title = value.get("title")
+        if isinstance(title, str) and _FOCUS.search(title):
+            yield from _strings(value)
+            return
+        for key, item in value.items():
+            if _FOCUS.search(str(key)):
+                yield from _strings(item)
+            else:
+                yield from _focus_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _focus_strings(item)
+
+
+def similarity_text(analysis: dict) -> str:
+    """
+    The part of an analysis calls are compared on: its objections, barriers
+    and concerns (app JSON keys or API section titles), or all of its text
+    when it has none.
+    """
+    analysis = {key: value for key, value in analysis.items() if key != "entities"}
+    text = "\n".join(_focus_strings(analysis))
+    return text or "\n".join(_strings(analysis))
+
+
+def _terms(text):
+    words = [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def term_frequencies(text):
+    """Sparse (feature indices, 1 + log tf) of a text, features hashed into FEATURES buckets."""
+    counts = {}
+    for term in _terms(text):
+        feature = zlib.crc32(term.encode("utf-8")) % FEATURES
+        counts[feature] = counts.get(feature, 0) + 1
+    indices = np.fromiter(counts, dtype=np.int64, count=len(counts))
+    values = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    return indices, values.astype(np.float32)
+
+
+class SimilarityIndex:
+    def __init__(self, seed=0):
+        self._rng = np.random.default_rng(seed)
+        # ±1 projection; int8 keeps FEATURES x SKETCH_DIM at 16 MB
+        self._projection = self._rng.choice(np.array([-1, 1], dtype=np.int8), size=(FEATURES, SKETCH_DIM))
+        self._df = np.zeros(FEATURES, dtype=np.int32)
+        self._docs = {}
+        self._ids = []
+        self._sketches = np.zeros((0, SKETCH_DIM), dtype=np.float32)
+        self._centroids = None
+        self._lists = []
+        self._trained_at = 0
+        self.previews = {}
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _idf(self):
+        return np.log((1 + len(self._ids)) / (1 + self._df)).astype(np.float32) + 1
+
+    def _sketch(self, indices, weights):
+        sketch = weights @ self._projection[indices]
+        norm = np.linalg.norm(sketch)
+        return (sketch / norm if norm else sketch).astype(np.float32)
+
+    # ===== Clusters =====
+    def _train(self):
+        """A few rounds of spherical k-means over all sketches, sqrt(n) clusters."""
+        count = len(self._ids)
+        # Sketches made while the archive was small used early IDF values; redo them
+        idf = self._idf()
+        for indices, values, row in self._docs.values():
+            self._sketches[row] = self._sketch(indices, values * idf[indices])
+        sketches = self._sketches[:count]
+        clusters = int(np.sqrt(count))
+        centroids = sketches[self._rng.choice(count, clusters, replace=False)]
+        for _ in range(8):
+            assignment = np.argmax(sketches @ centroids.T, axis=1)
+            for cluster in range(clusters):
+                members = sketches[assignment == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1)
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assignment == cluster).tolist() for cluster in range(clusters)]
+        self._trained_at = count
+
+    # ===== Updates =====
+    def add(self, report_id, analysis: dict) -> None:
+        text = similarity_text(analysis)
+        indices, values = term_frequencies(text)
+        with self._lock:
+            self.last_id = max(self.last_id, report_id)
+            if report_id in self._docs or not len(indices):
+                return
+            self._df[indices] += 1
+            sketch = self._sketch(indices, values * self._idf()[indices])
+
+            row = len(self._ids)
+            if row == len(self._sketches):
+                grown = np.zeros((max(256, 2 * row), SKETCH_DIM), dtype=np.float32)
+                grown[:row] = self._sketches[:row]
+                self._sketches = grown
+            self._sketches[row] = sketch
+            self._ids.append(report_id)
+            self._docs[report_id] = (indices, values, row)
+            self.previews[report_id] = text[:PREVIEW_CHARS]
+
+            if self._centroids is not None:
+                self._lists[int(np.argmax(self._centroids @ sketch))].append(row)
+            if len(self._ids) >= max(TRAIN_AT, 2 * self._trained_at):
+                self._train()
+
+    def sync(self, store) -> int:
+        """Adds every report stored after the last one indexed. Returns how many were read."""
+        added = 0
+        while True:
+            records, _ = store.page(limit=MAX_PAGE_SIZE, after=self.last_id or None, newest_first=False)
+            for record in records:
+                self.add(record["id"], record["analysis"])
+            added += len(records)
+            if len(records) < MAX_PAGE_SIZE:
+                return added
+
+    # ===== Queries =====
+    def _query(self, indices, values, k, exclude):
+        with self._lock:
+            idf = self._idf()
+            weights = values * idf[indices]
+            norm = np.linalg.norm(weights)
+            if not norm or not self._ids:
+                return []
+            sketch = self._sketch(indices, weights)
+
+            if self._centroids is None:
+                rows = np.arange(len(self._ids))
+            else:
+                probed = []
+                for cluster in np.argsort(self._centroids @ sketch)[::-1].tolist():
+                    probed.extend(self._lists[cluster])
+                    if len(probed) >= PROBE_ROWS:
+                        break
+                rows = np.array(probed, dtype=np.int64)
+            coarse = self._sketches[rows] @ sketch
+            rows = rows[np.argsort(coarse)[::-1][:RERANK + 1]]
+
+            query = np.zeros(FEATURES, dtype=np.float32)
+            query[indices] = weights / norm
+            scored = []
+            for row in rows.tolist():
+                report_id = self._ids[row]
+                if report_id == exclude:
+                    continue
+                doc_indices, doc_values, _ = self._docs[report_id]
+                doc_weights = doc_values * idf[doc_indices]
+                score = float(query[doc_indices] @ doc_weights) / float(np.linalg.norm(doc_weights))
+                if score > 0:
+                    scored.append((score, report_id))
+        scored.sort(reverse=True)
+        return [(report_id, round(score, 4)) for score, report_id in scored[:k]]
+
+    def similar_to_report(self, report_id, k=5):
+        """[(report_id, cosine similarity)] of the k calls most like an indexed one, best first."""
+        doc = self._docs.get(report_id)
+        if doc is None:
+            return []
+        return self._query(doc[0], doc[1], k, exclude=report_id)
+
+    def similar_to_text(self, text, k=5):
+        """Same for free text, e.g. an objection typed in by a manager."""
+        indices, values = term_frequencies(text)
+        if not len(indices):
+            return []
+        return self._query(indices, values, k, exclude=None)
@@ -0,0 +1,162 @@
+"""Synthetic analysis reports shaped like the model's JSON and markdown output, for the synthetic model client and benchmarks."""
+import random
+
+from report_model import COMPETITOR_CATEGORIES
+
+BRANDS = ["Nandi", "Sankar", "Shakti", "Aachi", "MTR", "Britannia", "Anil", "Gold Winner"]
+PRODUCTS = ["Rava", "Maida", "Atta", "Kadalai Maavu", "Rice Flour", "Ragi Maavu", "Upma Semiya", "Rusk", "Chips", "Gulab Jamun Mix"]
+CATEGORIES = list(COMPETITOR_CATEGORIES)
+WORDS = (
+    "customer retailer stock scheme price margin free piece discount bag kg packet offer "
+    "demand brand quality taste habit local supply credit order week month rate cheaper"
+).split()
+
+
+def sentence(rnd, low=6, high=24):
+    words = rnd.choices(WORDS, k=rnd.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_report(rnd=None):
+    """Returns one random report dict following the analysis JSON schema."""
+    rnd = rnd or random.Random()
+    products = rnd.sample(PRODUCTS, rnd.randint(1, 5))
+    competitors = [
+        {
+            "brand_name": rnd.choice(BRANDS),
+            "product": rnd.choice(PRODUCTS),
+            "customer_current_status": sentence(rnd, 4, 12),
+            "reasons_for_preference": sentence(rnd),
+            "category": rnd.choice(CATEGORIES),
+        }
+        for _ in range(rnd.randint(0, 4))
+    ]
+    component_keys = ["product_promotion", "scheme_leverage", "competitor_handling", "customer_psychology_understanding"]
+    weights = [30, 20, 25, 25]
+    scores = {
+        key: {"score": rnd.randint(1, 10), "weight_percentage": weight, "justification": sentence(rnd)}
+        for key, weight in zip(component_keys, weights)
+    }
+    scores["competitor_handling"]["is_na"] = not competitors
+    final_score = round(sum(s["score"] * s["weight_percentage"] / 100 for s in scores.values()), 2)
+
+    return {
+        "brand_product_mapping": {
+            "naga_brand_products": {"products_list": [f"{p} ({rnd.choice(['200g', '500g', '1kg'])})" for p in products]},
+            "competitor_brands_mentioned": [f"{c['brand_name']}: {c['product']}" for c in competitors],
+        },
+        "conversation_summary": {"summary_points": [sentence(rnd) for _ in range(rnd.randint(3, 5))]},
+        "sales_matrix": {
+            "naga_products_performance": {
+                "naga_products_promoted": ", ".join(products),
+                "volume_pushed_upselling": sentence(rnd),
+                "schemes_offered": {
+                    "description": sentence(rnd),
+                    "scheme_details": [{"product": p, "scheme": sentence(rnd, 4, 10)} for p in products[:2]],
+                },
+                "cross_selling_within_naga_portfolio": sentence(rnd),
+                "acceptance_rejection": {"accepted": products[:1], "rejected": products[1:2]},
+            },
+            "sales_barriers": {"objections_raised": sentence(rnd), "competitor_advantages_cited": sentence(rnd)},
+        },
+        "customer_buying_patterns": {
+            "regularly_buying_products": {"description": "Customer commits to buy BEFORE schemes are explained", "products": products[:2]},
+            "scheme_based_orders": {"description": "Customer commits to buy ONLY BECAUSE schemes influenced their decision", "products": products[2:3]},
+        },
+        "competitive_intelligence_and_customer_psychology": {
+            "competitor_brand_analysis": competitors,
+            "online_retailers_mentioned": [],
+            "customer_buying_psychology": {
+                "purchase_decision_drivers_ranked": [sentence(rnd, 2, 5) for _ in range(3)],
+                "risk_tolerance": sentence(rnd),
+                "stock_rotation_preferences": sentence(rnd),
+                "openness_to_switching": sentence(rnd),
+                "buying_behaviour": sentence(rnd),
+            },
+        },
+        "salesperson_effectiveness_score": {
+            "scores": scores,
+            "final_score_calculation": {"formula": "(PP × 0.3) + (SL × 0.2) + (CH × 0.25) + (CP × 0.25)", "final_score": final_score},
+        },
+        "salesperson_ability_analysis": sentence(rnd, 20, 60),
+        "product_price_analysis": {
+            "summary": sentence(rnd),
+            "high_price_products": [{"product": p, "price_point": f"₹{rnd.randint(20, 90)}", "customer_exact_concerns": sentence(rnd)} for p in products[:1]],
+        },
+        "salesperson_strengths": [sentence(rnd) for _ in range(3)],
+        "areas_for_improvement": [sentence(rnd) for _ in range(3)],
+    }
+
+
+def synthetic_reports(count, seed=0):
+    rnd = random.Random(seed)
+    return [synthetic_report(rnd) for _ in range(count)]
+
+
+def synthetic_markdown(rnd=None):
+    """Returns one random analysis in the markdown template of naga.ANALYSIS_PROMPT."""
+    rnd = rnd or random.Random()
+    report = synthetic_report(rnd)
+    products = report["brand_product_mapping"]["naga_brand_products"]["products_list"]
+    performance = report["sales_matrix"]["naga_products_performance"]
+    barriers = report["sales_matrix"]["sales_barriers"]
+    patterns = report["customer_buying_patterns"]
+    psychology = report["competitive_intelligence_and_customer_psychology"]["customer_buying_psychology"]
+    competitors = report["competitive_intelligence_and_customer_psychology"]["competitor_brand_analysis"]
+    scores = report["salesperson_effectiveness_score"]["scores"]
+    rule = "-" * 60
+
+    lines = ["# Brand & Product Mapping", "", "A. Naga Brand Products"]
+    lines += [f"- {product}" for product in products]
+    lines += ["", "B. Competitor Brands Mentioned"]
+    lines += [f"- {brand}" for brand in report["brand_product_mapping"]["competitor_brands_mentioned"]] or ["- None"]
+    lines += ["", rule, "", "# 1. Conversation Summary"]
+    lines += [f"- {point}" for point in report["conversation_summary"]["summary_points"]]
+    lines += [
+        "", rule, "", "# 2. Sales Matrix", "", "**Naga Products Performance**",
+        f"- Naga products promoted: {performance['naga_products_promoted']}",
+        f"- Volume pushed / upselling: {performance['volume_pushed_upselling']}",
+        f"- Schemes offered: {performance['schemes_offered']['description']}",
+        f"- Cross-selling within Naga portfolio: {performance['cross_selling_within_naga_portfolio']}",
+        f"- Acceptance/Rejection: accepted {', '.join(performance['acceptance_rejection']['accepted']) or 'none'}",
+        "", "**Sales Barriers**",
+        f"- Objections raised: {barriers['objections_raised']}",
+        f"- Competitor advantages cited: {barriers['competitor_advantages_cited']}",
+        "", rule, "", "# 3. Customer Buying Patterns", "", "A. Regularly buying products",
+    ]
+    lines += [f"- {product}" for product in patterns["regularly_buying_products"]["products"]]
+    lines += ["", "B. Scheme Based Orders"]
+    lines += [f"- {product}" for product in patterns["scheme_based_orders"]["products"]]
+    lines += ["", rule, "", "# 4. Competitive Intelligence & Customer Psychology", "", "A. Competitor Brand Analysis"]
+    for number, brand in enumerate(competitors, 1):
+        lines += [
+            "", f"**Brand {number}:**",
+            f"- Brand Name: {brand['brand_name']}",
+            f"- Products: {brand['product']}",
+            f"- Customer's Current Status: {brand['customer_current_status']}",
+            f"- Reasons for Preference: {brand['reasons_for_preference']}",
+            f"- Category: {brand['category']}",
+        ]
+    lines += [
+        "", "C. Customer Buying Psychology",
+        f"- What truly drives purchase decisions: {', '.join(psychology['purchase_decision_drivers_ranked'])}",
+        f"- Customer's risk tolerance: {psychology['risk_tolerance']}",
+        f"- Stock rotation preferences: {psychology['stock_rotation_preferences']}",
+        f"- Openness to switching brands: {psychology['openness_to_switching']}",
+        f"- How is the customer buying behaviour: {psychology['buying_behaviour']}",
+        "", rule, "", "# 5. Salesperson Effectiveness Score", "",
+    ]
+    labels = {
+        "product_promotion": "Product promotion (30% weight)",
+        "scheme_leverage": "Scheme leverage (20% weight)",
+        "competitor_handling": "Competitor handling (25% weight)",
+        "customer_psychology_understanding": "Customer psychology understanding (25% weight)",
+    }
+    for key, label in labels.items():
+        score = "N/A" if scores[key].get("is_na") else f"{scores[key]['score']}/10"
+        lines.append(f"**{label}:** {score}")
+    lines += ["", rule, "", "# 6. Salesperson Ability Analysis", f"- {report['salesperson_ability_analysis']}"]
+    lines += ["", rule, "", "# 7. Product Price Analysis", f"- {report['product_price_analysis']['summary']}"]
+    lines += ["", rule, "", "# 8. Salesperson Strengths"] + [f"- {item}" for item in report["salesperson_strengths"]]
+    lines += ["", rule, "", "# 9. Areas for Improvement"] + [f"- {item}" for item in report["areas_for_improvement"]]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,181 @@
+"""
+Uploaded recordings in the Streamlit analyzer: each upload is written to
+disk once (NAGA_UPLOAD_DIR, default <tmp>/naga-uploads), the audio player
+gets a small mono MP3 preview instead of the full file, and the model,
+fingerprinting and exports read the spooled file by path or through a
+read-only memory map.
+
+UploadTracker keeps the uploads each session holds (one, or a batch of
+calls), with their bytes in memory (Streamlit's own copy of the upload
+plus the preview) and on disk. A file an analysis job still needs is
+pinned: it stays on disk after the session lets go of it (clears the
+widget, leaves the page, is evicted) until the last job using it ends.
+"""
+import mmap
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+DEFAULT_UPLOAD_DIR = os.path.join(tempfile.gettempdir(), "naga-uploads")
+# Voice stays intelligible at this rate; a 10 minute call previews in ~2.4 MB
+PREVIEW_BITRATE = "32k"
+PREVIEW_SAMPLE_RATE = 22050
+PREVIEW_TIMEOUT = 120
+# Spooled files older than this belong to sessions that are long gone
+STALE_AFTER = 24 * 3600
+
+
+@dataclass(slots=True)
+class SpooledUpload:
+    file_id: str
+    name: str
+    path: str
+    size: int
+    preview: bytes = None  # MP3, or None when ffmpeg is not available
+
+    @property
+    def memory_bytes(self) -> int:
+        # Streamlit keeps the uploaded bytes for as long as the widget holds the file
+        return self.size + len(self.preview or b"")
+
+    @contextmanager
+    def mapped(self):
+        """Read-only memoryview of the spooled file, valid inside the with block."""
+        if not self.size:
+            yield memoryview(b"")
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            view = memoryview(mapping)
+            try:
+                yield view
+            finally:
+                view.release()
+
+    def remove(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def upload_dir() -> str:
+    return os.getenv("NAGA_UPLOAD_DIR", DEFAULT_UPLOAD_DIR)
+
+
+def _sweep(directory, max_age=STALE_AFTER):
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def make_preview(path):
+    """Mono MP3 at PREVIEW_BITRATE, or None when ffmpeg is missing or cannot decode the file."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-nostdin", "-v", "error", "-i", path, "-vn", "-ac", "1",
+             "-ar", str(PREVIEW_SAMPLE_RATE), "-b:a", PREVIEW_BITRATE, "-f", "mp3", "-"],
+            capture_output=True,
+            timeout=PREVIEW_TIMEOUT,
+        )
+    except subprocess.TimeoutExpired:
+        return None
+    return result.stdout if result.returncode == 0 and result.stdout else None
+
+
+def spool_upload(uploaded_file, directory=None, preview=True) -> SpooledUpload:
+    """Writes a Streamlit UploadedFile to disk and builds its preview (unless `preview` is False)."""
+    directory = directory or upload_dir()
+    os.makedirs(directory, exist_ok=True)
+    _sweep(directory)
+    # The name comes from the browser, so only its extension is used
+    extension = os.path.splitext(uploaded_file.name)[1].lower()[:8]
+    path = os.path.join(directory, f"{uuid.uuid4().hex}{extension}")
+    # getvalue() shares the upload's buffer rather than copying it
+    data = uploaded_file.getvalue()
+    with open(path, "wb") as f:
+        f.write(data)
+    upload = SpooledUpload(uploaded_file.file_id, uploaded_file.name, path, len(data))
+    if preview:
+        upload.preview = make_preview(path)
+    return upload
+
+
+class UploadTracker:
+    """The spooled uploads of each session, for memory accounting and cleanup."""
+
+    def __init__(self):
+        self._uploads = {}
+        self._pins = Counter()
+        self._lock = threading.Lock()
+
+    def _discard(self, uploads) -> None:
+        # Files still pinned by a job are deleted by its unpin() instead
+        with self._lock:
+            unused = [upload for upload in uploads if not self._pins[upload.path]]
+        for upload in unused:
+            upload.remove()
+
+    def track(self, session_id, uploads) -> None:
+        """Makes `uploads` the session's current ones, deleting the files no longer among them."""
+        uploads = list(uploads)
+        with self._lock:
+            previous = self._uploads.get(session_id, [])
+            self._uploads[session_id] = uploads
+        kept = {upload.path for upload in uploads}
+        self._discard([upload for upload in previous if upload.path not in kept])
+
+    def release(self, session_id) -> None:
+        with self._lock:
+            uploads = self._uploads.pop(session_id, [])
+        self._discard(uploads)
+
+    def pin(self, upload: SpooledUpload) -> None:
+        """Keeps the file on disk until the matching unpin(), whatever its session does meanwhile."""
+        with self._lock:
+            self._pins[upload.path] += 1
+
+    def unpin(self, upload: SpooledUpload) -> None:
+        """Deletes the file once no job needs it and no session holds it any more."""
+        with self._lock:
+            self._pins[upload.path] -= 1
+            if self._pins[upload.path] > 0:
+                return
+            del self._pins[upload.path]
+            held = any(held.path == upload.path for uploads in self._uploads.values() for held in uploads)
+        if not held:
+            upload.remove()
+
+    def current(self, session_id) -> list:
+        return self._uploads.get(session_id, [])
+
+    def stats(self) -> dict:
+        with self._lock:
+            uploads = dict(self._uploads)
+        sessions = {
+            session_id: {
+                "file": files[0].name if len(files) == 1 else f"{len(files)} files",
+                "memory_bytes": sum(upload.memory_bytes for upload in files),
+                "disk_bytes": sum(upload.size for upload in files),
+            }
+            for session_id, files in uploads.items()
+            if files
+        }
+        return {
+            "sessions": sessions,
+            "memory_bytes": sum(session["memory_bytes"] for session in sessions.values()),
+            "disk_bytes": sum(session["disk_bytes"] for session in sessions.values()),
+        }